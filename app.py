@@ -8,6 +8,7 @@ import os
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
 from dotenv import load_dotenv
+from server.utils.uploads import InMemoryRequest
 
 # Chargement des variables d'environnement
 load_dotenv()
@@ -18,6 +19,10 @@ app = Flask(__name__,
             template_folder='client/build')
 CORS(app)
 
+# Fichiers reçus gardés en mémoire, taille des requêtes bornée (413 au-delà)
+app.request_class = InMemoryRequest
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('JARVIS_MAX_REQUEST_BYTES', 16 * 1024 * 1024))
+
 # Importation des routes API
 from server.api.routes import api_blueprint
 
@@ -35,6 +40,11 @@ def not_found(e):
     """Gestion des erreurs 404"""
     return jsonify(error=str(e)), 404
 
+@app.errorhandler(413)
+def request_too_large(e):
+    """Gestion des requêtes trop volumineuses"""
+    return jsonify(status="error", message=str(e)), 413
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
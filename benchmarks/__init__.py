@@ -0,0 +1,3 @@
+"""
+Bancs d'essai de l'assistant JARVIS
+"""
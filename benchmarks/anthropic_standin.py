@@ -0,0 +1,315 @@
+"""
+Substitut local de l'API Messages d'Anthropic, pour les tests de charge
+
+Répond à POST /v1/messages comme l'API (réponse complète ou flux SSE), avec
+une latence tirée d'une distribution configurable, un débit de génération
+en tokens par seconde, des compteurs `usage` vraisemblables (cache de prompt
+compris) et des taux d'erreurs 429/529 configurables. Aucun quota n'est
+consommé : les réponses sont du texte généré localement, sans appel d'outil.
+
+Usage :
+    python -m benchmarks.anthropic_standin --port 8765 --latency-ms 600 --error-rate 0.01
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 python app.py
+"""
+
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    'bien noté je vous le rappelle demain matin votre rendez-vous est confirmé '
+    'la tâche a été ajoutée à votre liste pensez à vérifier le calendrier avant '
+    'de partir il reste trois tâches en attente dont une en retard'
+).split()
+
+# Caractères par token (même estimation que le ContextManager)
+CHARS_PER_TOKEN = 3.5
+
+# Durée de vie du cache de prompt simulé (secondes)
+CACHE_TTL = 300
+
+
+class StandinConfig:
+    """Comportement du substitut (latences, longueur des réponses, erreurs)"""
+
+    def __init__(self, latency_ms=500.0, latency_dist='lognormal', jitter=0.5, output_tokens=80,
+                 tokens_per_second=80.0, error_rate=0.0, rate_limit_rate=0.0, seed=None):
+        """
+        Args:
+            latency_ms (float, optional): Latence médiane avant le premier token
+            latency_dist (str, optional): fixed, uniform, exponential ou lognormal
+            jitter (float, optional): Dispersion (écart-type du log en lognormal,
+                demi-largeur relative en uniform)
+            output_tokens (int, optional): Longueur moyenne des réponses
+            tokens_per_second (float, optional): Débit de génération
+            error_rate (float, optional): Part des requêtes en erreur 529 (surcharge)
+            rate_limit_rate (float, optional): Part des requêtes refusées en 429
+            seed (int, optional): Graine du générateur (tirages reproductibles)
+        """
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.jitter = jitter
+        self.output_tokens = output_tokens
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_token_delay(self):
+        """Délai avant le premier token (secondes)"""
+        median = self.latency_ms / 1000
+        with self._lock:
+            if self.latency_dist == 'fixed':
+                return median
+            if self.latency_dist == 'uniform':
+                return max(self._rng.uniform(median * (1 - self.jitter), median * (1 + self.jitter)), 0.0)
+            if self.latency_dist == 'exponential':
+                return self._rng.expovariate(1 / median) if median else 0.0
+            return self._rng.lognormvariate(math.log(median), self.jitter) if median else 0.0
+
+    def draw_failure(self):
+        """Erreur simulée pour une requête : 429, 529 ou None"""
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.rate_limit_rate:
+            return 429
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 529
+        return None
+
+    def reply_words(self, max_tokens):
+        """Mots de la réponse (un mot compté pour un token)"""
+        with self._lock:
+            count = max(1, min(int(self._rng.expovariate(1 / self.output_tokens)) + 1, max_tokens))
+            return [self._rng.choice(WORDS) for _ in range(count)]
+
+
+class PromptCache:
+    """Cache de prompt simulé : préfixes marqués cache_control déjà vus"""
+
+    def __init__(self):
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def usage(self, request):
+        """
+        Compteurs d'entrée d'une requête
+
+        Le préfixe jusqu'au dernier bloc marqué cache_control (outils,
+        prompt système, messages) est lu depuis le cache s'il a déjà été vu
+        depuis moins de CACHE_TTL secondes, écrit sinon.
+
+        Args:
+            request (dict): Corps de la requête
+
+        Returns:
+            dict: input_tokens, cache_creation_input_tokens, cache_read_input_tokens
+        """
+        # Ordre de l'API : outils, prompt système, messages
+        parts = [json.dumps(tool, ensure_ascii=False, sort_keys=True) for tool in request.get('tools', [])]
+        cached_parts = 0
+        system = request.get('system') or []
+        if isinstance(system, str):
+            system = [{'type': 'text', 'text': system}]
+        blocks = list(system)
+        for message in request.get('messages', []):
+            content = message['content']
+            blocks.extend([{'type': 'text', 'text': content}] if isinstance(content, str) else content)
+
+        for block in blocks:
+            parts.append(json.dumps(block, ensure_ascii=False, sort_keys=True))
+            if block.get('cache_control'):
+                cached_parts = len(parts)
+
+        prefix = ''.join(parts[:cached_parts])
+        prefix_tokens = math.ceil(len(prefix) / CHARS_PER_TOKEN)
+        total_tokens = math.ceil(len(''.join(parts)) / CHARS_PER_TOKEN)
+        usage = {
+            'input_tokens': total_tokens - prefix_tokens,
+            'cache_creation_input_tokens': 0,
+            'cache_read_input_tokens': 0
+        }
+        if not prefix:
+            return usage
+
+        key = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+        now = time.monotonic()
+        with self._lock:
+            hit = now - self._seen.get(key, -CACHE_TTL - 1) <= CACHE_TTL
+            self._seen[key] = now
+            if len(self._seen) > 10000:
+                self._seen = {key: seen for key, seen in self._seen.items() if now - seen <= CACHE_TTL}
+        usage['cache_read_input_tokens' if hit else 'cache_creation_input_tokens'] = prefix_tokens
+        return usage
+
+
+def make_handler(config, cache):
+    """Classe de gestionnaire HTTP liée à une configuration"""
+
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            try:
+                self._handle_messages()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client parti (délai dépassé, appel doublé annulé)
+                self.close_connection = True
+
+        def _handle_messages(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return self._error(400, 'invalid_request_error', 'Corps JSON invalide')
+
+            if self.path.split('?', 1)[0] != '/v1/messages':
+                return self._error(404, 'not_found_error', f'Route inconnue: {self.path}')
+
+            failure = config.draw_failure()
+            time.sleep(config.first_token_delay())
+            if failure == 429:
+                return self._error(429, 'rate_limit_error', 'Limite de débit simulée', retry_after='1')
+            if failure == 529:
+                return self._error(529, 'overloaded_error', 'Surcharge simulée')
+
+            usage = cache.usage(request)
+            words = config.reply_words(request.get('max_tokens', 1024))
+            message = {
+                'id': f"msg_{uuid.uuid4().hex[:24]}",
+                'type': 'message',
+                'role': 'assistant',
+                'model': request.get('model', 'standin'),
+                'content': [],
+                'stop_reason': None,
+                'stop_sequence': None,
+                'usage': dict(usage, output_tokens=1)
+            }
+
+            if request.get('stream'):
+                return self._stream(message, words)
+
+            time.sleep(len(words) / config.tokens_per_second)
+            message.update(
+                content=[{'type': 'text', 'text': ' '.join(words).capitalize() + '.'}],
+                stop_reason='end_turn',
+                usage=dict(usage, output_tokens=len(words))
+            )
+            self._send_json(200, message)
+
+        def _stream(self, message, words):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            self._event('message_start', {'type': 'message_start', 'message': message})
+            self._event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                                'content_block': {'type': 'text', 'text': ''}})
+            interval = 1 / config.tokens_per_second
+            for index, word in enumerate(words):
+                text = word.capitalize() if index == 0 else f' {word}'
+                if index == len(words) - 1:
+                    text += '.'
+                self._event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                                    'delta': {'type': 'text_delta', 'text': text}})
+                time.sleep(interval)
+            self._event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+            self._event('message_delta', {'type': 'message_delta',
+                                          'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                                          'usage': {'output_tokens': len(words)}})
+            self._event('message_stop', {'type': 'message_stop'})
+            self._chunk(b'')
+
+        def _event(self, event, payload):
+            self._chunk(f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8'))
+
+        def _chunk(self, data):
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+
+        def _error(self, status, error_type, message, retry_after=None):
+            headers = {'retry-after': retry_after} if retry_after else {}
+            self._send_json(status, {'type': 'error', 'error': {'type': error_type, 'message': message}}, headers)
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return StandinHandler
+
+
+def serve(host='127.0.0.1', port=8765, config=None):
+    """
+    Démarre le substitut (bloquant)
+
+    Args:
+        host (str, optional): Adresse d'écoute
+        port (int, optional): Port d'écoute
+        config (StandinConfig, optional): Comportement du substitut
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(config or StandinConfig(), PromptCache()))
+    server.daemon_threads = True
+    print(f"Substitut de l'API Anthropic sur http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Substitut local de l'API Messages d'Anthropic")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=500.0,
+                        help="Latence médiane avant le premier token (défaut : 500)")
+    parser.add_argument('--latency-dist', choices=('fixed', 'uniform', 'exponential', 'lognormal'),
+                        default='lognormal')
+    parser.add_argument('--jitter', type=float, default=0.5,
+                        help="Dispersion de la latence (défaut : 0.5)")
+    parser.add_argument('--output-tokens', type=int, default=80,
+                        help="Longueur moyenne des réponses en tokens (défaut : 80)")
+    parser.add_argument('--tokens-per-second', type=float, default=80.0,
+                        help="Débit de génération (défaut : 80)")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Part des requêtes en erreur 529 (défaut : 0)")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0,
+                        help="Part des requêtes refusées en 429 (défaut : 0)")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    config = StandinConfig(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        jitter=args.jitter,
+        output_tokens=args.output_tokens,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    serve(args.host, args.port, config)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
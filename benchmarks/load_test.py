@@ -0,0 +1,276 @@
+"""
+Générateur de charge pour les pipelines texte et voix de l'assistant
+
+Simule N sessions simultanées qui envoient chacune leurs requêtes l'une
+après l'autre à /api/process_text et/ou /api/process_voice, puis affiche
+le débit et les latences p50/p95/p99 côté client et par étape côté serveur
+(en-tête Server-Timing : stt, queue, llm, tts, total).
+
+Sans quota d'API, avec le substitut local d'Anthropic :
+    python -m benchmarks.anthropic_standin --latency-ms 600 &
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 gunicorn app:app &
+    python -m benchmarks.load_test --sessions 50 --requests 20 --pipeline both
+
+Le pipeline voix passe par le service de reconnaissance vocale configuré.
+"""
+
+import io
+import sys
+import math
+import json
+import time
+import uuid
+import wave
+import struct
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+from collections import Counter, defaultdict
+
+PROMPTS = (
+    "Quelles sont mes tâches pour aujourd'hui ?",
+    "Ajoute une tâche : rappeler le garage demain",
+    "Qu'est-ce que j'ai dans mon agenda cette semaine ?",
+    "Rappelle-moi d'appeler le médecin à 17 heures",
+    "Résume ce qui est en retard",
+    "Quelle est la tâche la plus urgente ?",
+)
+
+# Ordre d'affichage des étapes de l'en-tête Server-Timing
+STAGES = ('stt', 'queue', 'llm', 'tts', 'total')
+
+
+def make_wav(seconds=1.5, rate=16000, frequency=440.0):
+    """
+    Fichier WAV de test (son pur, mono 16 bits)
+
+    Args:
+        seconds (float, optional): Durée
+        rate (int, optional): Fréquence d'échantillonnage
+        frequency (float, optional): Fréquence du son
+
+    Returns:
+        bytes: Contenu du fichier WAV
+    """
+    samples = int(seconds * rate)
+    frames = b''.join(
+        struct.pack('<h', int(3000 * math.sin(2 * math.pi * frequency * index / rate)))
+        for index in range(samples)
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        output.writeframes(frames)
+    return buffer.getvalue()
+
+
+def parse_server_timing(header):
+    """
+    Durées d'un en-tête Server-Timing
+
+    Args:
+        header (str): Valeur de l'en-tête (ex. "llm;dur=512.3, total;dur=530.0")
+
+    Returns:
+        dict: Durée en millisecondes par étape
+    """
+    stages = {}
+    for metric in (header or '').split(','):
+        name, _, parameters = metric.strip().partition(';')
+        for parameter in parameters.split(';'):
+            key, _, value = parameter.strip().partition('=')
+            if key == 'dur' and name:
+                try:
+                    stages[name] = float(value)
+                except ValueError:
+                    pass
+    return stages
+
+
+class LoadSession:
+    """Une session simulée : une connexion HTTP persistante, des requêtes en série"""
+
+    def __init__(self, url, session_id, pipeline, requests, voice_response, think_time, timeout, audio):
+        self.url = urlsplit(url)
+        self.session_id = session_id
+        self.pipeline = pipeline
+        self.requests = requests
+        self.voice_response = voice_response
+        self.think_time = think_time
+        self.timeout = timeout
+        self.audio = audio
+        self.results = []
+        self._connection = None
+
+    def run(self):
+        for index in range(self.requests):
+            pipeline = self.pipeline
+            if pipeline == 'both':
+                pipeline = 'text' if index % 2 == 0 else 'voice'
+
+            if pipeline == 'voice':
+                body, content_type = self._multipart()
+                path = '/api/process_voice'
+            else:
+                # Texte unique : pas de réponse servie par le cache de l'assistant
+                text = f"{PROMPTS[index % len(PROMPTS)]} ({self.session_id} #{index})"
+                body = json.dumps({'text': text, 'voice_response': self.voice_response}).encode('utf-8')
+                content_type = 'application/json'
+                path = '/api/process_text'
+
+            self.results.append(self._send(pipeline, path, body, content_type))
+            if self.think_time:
+                time.sleep(self.think_time)
+
+        if self._connection is not None:
+            self._connection.close()
+
+    def _send(self, pipeline, path, body, content_type):
+        headers = {'Content-Type': content_type, 'X-Session-Id': self.session_id}
+        start = time.perf_counter()
+        try:
+            if self._connection is None:
+                connection_class = (http.client.HTTPSConnection if self.url.scheme == 'https'
+                                    else http.client.HTTPConnection)
+                self._connection = connection_class(self.url.netloc, timeout=self.timeout)
+            self._connection.request('POST', path, body=body, headers=headers)
+            response = self._connection.getresponse()
+            response.read()
+            status = response.status
+            stages = parse_server_timing(response.getheader('Server-Timing'))
+        except (OSError, http.client.HTTPException) as e:
+            # Connexion à rouvrir pour la requête suivante
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+            status = type(e).__name__
+            stages = {}
+
+        return {
+            'pipeline': pipeline,
+            'status': status,
+            'latency': (time.perf_counter() - start) * 1000,
+            'stages': stages
+        }
+
+    def _multipart(self):
+        boundary = uuid.uuid4().hex
+        body = b''.join([
+            f'--{boundary}\r\n'.encode('ascii'),
+            b'Content-Disposition: form-data; name="audio"; filename="load_test.wav"\r\n',
+            b'Content-Type: audio/wav\r\n\r\n',
+            self.audio,
+            f'\r\n--{boundary}--\r\n'.encode('ascii'),
+        ])
+        return body, f'multipart/form-data; boundary={boundary}'
+
+
+def run(url, sessions=10, requests=10, pipeline='text', voice_response=False, think_time=0.0,
+        timeout=60.0, audio=None):
+    """
+    Exécute le test de charge
+
+    Args:
+        url (str): Adresse du serveur JARVIS
+        sessions (int, optional): Sessions simultanées
+        requests (int, optional): Requêtes par session
+        pipeline (str, optional): text, voice ou both (alternance)
+        voice_response (bool, optional): Demande la synthèse vocale sur le pipeline texte
+        think_time (float, optional): Pause entre deux requêtes d'une session (secondes)
+        timeout (float, optional): Délai maximal d'une requête (secondes)
+        audio (bytes, optional): Fichier WAV envoyé au pipeline voix
+
+    Returns:
+        tuple: (résultats des requêtes, durée totale en secondes)
+    """
+    audio = audio or make_wav()
+    run_id = uuid.uuid4().hex[:8]
+    load_sessions = [
+        LoadSession(url, f'load-{run_id}-{index}', pipeline, requests, voice_response, think_time, timeout, audio)
+        for index in range(sessions)
+    ]
+    threads = [threading.Thread(target=session.run, daemon=True) for session in load_sessions]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return [result for session in load_sessions for result in session.results], elapsed
+
+
+def _percentile(sorted_values, ratio):
+    return sorted_values[min(int(len(sorted_values) * ratio), len(sorted_values) - 1)]
+
+
+def _format_latencies(latencies):
+    values = sorted(latencies)
+    return (f"p50 {_percentile(values, 0.50):9.1f} ms   "
+            f"p95 {_percentile(values, 0.95):9.1f} ms   "
+            f"p99 {_percentile(values, 0.99):9.1f} ms")
+
+
+def report(results, elapsed):
+    """
+    Affiche débit et latences par pipeline et par étape
+
+    Args:
+        results (list): Résultats des requêtes (voir run)
+        elapsed (float): Durée totale du test en secondes
+    """
+    by_pipeline = defaultdict(list)
+    for result in results:
+        by_pipeline[result['pipeline']].append(result)
+
+    for pipeline, pipeline_results in sorted(by_pipeline.items()):
+        succeeded = [result for result in pipeline_results if result['status'] == 200]
+        errors = Counter(result['status'] for result in pipeline_results if result['status'] != 200)
+        print(f"\n=== {pipeline} : {len(pipeline_results)} requêtes, {len(succeeded)} réussies, "
+              f"{len(succeeded) / elapsed:.1f} req/s ===")
+        if errors:
+            print("erreurs             " + ', '.join(f"{status}: {count}" for status, count in errors.most_common()))
+        if not succeeded:
+            continue
+
+        print(f"{'client':<20}{_format_latencies([result['latency'] for result in succeeded])}")
+        stages = defaultdict(list)
+        for result in succeeded:
+            for name, duration in result['stages'].items():
+                stages[name].append(duration)
+        for name in sorted(stages, key=lambda name: (STAGES.index(name) if name in STAGES else len(STAGES), name)):
+            print(f"{name:<20}{_format_latencies(stages[name])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Générateur de charge de l'assistant JARVIS")
+    parser.add_argument('--url', default='http://127.0.0.1:5000',
+                        help="Adresse du serveur (défaut : http://127.0.0.1:5000)")
+    parser.add_argument('--sessions', type=int, default=10, help="Sessions simultanées (défaut : 10)")
+    parser.add_argument('--requests', type=int, default=10, help="Requêtes par session (défaut : 10)")
+    parser.add_argument('--pipeline', choices=('text', 'voice', 'both'), default='text')
+    parser.add_argument('--voice-response', action='store_true',
+                        help="Demande la synthèse vocale sur le pipeline texte")
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help="Pause entre deux requêtes d'une session, en secondes (défaut : 0)")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--audio', help="Fichier WAV du pipeline voix (défaut : son de test de 1,5 s)")
+    args = parser.parse_args(argv)
+
+    audio = None
+    if args.audio:
+        with open(args.audio, 'rb') as audio_file:
+            audio = audio_file.read()
+
+    results, elapsed = run(args.url, args.sessions, args.requests, args.pipeline, args.voice_response,
+                           args.think_time, args.timeout, audio)
+    print(f"{len(results)} requêtes en {elapsed:.1f} s, {args.sessions} sessions simultanées")
+    report(results, elapsed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
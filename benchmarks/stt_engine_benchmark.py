@@ -0,0 +1,65 @@
+"""
+Comparaison des moteurs de reconnaissance vocale (latence et débit)
+
+Transcrit le même enregistrement avec chaque moteur demandé, après son
+chargement (mesuré à part, comme au démarrage d'un worker), et affiche les
+latences p50/p95 par enregistrement et le facteur temps réel.
+
+Usage (enregistrement WAV d'une phrase en français) :
+    python -m benchmarks.stt_engine_benchmark --audio phrase.wav --engines google vosk
+"""
+
+import sys
+import time
+import argparse
+
+import speech_recognition as sr
+
+from server.services.speech_backends import RecognitionStats, audio_duration, create_backend
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latence et débit des moteurs de reconnaissance vocale")
+    parser.add_argument('--audio', required=True, help="Enregistrement WAV, AIFF ou FLAC")
+    parser.add_argument('--engines', nargs='+', choices=('google', 'vosk'), default=['google', 'vosk'])
+    parser.add_argument('--iterations', type=int, default=10, help="Transcriptions par moteur (défaut : 10)")
+    parser.add_argument('--language', default='fr-FR', help="Langue du moteur google (défaut : fr-FR)")
+    parser.add_argument('--vosk-model', default='models/vosk-model-small-fr-0.22',
+                        help="Répertoire du modèle Vosk")
+    args = parser.parse_args(argv)
+
+    recognizer = sr.Recognizer()
+    with sr.AudioFile(args.audio) as source:
+        audio_data = recognizer.record(source)
+    seconds = audio_duration(audio_data)
+    print(f"{args.audio} : {seconds:.1f} s d'audio, {args.iterations} transcriptions par moteur")
+
+    for engine in args.engines:
+        start = time.perf_counter()
+        try:
+            backend = create_backend(engine, recognizer, language=args.language, vosk_model_path=args.vosk_model)
+        except RuntimeError as e:
+            print(f"\n=== {engine} : indisponible ({e}) ===")
+            continue
+        load_time = time.perf_counter() - start
+
+        stats = RecognitionStats(engine)
+        text = None
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            failed = False
+            try:
+                text = backend.recognize(audio_data)
+            except (sr.UnknownValueError, sr.RequestError):
+                failed = True
+            stats.record(time.perf_counter() - start, seconds, failed)
+
+        result = stats.stats()
+        print(f"\n=== {engine} : chargement {load_time * 1000:.0f} ms ===")
+        print(f"transcription       {text!r}")
+        print(f"latence             p50 {result['p50_ms']:9.1f} ms   p95 {result['p95_ms']:9.1f} ms")
+        print(f"facteur temps réel  {result['real_time_factor']:.3f}   échecs {result['failures']}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
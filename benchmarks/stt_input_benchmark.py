@@ -0,0 +1,103 @@
+"""
+Microbenchmark de la lecture des fichiers audio avant la reconnaissance vocale
+
+Compare, pour des enregistrements de plusieurs durées, l'ancien chemin
+(fichier temporaire écrit puis relu par sr.AudioFile) et le chemin en
+mémoire de VoiceService.speech_to_text (read_upload puis sr.AudioFile sur
+le tampon). Seuls la réception et le décodage sont mesurés : l'appel au
+service de reconnaissance, identique pour les deux chemins, est exclu.
+
+Usage :
+    python -m benchmarks.stt_input_benchmark --seconds 2 10 30 --iterations 200
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import speech_recognition as sr
+from werkzeug.datastructures import FileStorage
+
+from benchmarks.load_test import make_wav
+from server.utils.uploads import read_upload
+
+
+def _upload(audio):
+    """Fichier reçu tel que Flask le transmet à la route (flux en mémoire)"""
+    return FileStorage(stream=io.BytesIO(audio), filename='benchmark.wav', content_type='audio/wav')
+
+
+def temp_file_path(recognizer, upload):
+    """Ancien chemin : fichier temporaire sur le disque"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
+        upload.save(temp_audio.name)
+        try:
+            with sr.AudioFile(temp_audio.name) as source:
+                return recognizer.record(source)
+        finally:
+            os.unlink(temp_audio.name)
+
+
+def in_memory_path(recognizer, upload, max_bytes=10 * 1024 * 1024):
+    """Nouveau chemin : décodage direct depuis la mémoire"""
+    with sr.AudioFile(read_upload(upload, max_bytes)) as source:
+        return recognizer.record(source)
+
+
+def measure(path, recognizer, audio, iterations):
+    """
+    Durées d'un chemin sur plusieurs itérations
+
+    Args:
+        path (callable): temp_file_path ou in_memory_path
+        recognizer (sr.Recognizer): Reconnaisseur
+        audio (bytes): Fichier WAV
+        iterations (int): Nombre de mesures
+
+    Returns:
+        list: Durées triées, en millisecondes
+    """
+    durations = []
+    for _ in range(iterations):
+        upload = _upload(audio)
+        start = time.perf_counter()
+        path(recognizer, upload)
+        durations.append((time.perf_counter() - start) * 1000)
+    return sorted(durations)
+
+
+def _percentile(sorted_values, ratio):
+    return sorted_values[min(int(len(sorted_values) * ratio), len(sorted_values) - 1)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lecture des fichiers audio : fichier temporaire ou mémoire")
+    parser.add_argument('--seconds', type=float, nargs='+', default=[2.0, 10.0, 30.0],
+                        help="Durées des enregistrements testés (défaut : 2 10 30)")
+    parser.add_argument('--rate', type=int, default=16000, help="Fréquence d'échantillonnage (défaut : 16000)")
+    parser.add_argument('--iterations', type=int, default=200, help="Mesures par chemin (défaut : 200)")
+    args = parser.parse_args(argv)
+
+    recognizer = sr.Recognizer()
+    paths = (('fichier temporaire', temp_file_path), ('mémoire', in_memory_path))
+    for seconds in args.seconds:
+        audio = make_wav(seconds=seconds, rate=args.rate)
+        # Tour à vide : imports, cache du système de fichiers
+        for _, path in paths:
+            path(recognizer, _upload(audio))
+
+        print(f"\n=== {seconds:g} s, {len(audio) / 1024:.0f} Ko, {args.iterations} itérations ===")
+        medians = {}
+        for name, path in paths:
+            durations = measure(path, recognizer, audio, args.iterations)
+            medians[name] = _percentile(durations, 0.50)
+            print(f"{name:<20}p50 {medians[name]:8.3f} ms   p95 {_percentile(durations, 0.95):8.3f} ms   "
+                  f"p99 {_percentile(durations, 0.99):8.3f} ms")
+        print(f"{'gain':<20}x{medians['fichier temporaire'] / medians['mémoire']:.2f}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Banc d'essai du sous-système de tâches (aucun accès réseau)
+
+Génère des jeux de tâches synthétiques et mesure la latence des opérations
+de TaskService (création, modification, suppression, lecture, filtres,
+retard, recherche), le chargement et la sauvegarde du stockage, ainsi que
+la mémoire occupée par tâche (dictionnaires JSON contre enregistrements
+Task compacts).
+
+Usage :
+    python -m benchmarks.task_benchmark
+    python -m benchmarks.task_benchmark --sizes 10000 100000 1000000 --backend sql
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from server.models.task import Task
+from server.models.task_repository import JournalTaskRepository
+from server.services.task_service import TaskService
+
+WORDS = (
+    'appeler banque dentiste courses rapport réunion projet facture payer envoyer '
+    'email client devis relire contrat préparer présentation garage vidange impôts '
+    'déclaration médecin ordonnance pharmacie anniversaire cadeau réserver restaurant '
+    'billet train hôtel vacances ménage lessive jardin tondre pelouse plombier '
+    'chaudière entretien assurance voiture école inscription cantine sport piscine'
+).split()
+
+
+def generate_tasks(count, seed=42):
+    """
+    Génère des tâches synthétiques au format JSON de TaskService
+
+    Args:
+        count (int): Nombre de tâches
+        seed (int, optional): Graine du générateur (jeux reproductibles)
+
+    Returns:
+        list: Liste de tâches
+    """
+    rng = random.Random(seed)
+    now = datetime.datetime.now().replace(microsecond=0)
+    tasks = []
+
+    for _ in range(count):
+        created = now - datetime.timedelta(seconds=rng.randint(0, 90 * 86400), microseconds=rng.randint(0, 999999))
+        task = {
+            'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'title': ' '.join(rng.sample(WORDS, 3)).capitalize(),
+            'description': ' '.join(rng.sample(WORDS, rng.randint(0, 12))),
+            'created_at': created.isoformat(),
+            'due_date': None,
+            'priority': rng.choice(('low', 'medium', 'medium', 'high')),
+            'completed': rng.random() < 0.3
+        }
+        if rng.random() < 0.7:
+            task['due_date'] = (now + datetime.timedelta(days=rng.randint(-60, 60))).date().isoformat()
+        if rng.random() < 0.4:
+            task['updated_at'] = (created + datetime.timedelta(hours=rng.randint(1, 48))).isoformat()
+        if task['completed']:
+            task['completed_at'] = (created + datetime.timedelta(days=rng.randint(0, 10))).isoformat()
+        tasks.append(task)
+
+    return tasks
+
+
+def rss_bytes():
+    """Mémoire résidente actuelle du processus (octets), None si indisponible"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def measure_representations(tasks):
+    """
+    Mesure la mémoire par tâche des deux représentations
+
+    Les tâches sont relues depuis leur JSON pour partir d'objets neufs,
+    comme au chargement de data/tasks.json.
+
+    Args:
+        tasks (list): Tâches au format JSON
+
+    Returns:
+        dict: Octets par tâche pour 'dict' et 'Task'
+    """
+    payload = json.dumps(tasks)
+    gc.collect()
+    tracemalloc.start()
+
+    base = tracemalloc.get_traced_memory()[0]
+    loaded = json.loads(payload)
+    dict_bytes = tracemalloc.get_traced_memory()[0] - base
+
+    records = [Task.from_dict(task) for task in loaded]
+    del loaded
+    gc.collect()
+    record_bytes = tracemalloc.get_traced_memory()[0] - base
+
+    tracemalloc.stop()
+    assert records[0].to_dict() == tasks[0]
+
+    return {'dict': dict_bytes / len(tasks), 'Task': record_bytes / len(tasks)}
+
+
+def _time_each(operation, arguments):
+    """Exécute operation(argument) pour chaque argument et renvoie les latences (s)"""
+    latencies = []
+    for argument in arguments:
+        start = time.perf_counter()
+        operation(argument)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _time_once(operation):
+    start = time.perf_counter()
+    result = operation()
+    return time.perf_counter() - start, result
+
+
+def _percentile(sorted_values, ratio):
+    return sorted_values[min(int(len(sorted_values) * ratio), len(sorted_values) - 1)]
+
+
+def _format_latencies(latencies):
+    values = sorted(latencies)
+    return (f"p50 {_percentile(values, 0.50) * 1e6:10.1f} µs   "
+            f"p95 {_percentile(values, 0.95) * 1e6:10.1f} µs   "
+            f"max {values[-1] * 1e6:10.1f} µs")
+
+
+def _open_repository(backend, data_dir, fsync):
+    if backend == 'sql':
+        # Import local : SQLAlchemy n'est requis que pour ce backend
+        from server.models.sql_task_repository import SqlTaskRepository
+        return SqlTaskRepository(f"sqlite:///{data_dir / 'jarvis.db'}")
+    return JournalTaskRepository(data_dir, fsync=fsync)
+
+
+def _close_repository(repository):
+    if hasattr(repository, 'journal'):
+        repository.journal.close()
+    else:
+        repository.engine.dispose()
+
+
+def _save(backend, data_dir, tasks, fsync):
+    """Écrit le jeu complet : instantané JSON, ou insertion groupée en SQL"""
+    if backend == 'sql':
+        repository = _open_repository(backend, data_dir, fsync)
+        elapsed, _ = _time_once(lambda: repository.add_many(tasks))
+        _close_repository(repository)
+        return elapsed
+
+    repository = _open_repository(backend, data_dir, fsync)
+    for task in tasks:
+        repository.store.put(task)
+    elapsed, _ = _time_once(repository.journal.compact)
+    _close_repository(repository)
+    return elapsed
+
+
+def run(size, backend='json', operations=1000, fsync='batch', seed=42):
+    """
+    Exécute le banc d'essai pour une taille de jeu
+
+    Args:
+        size (int): Nombre de tâches
+        backend (str, optional): Stockage (json, sql)
+        operations (int, optional): Nombre d'opérations par mesure de latence
+        fsync (str, optional): Politique fsync du journal JSON
+        seed (int, optional): Graine du générateur
+    """
+    rng = random.Random(seed)
+    tasks = generate_tasks(size, seed)
+    print(f"\n=== {size} tâches, backend {backend} ===")
+
+    representations = measure_representations(tasks)
+    print(f"mémoire dict        {representations['dict']:10.0f} o/tâche")
+    print(f"mémoire Task        {representations['Task']:10.0f} o/tâche "
+          f"({representations['Task'] / representations['dict']:.0%} du dict)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        previous_cwd = os.getcwd()
+        # TaskService crée data/ dans le répertoire courant
+        os.chdir(data_dir)
+        try:
+            save_time = _save(backend, data_dir, tasks, fsync)
+            print(f"sauvegarde          {save_time * 1000:10.1f} ms")
+
+            del tasks
+            gc.collect()
+            rss_before = rss_bytes()
+            load_time, repository = _time_once(lambda: _open_repository(backend, data_dir, fsync))
+            if backend == 'sql':
+                extra, _ = _time_once(repository.all)
+                load_time += extra
+            print(f"chargement          {load_time * 1000:10.1f} ms")
+            if rss_before is not None:
+                print(f"RSS stockage        {(rss_bytes() - rss_before) / size:10.0f} o/tâche")
+
+            service = TaskService(repository)
+            ids = [task['id'] for task in rng.sample(repository.all(), min(operations, size))]
+
+            results = [
+                ('création', _time_each(
+                    lambda index: service.create_task(f"Tâche {index}", "créée par le banc d'essai",
+                                                      due_date='2030-01-01', priority='low'),
+                    range(operations))),
+                ('lecture', _time_each(service.get_task, ids)),
+                ('modification', _time_each(
+                    lambda task_id: service.update_task(task_id, priority='high', completed=True), ids)),
+                ('filtre', _time_each(
+                    lambda _: service.query_tasks(completed=False, priority='high', sort='due_date', limit=50),
+                    range(min(operations, 100)))),
+                ('retard', _time_each(lambda _: service.get_overdue_tasks(), range(min(operations, 100)))),
+                ('recherche', _time_each(
+                    lambda index: service.search(WORDS[index % len(WORDS)]), range(min(operations, 100)))),
+                ('suppression', _time_each(service.delete_task, ids)),
+            ]
+            for name, latencies in results:
+                print(f"{name:<20}{_format_latencies(latencies)}")
+
+            _close_repository(repository)
+        finally:
+            os.chdir(previous_cwd)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai du sous-système de tâches")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help="Tailles des jeux de tâches (défaut : 10000 100000)")
+    parser.add_argument('--backend', choices=('json', 'sql'), default='json')
+    parser.add_argument('--operations', type=int, default=1000,
+                        help="Opérations par mesure de latence (défaut : 1000)")
+    parser.add_argument('--fsync', choices=('always', 'batch', 'none'), default='batch',
+                        help="Politique fsync du journal JSON (défaut : batch)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        run(size, args.backend, args.operations, args.fsync, args.seed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
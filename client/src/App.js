@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useEffect } from 'react';
 import { BrowserRouter as Router, Routes, Route } from 'react-router-dom';
 import './App.css';
 
@@ -11,6 +11,25 @@ import Sidebar from './components/Sidebar';
 import AssistantPanel from './components/AssistantPanel';
 
 function App() {
+  // Écoute des rappels déclenchés par le serveur
+  useEffect(() => {
+    if ('Notification' in window && Notification.permission === 'default') {
+      Notification.requestPermission();
+    }
+
+    const source = new EventSource('/api/reminders/stream');
+    source.addEventListener('reminder', (e) => {
+      const reminder = JSON.parse(e.data);
+      if ('Notification' in window && Notification.permission === 'granted') {
+        new Notification('Rappel JARVIS', { body: reminder.message });
+      } else {
+        window.alert(`Rappel : ${reminder.message}`);
+      }
+    });
+
+    return () => source.close();
+  }, []);
+
   return (
     <Router>
       <div className="app-container">
@@ -2,6 +2,46 @@ import React, { useState, useEffect, useRef } from 'react';
 import { FaMicrophone, FaStop, FaRobot } from 'react-icons/fa';
 import axios from 'axios';
 
+// Identifiant de session : le serveur garde un historique de conversation par session
+const getSessionId = () => {
+  let sessionId = sessionStorage.getItem('jarvisSessionId');
+  if (!sessionId) {
+    sessionId = window.crypto && window.crypto.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    sessionStorage.setItem('jarvisSessionId', sessionId);
+  }
+  return sessionId;
+};
+
+// Lit un flux Server-Sent Events reçu par fetch (EventSource ne permet pas de POST)
+const readEventStream = async (response, onEvent) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Les événements sont séparés par une ligne vide
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      block.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+};
+
 const AssistantPanel = () => {
   const [messages, setMessages] = useState([]);
   const [isRecording, setIsRecording] = useState(false);
@@ -100,7 +140,8 @@ const AssistantPanel = () => {
       // Envoyer au serveur
       const response = await axios.post('/api/process_voice', formData, {
         headers: {
-          'Content-Type': 'multipart/form-data'
+          'Content-Type': 'multipart/form-data',
+          'X-Session-Id': getSessionId()
         }
       });
 
@@ -163,31 +204,61 @@ const AssistantPanel = () => {
       text: userInput
     }]);
     
+    // Message de l'assistant complété au fil des fragments reçus
+    setMessages(prev => [...prev, {
+      type: 'assistant',
+      text: '',
+      streaming: true
+    }]);
+    
+    const updateAssistantMessage = (update) => {
+      setMessages(prev => {
+        const newMessages = [...prev];
+        const last = newMessages[newMessages.length - 1];
+        newMessages[newMessages.length - 1] = { ...last, ...update(last) };
+        return newMessages;
+      });
+    };
+    
     try {
-      // Envoyer le texte au serveur
-      const response = await axios.post('/api/process_text', {
-        text: userInput,
-        voice_response: true
+      // Envoyer le texte au serveur et afficher la réponse pendant sa génération
+      const response = await fetch('/api/process_text/stream', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'X-Session-Id': getSessionId()
+        },
+        body: JSON.stringify({
+          text: userInput,
+          voice_response: true
+        })
       });
-      
-      // Ajouter la réponse de l'assistant
-      setMessages(prev => [...prev, {
-        type: 'assistant',
-        text: response.data.response.message
-      }]);
-      
-      // Jouer la réponse audio si disponible
-      if (response.data.audio_url && audioRef.current) {
-        audioRef.current.src = response.data.audio_url;
-        audioRef.current.play();
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
       }
       
+      await readEventStream(response, (event, data) => {
+        if (event === 'token') {
+          updateAssistantMessage(last => ({ text: last.text + data.text }));
+        } else if (event === 'done') {
+          updateAssistantMessage(() => ({ text: data.response.message, streaming: false }));
+          
+          // Jouer la réponse audio si disponible
+          if (data.audio_url && audioRef.current) {
+            audioRef.current.src = data.audio_url;
+            audioRef.current.play();
+          }
+        } else if (event === 'error') {
+          throw new Error(data.message);
+        }
+      });
+      
     } catch (error) {
       console.error('Erreur lors du traitement du texte:', error);
-      setMessages(prev => [...prev, {
-        type: 'assistant',
-        text: "Désolé, une erreur est survenue lors du traitement de votre demande."
-      }]);
+      updateAssistantMessage(() => ({
+        text: "Désolé, une erreur est survenue lors du traitement de votre demande.",
+        streaming: false
+      }));
     }
     
     // Réinitialiser l'entrée utilisateur
@@ -0,0 +1,31 @@
+"""
+Configuration gunicorn pour JARVIS
+
+Lancement en production :
+    gunicorn app:app
+
+Les workers sont à threads (gthread) : chaque onglet ouvert garde le flux des
+rappels (/api/reminders/stream) sur un thread, pas sur un worker entier, et
+ce flux est fermé après JARVIS_SSE_MAX_DURATION secondes (le navigateur se
+reconnecte). Prévoir WEB_THREADS au-delà du nombre d'onglets ouverts par
+worker.
+
+ou, avec le chemin asynchrone (server/asgi.py) : requêtes vers Claude et flux
+des rappels servis sans thread, nombre d'onglets sans limite pratique :
+    gunicorn server.asgi:app -k uvicorn.workers.UvicornWorker
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Threads par worker (ignorés par le worker uvicorn) ; le worker gthread
+# signale qu'il est vivant pendant les requêtes longues, sans délai de 30 s
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 16))
+
+# Pas de préchargement : chaque worker ouvre ses propres fichiers, verrous de
+# journal et threads d'arrière-plan après le fork. Les workers partagent les
+# tâches via le journal de data/ (ou la base SQL), pas via la mémoire.
+preload_app = False
@@ -2,26 +2,87 @@
 Routes API pour l'assistant JARVIS
 """
 
-from flask import Blueprint, request, jsonify
+import os
+import json
+import time
+import queue
+import uuid
+import hashlib
+import datetime
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from server.services.claude_service import ClaudeService
 from server.services.voice_service import VoiceService
 from server.services.task_service import TaskService
 from server.services.calendar_service import CalendarService
+from server.services.reminder_service import ReminderService
+from server.services.tool_executor import ToolExecutor
+from server.services.agenda_digest import AgendaDigest
+from server.services.tts_pool import TtsQueueFull
+from server.services.usage_tracker import TokenBudgetExceeded
+from server.utils.timing import StageTimer
+from server.utils.uploads import UploadTooLarge
+
+# Nombre maximal d'opérations acceptées par POST /api/tasks/batch
+MAX_TASK_BATCH_SIZE = 5000
+
+# GET /api/reminders : nombre de rappels renvoyés par défaut et au maximum
+REMINDER_LIST_LIMIT = 50
+MAX_REMINDER_LIST_LIMIT = 500
+
+# Longueur maximale d'un ID de session fourni par le client
+MAX_SESSION_ID_LENGTH = 64
+
+# Flux des rappels : commentaire keep-alive toutes les 15 s ; sur l'application
+# Flask, le flux (qui occupe un thread) est fermé après MAX_DURATION secondes et
+# le navigateur se reconnecte après RECONNECT_MS (champ retry de SSE)
+SSE_KEEP_ALIVE = 15
+SSE_RECONNECT_MS = 1000
+REMINDER_STREAM_MAX_DURATION = int(os.environ.get('JARVIS_SSE_MAX_DURATION', 300))
 
 # Initialisation du blueprint
 api_blueprint = Blueprint('api', __name__)
 
 # Initialisation des services
-claude_service = ClaudeService()
 voice_service = VoiceService()
 task_service = TaskService()
 calendar_service = CalendarService()
+reminder_service = ReminderService()
+
+# Les réponses en cache de Claude sont invalidées dès que tâches ou événements changent ;
+# les outils de Claude agissent directement sur les services, et le prompt contient
+# un résumé des tâches et de l'agenda (JARVIS_DIGEST_TOKENS=0 pour le retirer)
+digest_tokens = int(os.environ.get('JARVIS_DIGEST_TOKENS', 600))
+claude_service = ClaudeService(
+    context_version=lambda: (task_service.get_version(), calendar_service.get_version()),
+    tool_executor=ToolExecutor(task_service, calendar_service, reminder_service),
+    agenda=AgendaDigest(
+        task_service,
+        calendar_service,
+        max_tokens=digest_tokens,
+        days=int(os.environ.get('JARVIS_DIGEST_DAYS', 7)),
+        calendar_ttl=float(os.environ.get('JARVIS_DIGEST_CALENDAR_TTL', 300))
+    ) if digest_tokens else None
+)
 
 @api_blueprint.route('/ping', methods=['GET'])
 def ping():
     """Vérification que l'API fonctionne"""
     return jsonify({"status": "success", "message": "Jarvis API is running"}), 200
 
+def _session_id(data=None):
+    """
+    ID de session de conversation du client
+    
+    Lu dans l'en-tête X-Session-Id, puis dans le champ session_id (JSON ou
+    formulaire). Un nouvel ID est créé si le client n'en a pas encore.
+    """
+    session_id = (request.headers.get('X-Session-Id')
+                  or (data or {}).get('session_id')
+                  or request.form.get('session_id'))
+    if not isinstance(session_id, str) or not 0 < len(session_id) <= MAX_SESSION_ID_LENGTH:
+        return str(uuid.uuid4())
+    return session_id
+
 @api_blueprint.route('/process_voice', methods=['POST'])
 def process_voice():
     """Traite une entrée vocale et renvoie une réponse"""
@@ -30,22 +91,38 @@ def process_voice():
     if not audio_data:
         return jsonify({"status": "error", "message": "No audio data provided"}), 400
     
+    session_id = _session_id()
+    timer = StageTimer()
+    
     # Reconnaissance vocale
     try:
-        text = voice_service.speech_to_text(audio_data)
+        with timer.stage('stt'):
+            text = voice_service.speech_to_text(audio_data)
         
         # Traitement par Claude
-        response = claude_service.process_input(text)
+        with timer.stage('llm'):
+            response = claude_service.process_input(text, session_id)
         
         # Synthèse vocale de la réponse
-        audio_response = voice_service.text_to_speech(response['message'])
+        with timer.stage('tts'):
+            audio_response = voice_service.text_to_speech(response['message'])
         
         return jsonify({
             "status": "success",
             "text": text,
             "response": response,
-            "audio_url": audio_response
-        }), 200
+            "audio_url": audio_response,
+            "session_id": session_id
+        }), 200, {'Server-Timing': timer.header()}
+    
+    except UploadTooLarge as e:
+        return jsonify({"status": "error", "message": str(e)}), 413
+    
+    except TtsQueueFull as e:
+        return jsonify({"status": "error", "message": str(e), "session_id": session_id}), 503, {'Retry-After': '1'}
+    
+    except TokenBudgetExceeded as e:
+        return jsonify({"status": "error", "message": str(e), "session_id": session_id}), 429
     
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -58,29 +135,199 @@ def process_text():
     if not data or 'text' not in data:
         return jsonify({"status": "error", "message": "No text provided"}), 400
     
+    session_id = _session_id(data)
+    timer = StageTimer()
+    
     # Traitement par Claude
     try:
-        response = claude_service.process_input(data['text'])
+        with timer.stage('llm'):
+            response = claude_service.process_input(data['text'], session_id)
         
         # Synthèse vocale si demandé
         audio_url = None
         if data.get('voice_response', False):
-            audio_url = voice_service.text_to_speech(response['message'])
+            with timer.stage('tts'):
+                audio_url = voice_service.text_to_speech(response['message'])
         
         return jsonify({
             "status": "success",
             "response": response,
-            "audio_url": audio_url
-        }), 200
+            "audio_url": audio_url,
+            "session_id": session_id
+        }), 200, {'Server-Timing': timer.header()}
+    
+    except TtsQueueFull as e:
+        return jsonify({"status": "error", "message": str(e), "session_id": session_id}), 503, {'Retry-After': '1'}
+    
+    except TokenBudgetExceeded as e:
+        return jsonify({"status": "error", "message": str(e), "session_id": session_id}), 429
     
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@api_blueprint.route('/process_text/stream', methods=['POST'])
+def process_text_stream():
+    """Traite une entrée textuelle et diffuse la réponse en Server-Sent Events"""
+    data = request.json
+    
+    if not data or 'text' not in data:
+        return jsonify({"status": "error", "message": "No text provided"}), 400
+    
+    session_id = _session_id(data)
+    voice_response = data.get('voice_response', False)
+    
+    # Refus immédiat (429) plutôt qu'un flux qui s'arrête sur une erreur
+    try:
+        claude_service.usage.check_budget(session_id)
+    except TokenBudgetExceeded as e:
+        return jsonify({"status": "error", "message": str(e), "session_id": session_id}), 429
+    
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    
+    def events():
+        try:
+            for kind, value in claude_service.stream_input(data['text'], session_id):
+                if kind == 'token':
+                    yield sse('token', {"text": value})
+                    continue
+                
+                if kind == 'action':
+                    yield sse('action', value)
+                    continue
+                
+                # Fin du flux : synthèse vocale éventuelle sur la réponse complète
+                audio_url = None
+                if voice_response:
+                    audio_url = voice_service.text_to_speech(value['message'])
+                yield sse('done', {
+                    "status": "success",
+                    "response": value,
+                    "audio_url": audio_url,
+                    "session_id": session_id
+                })
+        except Exception as e:
+            yield sse('error', {"status": "error", "message": str(e)})
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@api_blueprint.route('/usage', methods=['GET'])
+def usage():
+    """Tokens consommés par les appels à Claude (worker courant)"""
+    summary = claude_service.usage.summary()
+    
+    session_id = request.headers.get('X-Session-Id') or request.args.get('session_id')
+    if session_id:
+        summary['session'] = dict(claude_service.usage.session(session_id), session_id=session_id)
+    
+    return jsonify({"status": "success", "usage": summary}), 200
+
+@api_blueprint.route('/assistant/cache', methods=['GET', 'DELETE'])
+def assistant_cache():
+    """Statistiques (GET) ou vidage (DELETE) du cache des réponses de Claude"""
+    if request.method == 'DELETE':
+        claude_service.response_cache.clear()
+    
+    return jsonify({"status": "success", "cache": claude_service.response_cache.stats()}), 200
+
+@api_blueprint.route('/assistant/resilience', methods=['GET'])
+def assistant_resilience():
+    """Compteurs des appels à Claude (tentatives, échecs, disjoncteur) du worker courant"""
+    return jsonify({"status": "success", "resilience": claude_service.resilience.stats()}), 200
+
+@api_blueprint.route('/voice/recognition', methods=['GET'])
+def voice_recognition():
+    """Temps de reconnaissance vocale du moteur configuré (worker courant)"""
+    return jsonify({"status": "success", "recognition": voice_service.recognition_stats()}), 200
+
+@api_blueprint.route('/voice/synthesis', methods=['GET'])
+def voice_synthesis():
+    """Compteurs du pool de synthèse vocale et du cache audio (worker courant)"""
+    return jsonify({"status": "success", "synthesis": voice_service.synthesis_stats()}), 200
+
+def _parse_task_query(args):
+    """
+    Traduit les paramètres de GET /api/tasks en arguments de query_tasks
+    
+    Paramètres acceptés : status (pending, completed, all), priority,
+    due_from, due_to (YYYY-MM-DD), sort (préfixe '-' pour un tri décroissant),
+    limit et cursor. Le paramètre q (recherche plein texte) est traité à part.
+    
+    Raises:
+        ValueError: Si un paramètre est invalide
+    """
+    status = args.get('status', 'all')
+    if status not in ('all', 'pending', 'completed'):
+        raise ValueError(f"Statut inconnu: {status}")
+    
+    priority = args.get('priority')
+    if priority is not None and priority not in ('low', 'medium', 'high'):
+        raise ValueError(f"Priorité inconnue: {priority}")
+    
+    for name in ('due_from', 'due_to'):
+        value = args.get(name)
+        if value is not None:
+            datetime.date.fromisoformat(value)
+    
+    sort = args.get('sort', 'created_at')
+    descending = sort.startswith('-')
+    
+    limit = args.get('limit')
+    if limit is not None:
+        limit = int(limit)
+        if limit <= 0:
+            raise ValueError("limit doit être positif")
+    
+    return {
+        'completed': None if status == 'all' else status == 'completed',
+        'priority': priority,
+        'due_from': args.get('due_from'),
+        'due_to': args.get('due_to'),
+        'sort': sort.lstrip('-'),
+        'descending': descending,
+        'limit': limit,
+        'cursor': args.get('cursor')
+    }
+
 @api_blueprint.route('/tasks', methods=['GET', 'POST', 'PUT', 'DELETE'])
 def tasks():
     """Gestion des tâches"""
     if request.method == 'GET':
-        return jsonify({"status": "success", "tasks": task_service.get_all_tasks()}), 200
+        # ETag fort : version des tâches + paramètres de la requête. Un sondage
+        # sans changement reçoit un 304 sans qu'aucune tâche soit sérialisée.
+        query_hash = hashlib.sha1(request.query_string).hexdigest()[:16]
+        etag = f"tasks-{task_service.get_version()}-{query_hash}"
+        
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        
+        try:
+            query = _parse_task_query(request.args)
+            if request.args.get('q'):
+                # Recherche plein texte : résultats classés par pertinence, sans curseur
+                tasks_page = task_service.search(
+                    request.args['q'],
+                    limit=query['limit'] or 20,
+                    completed=query['completed'],
+                    priority=query['priority']
+                )
+                next_cursor = None
+            else:
+                tasks_page, next_cursor = task_service.query_tasks(**query)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
+        response = jsonify({"status": "success", "tasks": tasks_page, "next_cursor": next_cursor})
+        response.set_etag(etag)
+        # Le navigateur revalide à chaque sondage au lieu de servir un cache périmé
+        response.headers['Cache-Control'] = 'no-cache'
+        return response, 200
     
     elif request.method == 'POST':
         data = request.json
@@ -121,6 +368,32 @@ def tasks():
         
         return jsonify({"status": "success", "message": "Task deleted"}), 200
 
+@api_blueprint.route('/tasks/batch', methods=['POST'])
+def tasks_batch():
+    """Applique un lot de créations, modifications et suppressions de tâches"""
+    data = request.json
+    operations = data.get('operations') if isinstance(data, dict) else None
+    
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"status": "error", "message": "A non-empty operations list is required"}), 400
+    
+    if len(operations) > MAX_TASK_BATCH_SIZE:
+        return jsonify({
+            "status": "error",
+            "message": f"Too many operations (max {MAX_TASK_BATCH_SIZE})"
+        }), 413
+    
+    outcome = task_service.apply_batch(operations)
+    
+    if not outcome['applied']:
+        return jsonify({
+            "status": "error",
+            "message": "Batch rejected, no operation was applied",
+            "results": outcome['results']
+        }), 422
+    
+    return jsonify({"status": "success", "results": outcome['results']}), 200
+
 @api_blueprint.route('/calendar/events', methods=['GET', 'POST'])
 def calendar_events():
     """Gestion des événements du calendrier"""
@@ -147,3 +420,78 @@ def calendar_events():
         )
         
         return jsonify({"status": "success", "event": new_event}), 201
+
+@api_blueprint.route('/reminders', methods=['GET', 'POST', 'DELETE'])
+def reminders():
+    """Gestion des rappels"""
+    if request.method == 'GET':
+        limit = request.args.get('limit', REMINDER_LIST_LIMIT, type=int)
+        if limit <= 0:
+            return jsonify({"status": "error", "message": "limit must be positive"}), 400
+        
+        reminders_page = reminder_service.get_pending_reminders(min(limit, MAX_REMINDER_LIST_LIMIT))
+        return jsonify({"status": "success", "reminders": reminders_page}), 200
+    
+    elif request.method == 'POST':
+        data = request.json
+        if not data or 'message' not in data or 'remind_at' not in data:
+            return jsonify({"status": "error", "message": "Reminder message and remind_at are required"}), 400
+        
+        try:
+            new_reminder = reminder_service.create_reminder(
+                message=data['message'],
+                remind_at=data['remind_at'],
+                task_id=data.get('task_id')
+            )
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
+        return jsonify({"status": "success", "reminder": new_reminder}), 201
+    
+    elif request.method == 'DELETE':
+        data = request.json
+        if not data or 'id' not in data:
+            return jsonify({"status": "error", "message": "Reminder ID is required"}), 400
+        
+        if not reminder_service.cancel_reminder(data['id']):
+            return jsonify({"status": "error", "message": "Reminder not found"}), 404
+        
+        return jsonify({"status": "success", "message": "Reminder cancelled"}), 200
+
+@api_blueprint.route('/reminders/stream', methods=['GET'])
+def reminders_stream():
+    """
+    Flux Server-Sent Events des rappels déclenchés
+    
+    Le flux est borné à REMINDER_STREAM_MAX_DURATION secondes : il occupe un
+    thread du worker, libéré ensuite, et EventSource se reconnecte seul. Le
+    serveur ASGI (server/asgi.py) sert cette route sans thread ni limite.
+    """
+    subscriber = reminder_service.subscribe()
+    
+    def events():
+        deadline = time.monotonic() + REMINDER_STREAM_MAX_DURATION
+        try:
+            yield f"retry: {SSE_RECONNECT_MS}\n: connected\n\n"
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    reminder = subscriber.get(timeout=min(SSE_KEEP_ALIVE, remaining))
+                except queue.Empty:
+                    # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                    yield ": keep-alive\n\n"
+                    continue
+                if reminder is None:
+                    # Client retiré (trop lent) : fermer le flux pour qu'il se reconnecte
+                    return
+                yield f"event: reminder\ndata: {json.dumps(reminder, ensure_ascii=False)}\n\n"
+        finally:
+            reminder_service.unsubscribe(subscriber)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,575 @@
+"""
+Point d'entrée ASGI de JARVIS
+
+Les requêtes vers Claude (/api/process_text et sa variante en flux,
+/api/process_voice) sont servies de façon asynchrone : une requête en
+attente de Claude n'occupe ni worker ni thread, un processus en traite des
+centaines à la fois ; la reconnaissance et la synthèse vocales passent par
+des threads et le pool de synthèse. Toutes les autres routes sont celles
+de l'application Flask, exécutées sur un pool de threads.
+
+Le flux des rappels (/api/reminders/stream) est lui aussi servi sans thread,
+quel que soit le nombre d'onglets ouverts.
+
+La route WebSocket /api/voice/stream reçoit l'audio du micro pendant que
+l'utilisateur parle : la fin de chaque énoncé est détectée à la volée (VAD)
+et la reconnaissance puis Claude démarrent aussitôt.
+
+Lancement :
+    uvicorn server.asgi:app --workers 4
+    gunicorn server.asgi:app -k uvicorn.workers.UvicornWorker
+"""
+
+import io
+import os
+import json
+import time
+import uuid
+import asyncio
+from urllib.parse import parse_qs, urlsplit
+
+from werkzeug.formparser import parse_form_data
+
+from app import app as flask_app
+from server.api import routes
+from server.services.async_claude_service import AsyncClaudeService
+from server.services.tts_pool import TtsQueueFull
+from server.services.usage_tracker import TokenBudgetExceeded
+from server.utils.concurrency import ConcurrencyLimiter, LimiterRejected
+from server.utils.timing import StageTimer
+from server.utils.uploads import UploadTooLarge
+from server.utils.vad import EnergyVad
+from server.utils.wsgi_bridge import WsgiBridge
+
+async_claude_service = AsyncClaudeService(
+    routes.claude_service,
+    max_connections=int(os.environ.get('JARVIS_ANTHROPIC_MAX_CONNECTIONS', 100))
+)
+
+# Requêtes vers Claude simultanées : pour le processus et par session
+limiter = ConcurrencyLimiter(
+    global_limit=int(os.environ.get('JARVIS_LLM_MAX_IN_FLIGHT', 64)),
+    session_limit=int(os.environ.get('JARVIS_LLM_MAX_PER_SESSION', 1)),
+    max_queue=int(os.environ.get('JARVIS_LLM_MAX_QUEUE', 256)),
+    queue_timeout=float(os.environ.get('JARVIS_LLM_QUEUE_TIMEOUT', 30))
+)
+
+# Détection de fin d'énoncé des flux audio (WebSocket /api/voice/stream)
+VAD_SETTINGS = {
+    'threshold_ratio': float(os.environ.get('JARVIS_VAD_THRESHOLD_RATIO', 3.0)),
+    'min_threshold': float(os.environ.get('JARVIS_VAD_MIN_THRESHOLD', 300)),
+    'end_silence_ms': int(os.environ.get('JARVIS_VAD_END_SILENCE_MS', 700)),
+    'max_utterance_ms': int(os.environ.get('JARVIS_VAD_MAX_UTTERANCE_MS', 30000)),
+}
+
+# Fréquences d'échantillonnage acceptées pour les flux audio
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 48000
+
+# Énoncés en attente de traitement par connexion audio (les suivants sont refusés)
+MAX_PENDING_UTTERANCES = int(os.environ.get('JARVIS_VOICE_MAX_PENDING', 2))
+
+# Origines autorisées pour le WebSocket audio en plus de l'hôte servi
+# (ex. serveur de développement React : http://localhost:3000)
+ALLOWED_WS_ORIGINS = {
+    origin.strip().rstrip('/') for origin in os.environ.get('JARVIS_WS_ALLOWED_ORIGINS', '').split(',')
+    if origin.strip()
+}
+
+flask_bridge = WsgiBridge(
+    flask_app,
+    max_threads=int(os.environ.get('JARVIS_WSGI_THREADS', 32)),
+    max_body_bytes=flask_app.config.get('MAX_CONTENT_LENGTH')
+)
+
+# Corps JSON au-delà de flask_bridge.max_body_bytes (réponse 413)
+_TOO_LARGE = object()
+
+
+async def app(scope, receive, send):
+    """Application ASGI"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+
+    if scope['type'] == 'websocket':
+        if scope.get('path') == '/api/voice/stream':
+            await voice_stream(scope, receive, send)
+        else:
+            await receive()
+            await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    route = (scope.get('method'), scope.get('path'))
+    if scope['type'] == 'http' and route in ASYNC_ROUTES:
+        await ASYNC_ROUTES[route](scope, receive, send)
+        return
+
+    await flask_bridge(scope, receive, send)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_claude_service.close()
+            await asyncio.to_thread(routes.voice_service.close)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def process_text(scope, receive, send):
+    """Traite une entrée textuelle et renvoie une réponse (équivalent de la route Flask)"""
+    data = await _read_json(receive)
+    if data is _TOO_LARGE:
+        await flask_bridge.send_too_large(send)
+        return
+    if not data or 'text' not in data:
+        await _send_json(send, 400, {"status": "error", "message": "No text provided"})
+        return
+
+    session_id = _session_id(scope, data)
+    timer = StageTimer()
+
+    try:
+        waiting = time.perf_counter()
+        async with limiter.slot(session_id):
+            # Attente d'une place dans le limiteur
+            timer.record('queue', time.perf_counter() - waiting)
+            with timer.stage('llm'):
+                response = await async_claude_service.process_input(data['text'], session_id)
+
+        audio_url = None
+        if data.get('voice_response', False):
+            with timer.stage('tts'):
+                audio_url = await routes.voice_service.text_to_speech_async(response['message'])
+
+        await _send_json(send, 200, {
+            "status": "success",
+            "response": response,
+            "audio_url": audio_url,
+            "session_id": session_id
+        }, server_timing=timer.header())
+
+    except (LimiterRejected, TtsQueueFull) as e:
+        await _send_json(send, 503, {"status": "error", "message": str(e)}, retry_after=True)
+
+    except TokenBudgetExceeded as e:
+        await _send_json(send, 429, {"status": "error", "message": str(e), "session_id": session_id})
+
+    except Exception as e:
+        await _send_json(send, 500, {"status": "error", "message": str(e)})
+
+
+async def process_voice(scope, receive, send):
+    """
+    Traite une entrée vocale et renvoie une réponse (équivalent de la route Flask)
+
+    Le fichier audio (champ audio d'un envoi multipart) est décodé et
+    transcrit dans un thread, Claude est appelé sans thread sous le limiteur,
+    et la synthèse passe par le pool de processus.
+    """
+    body = await _read_body(receive)
+    if body is None:
+        return
+    if body is _TOO_LARGE:
+        await flask_bridge.send_too_large(send)
+        return
+
+    form, files = await asyncio.to_thread(_parse_upload, scope, body)
+    audio_data = files.get('audio')
+    if not audio_data:
+        await _send_json(send, 400, {"status": "error", "message": "No audio data provided"})
+        return
+
+    session_id = _session_id(scope, form)
+    timer = StageTimer()
+
+    try:
+        with timer.stage('stt'):
+            text = await asyncio.to_thread(routes.voice_service.speech_to_text, audio_data)
+
+        waiting = time.perf_counter()
+        async with limiter.slot(session_id):
+            timer.record('queue', time.perf_counter() - waiting)
+            with timer.stage('llm'):
+                response = await async_claude_service.process_input(text, session_id)
+
+        with timer.stage('tts'):
+            audio_url = await routes.voice_service.text_to_speech_async(response['message'])
+
+        await _send_json(send, 200, {
+            "status": "success",
+            "text": text,
+            "response": response,
+            "audio_url": audio_url,
+            "session_id": session_id
+        }, server_timing=timer.header())
+
+    except UploadTooLarge as e:
+        await _send_json(send, 413, {"status": "error", "message": str(e)})
+
+    except (LimiterRejected, TtsQueueFull) as e:
+        await _send_json(send, 503, {"status": "error", "message": str(e), "session_id": session_id},
+                         retry_after=True)
+
+    except TokenBudgetExceeded as e:
+        await _send_json(send, 429, {"status": "error", "message": str(e), "session_id": session_id})
+
+    except Exception as e:
+        await _send_json(send, 500, {"status": "error", "message": str(e)})
+
+
+def _parse_upload(scope, body):
+    """Champs et fichiers d'un envoi multipart, fichiers gardés en mémoire (hors de la boucle)"""
+    headers = dict(scope.get('headers', []))
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'CONTENT_TYPE': headers.get(b'content-type', b'').decode('latin-1'),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+    }
+    _, form, files = parse_form_data(environ, stream_factory=lambda *args, **kwargs: io.BytesIO())
+    return form, files
+
+
+async def process_text_stream(scope, receive, send):
+    """Traite une entrée textuelle et diffuse la réponse en Server-Sent Events"""
+    data = await _read_json(receive)
+    if data is _TOO_LARGE:
+        await flask_bridge.send_too_large(send)
+        return
+    if not data or 'text' not in data:
+        await _send_json(send, 400, {"status": "error", "message": "No text provided"})
+        return
+
+    session_id = _session_id(scope, data)
+    started = False
+
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+
+    try:
+        async with limiter.slot(session_id):
+            # Refus immédiat (429) plutôt qu'un flux qui s'arrête sur une erreur
+            routes.claude_service.usage.check_budget(session_id)
+
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+            started = True
+
+            events = async_claude_service.stream_input(data['text'], session_id)
+            try:
+                async for kind, value in events:
+                    if disconnected.is_set():
+                        break
+
+                    if kind == 'done':
+                        audio_url = None
+                        if data.get('voice_response', False):
+                            audio_url = await routes.voice_service.text_to_speech_async(value['message'])
+                        value = {
+                            "status": "success",
+                            "response": value,
+                            "audio_url": audio_url,
+                            "session_id": session_id
+                        }
+                    elif kind == 'token':
+                        value = {"text": value}
+
+                    await _send_event(send, kind, value)
+            finally:
+                await events.aclose()
+
+    except LimiterRejected as e:
+        await _send_json(send, 503, {"status": "error", "message": str(e)}, retry_after=True)
+        return
+
+    except TokenBudgetExceeded as e:
+        if not started:
+            await _send_json(send, 429, {"status": "error", "message": str(e), "session_id": session_id})
+            return
+        # Budget épuisé en cours de réponse (appels d'outils) : l'en-tête 200 est
+        # déjà parti, l'erreur est un événement du flux
+        await _send_event(send, 'error', {"status": "error", "message": str(e), "session_id": session_id})
+
+    except Exception as e:
+        if not started:
+            await _send_json(send, 500, {"status": "error", "message": str(e)})
+            return
+        await _send_event(send, 'error', {"status": "error", "message": str(e)})
+
+    finally:
+        watcher.cancel()
+
+    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+
+async def voice_stream(scope, receive, send):
+    """
+    Conversation vocale en flux (WebSocket)
+
+    Paramètres de l'URL : session_id et rate (fréquence d'échantillonnage,
+    16000 par défaut). Le client envoie l'audio du micro en messages binaires
+    (PCM signé 16 bits mono, petit-boutiste), de taille quelconque, et peut
+    forcer la fin d'un énoncé par le message texte {"type": "end"}. Le
+    serveur envoie en JSON : ready, speech_start, speech_end, transcript,
+    puis response (réponse de Claude, audio_url, durées des étapes) ou error.
+    Plusieurs énoncés se suivent sur la même connexion : ils sont traités un
+    par un, dans l'ordre, et au-delà de MAX_PENDING_UTTERANCES en attente un
+    nouvel énoncé est refusé (error). Une page d'une autre origine que l'hôte
+    servi (ou ALLOWED_WS_ORIGINS) est refusée avant l'ouverture.
+    """
+    if (await receive())['type'] != 'websocket.connect':
+        return
+
+    if not _origin_allowed(scope):
+        # Fermeture avant acceptation : le serveur répond 403 à la poignée de main
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+
+    params = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    try:
+        sample_rate = int(params.get('rate', ['16000'])[0])
+    except ValueError:
+        sample_rate = 0
+    if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+        await send({'type': 'websocket.close', 'code': 4400})
+        return
+
+    session_id = _session_id(scope, {'session_id': params.get('session_id', [None])[0]})
+    await send({'type': 'websocket.accept'})
+    await _send_ws(send, {"type": "ready", "session_id": session_id, "sample_rate": sample_rate})
+
+    vad = EnergyVad(sample_rate, **VAD_SETTINGS)
+    # Un seul consommateur par connexion : réponses dans l'ordre des énoncés
+    utterances = asyncio.Queue(maxsize=MAX_PENDING_UTTERANCES)
+    consumer = asyncio.ensure_future(_voice_turns(send, session_id, utterances, sample_rate))
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+
+            if message.get('bytes'):
+                events = vad.feed(message['bytes'])
+            else:
+                try:
+                    control = json.loads(message.get('text') or 'null')
+                except ValueError:
+                    control = None
+                events = vad.flush() if isinstance(control, dict) and control.get('type') == 'end' else []
+
+            for kind, audio in events:
+                if kind == 'start':
+                    await _send_ws(send, {"type": "speech_start"})
+                    continue
+                await _send_ws(send, {"type": "speech_end", "duration": len(audio) / (2 * sample_rate)})
+                try:
+                    # Énoncé traité par le consommateur : la réception de l'audio continue
+                    utterances.put_nowait(audio)
+                except asyncio.QueueFull:
+                    await _send_ws(send, {
+                        "type": "error",
+                        "status": "error",
+                        "message": "Too many utterances pending, please wait for the answers",
+                        "session_id": session_id
+                    })
+    finally:
+        consumer.cancel()
+
+
+async def _voice_turns(send, session_id, utterances, sample_rate):
+    """Consommateur des énoncés d'une connexion, un à la fois"""
+    while True:
+        audio = await utterances.get()
+        await _voice_turn(send, session_id, audio, sample_rate)
+
+
+def _origin_allowed(scope):
+    """
+    Vérifie l'en-tête Origin d'une poignée de main WebSocket
+
+    Les navigateurs n'appliquent pas la politique de même origine aux
+    WebSockets : sans cette vérification, n'importe quelle page pourrait
+    ouvrir le micro de l'assistant avec les cookies de l'utilisateur. Un
+    client sans Origin (hors navigateur) est accepté.
+    """
+    headers = dict(scope.get('headers', []))
+    origin = headers.get(b'origin', b'').decode('latin-1').rstrip('/')
+    if not origin:
+        return True
+    if origin in ALLOWED_WS_ORIGINS:
+        return True
+    return urlsplit(origin).netloc.lower() == headers.get(b'host', b'').decode('latin-1').lower()
+
+
+async def _voice_turn(send, session_id, audio, sample_rate):
+    """Reconnaissance, Claude et synthèse d'un énoncé ; durées mesurées depuis la fin de la parole"""
+    timer = StageTimer()
+    try:
+        with timer.stage('stt'):
+            text = await asyncio.to_thread(routes.voice_service.transcribe_pcm, audio, sample_rate)
+        await _send_ws(send, {"type": "transcript", "text": text})
+
+        waiting = time.perf_counter()
+        async with limiter.slot(session_id):
+            timer.record('queue', time.perf_counter() - waiting)
+            with timer.stage('llm'):
+                response = await async_claude_service.process_input(text, session_id)
+
+        with timer.stage('tts'):
+            audio_url = await routes.voice_service.text_to_speech_async(response['message'])
+
+        await _send_ws(send, {
+            "type": "response",
+            "status": "success",
+            "text": text,
+            "response": response,
+            "audio_url": audio_url,
+            "session_id": session_id,
+            "server_timing": timer.header()
+        })
+
+    except (LimiterRejected, TtsQueueFull, TokenBudgetExceeded) as e:
+        await _send_ws(send, {"type": "error", "status": "error", "message": str(e), "session_id": session_id})
+
+    except Exception as e:
+        await _send_ws(send, {"type": "error", "status": "error", "message": str(e)})
+
+
+async def _send_ws(send, payload):
+    try:
+        await send({'type': 'websocket.send', 'text': json.dumps(payload, ensure_ascii=False)})
+    except Exception:
+        # Connexion fermée par le client pendant le traitement
+        pass
+
+
+async def reminders_stream(scope, receive, send):
+    """
+    Flux Server-Sent Events des rappels déclenchés (équivalent de la route Flask)
+
+    Servi sans thread : un onglet ouvert ne coûte qu'une coroutine, et le
+    flux n'a pas de durée maximale. L'abonnement est retiré dès la
+    déconnexion du client.
+    """
+    subscriber = routes.reminder_service.subscribe(loop=asyncio.get_running_loop())
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        await _send_chunk(send, f"retry: {routes.SSE_RECONNECT_MS}\n: connected\n\n")
+        while True:
+            reminder = asyncio.ensure_future(subscriber.get())
+            done, _ = await asyncio.wait({reminder, disconnect}, timeout=routes.SSE_KEEP_ALIVE,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                reminder.cancel()
+                return
+            if reminder in done:
+                if reminder.result() is None:
+                    # Client retiré (trop lent) : fermer le flux pour qu'il se reconnecte
+                    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                    return
+                await _send_chunk(send, f"event: reminder\ndata: "
+                                        f"{json.dumps(reminder.result(), ensure_ascii=False)}\n\n")
+            else:
+                reminder.cancel()
+                # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                await _send_chunk(send, ": keep-alive\n\n")
+    finally:
+        disconnect.cancel()
+        routes.reminder_service.unsubscribe(subscriber)
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _send_chunk(send, text):
+    await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+
+async def concurrency(scope, receive, send):
+    """État du limiteur de requêtes vers Claude (processus courant)"""
+    await _send_json(send, 200, {"status": "success", "concurrency": limiter.stats()})
+
+
+ASYNC_ROUTES = {
+    ('POST', '/api/process_text'): process_text,
+    ('POST', '/api/process_text/stream'): process_text_stream,
+    ('POST', '/api/process_voice'): process_voice,
+    ('GET', '/api/concurrency'): concurrency,
+    ('GET', '/api/reminders/stream'): reminders_stream,
+}
+
+
+def _session_id(scope, data):
+    """ID de session du client (en-tête X-Session-Id ou champ session_id), ou nouvel ID"""
+    headers = dict(scope.get('headers', []))
+    session_id = headers.get(b'x-session-id', b'').decode('latin-1') or data.get('session_id')
+    if not isinstance(session_id, str) or not 0 < len(session_id) <= routes.MAX_SESSION_ID_LENGTH:
+        return str(uuid.uuid4())
+    return session_id
+
+
+async def _read_body(receive):
+    """Corps de la requête, None si le client s'est déconnecté, _TOO_LARGE au-delà de la limite"""
+    body = []
+    size = 0
+    max_bytes = flask_bridge.max_body_bytes
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body.append(message.get('body', b''))
+        size += len(body[-1])
+        if max_bytes is not None and size > max_bytes:
+            # Lecture arrêtée dès le dépassement, comme pour les routes Flask
+            return _TOO_LARGE
+        if not message.get('more_body'):
+            break
+    return b''.join(body)
+
+
+async def _read_json(receive):
+    body = await _read_body(receive)
+    if body is None or body is _TOO_LARGE:
+        return body
+    try:
+        data = json.loads(body or b'null')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def _send_json(send, status, payload, retry_after=False, server_timing=None):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if retry_after:
+        headers.append((b'retry-after', b'1'))
+    if server_timing:
+        headers.append((b'server-timing', server_timing.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_event(send, event, payload):
+    chunk = f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8')
+    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
@@ -0,0 +1,348 @@
+"""
+Historiques de conversation par session, bornés en taille et en durée
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+
+
+class MemoryConversationStore:
+    """
+    Historiques en mémoire, propres au processus
+
+    Chaque session garde ses `max_messages` derniers messages dans un tampon
+    circulaire (deque bornée). Les sessions sont rangées de la moins récemment
+    utilisée à la plus récente : les sessions inactives depuis plus de `ttl`
+    secondes sont expirées en tête de liste, et au-delà de `max_sessions` la
+    moins récemment utilisée est évincée. La mémoire reste bornée quel que
+    soit le trafic.
+
+    Un résumé des messages les plus anciens est conservé avec la session, avec
+    le nombre de messages qu'il couvre (voir ContextManager).
+    """
+
+    def __init__(self, max_messages=10, max_sessions=1000, ttl=3600):
+        """
+        Initialisation du stockage
+
+        Args:
+            max_messages (int, optional): Messages conservés par session
+            max_sessions (int, optional): Nombre maximal de sessions
+            ttl (float, optional): Durée d'inactivité avant expiration (secondes)
+        """
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def history(self, session_id):
+        """
+        Récupère les derniers messages d'une session
+
+        Args:
+            session_id (str): ID de la session
+
+        Returns:
+            list: Messages {'role', 'content'}, du plus ancien au plus récent
+        """
+        with self._lock:
+            session = self._touch(session_id, create=False)
+            return list(session['messages']) if session else []
+
+    def message_count(self, session_id):
+        """
+        Nombre total de messages échangés dans la session, évincés compris
+
+        Args:
+            session_id (str): ID de la session
+
+        Returns:
+            int: Nombre de messages
+        """
+        with self._lock:
+            session = self._touch(session_id, create=False)
+            return session['total'] if session else 0
+
+    def snapshot(self, session_id):
+        """
+        État complet d'une session, lu en une fois
+
+        Args:
+            session_id (str): ID de la session
+
+        Returns:
+            dict: {'messages': derniers messages, 'total': nombre de messages
+                échangés, 'summary': résumé des plus anciens, 'summarized':
+                nombre de messages couverts par ce résumé}
+        """
+        with self._lock:
+            session = self._touch(session_id, create=False)
+            if session is None:
+                return {'messages': [], 'total': 0, 'summary': '', 'summarized': 0}
+            return {
+                'messages': list(session['messages']),
+                'total': session['total'],
+                'summary': session['summary'],
+                'summarized': session['summarized']
+            }
+
+    def set_summary(self, session_id, summary, summarized, expected):
+        """
+        Remplace le résumé d'une session, s'il n'a pas changé entre-temps
+
+        Args:
+            session_id (str): ID de la session
+            summary (str): Nouveau résumé
+            summarized (int): Nombre de messages couverts par le nouveau résumé
+            expected (int): Nombre de messages couverts par le résumé remplacé
+
+        Returns:
+            bool: True si le résumé a été enregistré
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session['summarized'] != expected:
+                return False
+            session['summary'] = summary
+            session['summarized'] = summarized
+            return True
+
+    def append(self, session_id, *messages):
+        """
+        Ajoute des messages à une session (créée au besoin)
+
+        Args:
+            session_id (str): ID de la session
+            *messages (dict): Messages {'role', 'content'}
+        """
+        with self._lock:
+            session = self._touch(session_id, create=True)
+            session['messages'].extend(messages)
+            session['total'] += len(messages)
+
+    def clear(self, session_id):
+        """
+        Efface une session
+
+        Args:
+            session_id (str): ID de la session
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _touch(self, session_id, create):
+        """Expire, récupère et marque comme récente une session (sous verrou)"""
+        now = time.monotonic()
+
+        # Les sessions sont triées par dernier accès : les expirées sont en tête
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest['last_seen'] <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            if not create:
+                return None
+            session = {'messages': deque(maxlen=self.max_messages), 'total': 0, 'summary': '', 'summarized': 0}
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+
+        session['last_seen'] = now
+        return session
+
+
+class SqliteConversationStore:
+    """
+    Historiques dans une base SQLite partagée entre workers
+
+    Mêmes bornes que MemoryConversationStore : chaque ajout supprime les
+    messages sortis de la fenêtre de la session, et les sessions expirées ou
+    en surnombre (les moins récemment utilisées) sont purgées tous les
+    `purge_every` ajouts.
+    """
+
+    def __init__(self, path, max_messages=10, max_sessions=1000, ttl=3600, purge_every=100):
+        """
+        Initialisation du stockage
+
+        Args:
+            path (Path): Fichier de la base SQLite
+            max_messages (int, optional): Messages conservés par session
+            max_sessions (int, optional): Nombre maximal de sessions
+            ttl (float, optional): Durée d'inactivité avant expiration (secondes)
+            purge_every (int, optional): Nombre d'ajouts entre deux purges
+        """
+        self.path = str(path)
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._appends = 0
+
+        with self._connection() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS conversation_sessions (
+                    id TEXT PRIMARY KEY,
+                    last_seen REAL NOT NULL,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    summary TEXT NOT NULL DEFAULT '',
+                    summarized INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS ix_conversation_sessions_last_seen
+                    ON conversation_sessions (last_seen);
+                CREATE TABLE IF NOT EXISTS conversation_messages (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    message TEXT NOT NULL,
+                    PRIMARY KEY (session_id, seq)
+                );
+            """)
+            # Bases créées avant l'ajout des résumés
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(conversation_sessions)')}
+            if 'summary' not in columns:
+                conn.execute("ALTER TABLE conversation_sessions ADD COLUMN summary TEXT NOT NULL DEFAULT ''")
+                conn.execute('ALTER TABLE conversation_sessions ADD COLUMN summarized INTEGER NOT NULL DEFAULT 0')
+
+    def _connection(self):
+        """Connexion propre au thread (les connexions sqlite3 ne se partagent pas)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def history(self, session_id):
+        conn = self._connection()
+        with conn:
+            if not self._touch(conn, session_id):
+                return []
+            rows = conn.execute(
+                'SELECT message FROM conversation_messages WHERE session_id = ? ORDER BY seq',
+                (session_id,)
+            ).fetchall()
+        return [json.loads(message) for message, in rows]
+
+    def message_count(self, session_id):
+        conn = self._connection()
+        with conn:
+            if not self._touch(conn, session_id):
+                return 0
+            return conn.execute(
+                'SELECT total FROM conversation_sessions WHERE id = ?', (session_id,)
+            ).fetchone()[0]
+
+    def snapshot(self, session_id):
+        conn = self._connection()
+        with conn:
+            if not self._touch(conn, session_id):
+                return {'messages': [], 'total': 0, 'summary': '', 'summarized': 0}
+            total, summary, summarized = conn.execute(
+                'SELECT total, summary, summarized FROM conversation_sessions WHERE id = ?', (session_id,)
+            ).fetchone()
+            rows = conn.execute(
+                'SELECT message FROM conversation_messages WHERE session_id = ? ORDER BY seq',
+                (session_id,)
+            ).fetchall()
+        return {
+            'messages': [json.loads(message) for message, in rows],
+            'total': total,
+            'summary': summary,
+            'summarized': summarized
+        }
+
+    def set_summary(self, session_id, summary, summarized, expected):
+        conn = self._connection()
+        with conn:
+            updated = conn.execute(
+                'UPDATE conversation_sessions SET summary = ?, summarized = ? WHERE id = ? AND summarized = ?',
+                (summary, summarized, session_id, expected)
+            )
+        return updated.rowcount > 0
+
+    def append(self, session_id, *messages):
+        conn = self._connection()
+        # BEGIN IMMEDIATE : le compteur de la session est lu et écrit sans concurrence
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = conn.execute(
+                'SELECT total, last_seen FROM conversation_sessions WHERE id = ?', (session_id,)
+            ).fetchone()
+            total = row[0] if row and now - row[1] <= self.ttl else 0
+            if row and total == 0:
+                # Session expirée non encore purgée : on repart de zéro
+                conn.execute('DELETE FROM conversation_messages WHERE session_id = ?', (session_id,))
+                conn.execute(
+                    "UPDATE conversation_sessions SET summary = '', summarized = 0 WHERE id = ?", (session_id,)
+                )
+
+            conn.executemany(
+                'INSERT INTO conversation_messages (session_id, seq, message) VALUES (?, ?, ?)',
+                [(session_id, total + offset, json.dumps(message, ensure_ascii=False))
+                 for offset, message in enumerate(messages)]
+            )
+            total += len(messages)
+            conn.execute(
+                'INSERT INTO conversation_sessions (id, last_seen, total) VALUES (?, ?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET last_seen = excluded.last_seen, total = excluded.total',
+                (session_id, now, total)
+            )
+            conn.execute(
+                'DELETE FROM conversation_messages WHERE session_id = ? AND seq < ?',
+                (session_id, total - self.max_messages)
+            )
+
+            self._appends += 1
+            if self._appends % self.purge_every == 0:
+                self._purge(conn, now)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def clear(self, session_id):
+        conn = self._connection()
+        with conn:
+            self._delete_sessions(conn, 'id = ?', (session_id,))
+
+    def _touch(self, conn, session_id):
+        """Marque la session comme récente ; False si absente ou expirée"""
+        now = time.time()
+        updated = conn.execute(
+            'UPDATE conversation_sessions SET last_seen = ? WHERE id = ? AND last_seen >= ?',
+            (now, session_id, now - self.ttl)
+        )
+        return updated.rowcount > 0
+
+    def _purge(self, conn, now):
+        """Supprime les sessions expirées puis les moins récentes en surnombre"""
+        self._delete_sessions(conn, 'last_seen < ?', (now - self.ttl,))
+        self._delete_sessions(
+            conn,
+            'id NOT IN (SELECT id FROM conversation_sessions ORDER BY last_seen DESC LIMIT ?)',
+            (self.max_sessions,)
+        )
+
+    @staticmethod
+    def _delete_sessions(conn, condition, parameters):
+        conn.execute(
+            f'DELETE FROM conversation_messages WHERE session_id IN '
+            f'(SELECT id FROM conversation_sessions WHERE {condition})',
+            parameters
+        )
+        conn.execute(f'DELETE FROM conversation_sessions WHERE {condition}', parameters)
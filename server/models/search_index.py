@@ -0,0 +1,218 @@
+"""
+Index inversé plein texte des tâches (titre et description)
+"""
+
+import re
+import math
+import heapq
+import functools
+import unicodedata
+
+# Articles et pronoms élidés : l'école, d'abord, qu'il, j'ai...
+ELISION = re.compile(r"\b(?:[cdjlmnst]|qu|jusqu|lorsqu|puisqu)['’]")
+WORD = re.compile(r"[a-z0-9]+")
+
+# Mots vides (sans accents) : mots outils du français et tournures des
+# questions vocales ("quelles tâches parlent du...") qui ne désignent rien
+STOPWORDS = frozenset("""
+a ai au aux avec ce ces cet cette dans de des du elle en et est il ils je la le les leur
+leurs lui ma mais me mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses
+son sur ta te tes toi ton tu un une vos votre vous y a ete etre avoir fait faire sont suis
+quel quelle quels quelles quoi comment combien quand
+tache taches parle parlent parler concerne concernent mentionne mentionnent contient
+""".split())
+
+# Suffixes retirés par la racinisation légère, du plus long au plus court
+SUFFIXES = (
+    'issements', 'issement', 'atrices', 'atrice', 'ateurs', 'ateur', 'ations', 'ation',
+    'ements', 'ement', 'ments', 'ment', 'euses', 'euse', 'istes', 'iste', 'ismes', 'isme',
+    'iques', 'ique', 'ables', 'able', 'ibles', 'ible', 'ites', 'ite', 'ives', 'ive',
+    'eurs', 'eur', 'ifs', 'if', 'er', 'ez', 'ee', 'e'
+)
+VOWELS = frozenset('aeiouy')
+
+
+def fold_accents(text):
+    """
+    Met en minuscules et retire les accents (é -> e, ç -> c, œ -> oe)
+
+    Args:
+        text (str): Texte à normaliser
+
+    Returns:
+        str: Texte normalisé
+    """
+    text = text.lower()
+    if text.isascii():
+        return text
+    text = text.replace('œ', 'oe').replace('æ', 'ae')
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+# Le vocabulaire des tâches est limité : chaque mot n'est raciné qu'une fois
+@functools.lru_cache(maxsize=65536)
+def stem(word):
+    """
+    Racinisation légère du français (pluriels et suffixes courants)
+
+    Volontairement agressive sur les suffixes : dentiste, dentistes et dent
+    partagent la racine "dent", appelle et appeler la racine "appel".
+
+    Args:
+        word (str): Mot normalisé (minuscules, sans accents)
+
+    Returns:
+        str: Racine du mot
+    """
+    if len(word) < 4:
+        return word
+
+    if word.endswith('aux') and len(word) > 4:
+        word = word[:-3] + 'al'
+    elif word.endswith(('s', 'x')):
+        word = word[:-1]
+
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+
+    # Consonne finale doublée : appell -> appel
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in VOWELS:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """
+    Découpe un texte français en termes indexables
+
+    Args:
+        text (str): Texte libre
+
+    Returns:
+        list: Racines des mots significatifs
+    """
+    if not text:
+        return []
+    text = ELISION.sub(' ', fold_accents(text).replace('’', "'"))
+    return [stem(word) for word in WORD.findall(text) if word not in STOPWORDS]
+
+
+class TaskSearchIndex:
+    """
+    Index inversé incrémental avec classement BM25
+
+    Chaque terme pointe vers les tâches qui le contiennent (avec sa
+    fréquence). Ajouter, remplacer ou retirer une tâche ne touche que les
+    listes de ses propres termes ; une recherche ne parcourt que les listes
+    des termes de la requête.
+    """
+
+    # Paramètres BM25 usuels
+    K1 = 1.2
+    B = 0.75
+
+    # Un mot du titre compte autant que deux mots de la description
+    TITLE_WEIGHT = 2
+
+    # Part des tâches au-delà de laquelle un terme ne sert plus qu'à reclasser
+    COMMON_TERM_RATIO = 0.05
+
+    def __init__(self):
+        """Initialisation de l'index"""
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_length = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, task):
+        """
+        Indexe (ou réindexe) une tâche
+
+        Args:
+            task (dict): Tâche avec 'id', 'title' et 'description'
+        """
+        task_id = task['id']
+        if task_id in self._doc_terms:
+            self.remove(task_id)
+
+        terms = {}
+        for term in tokenize(task.get('title')):
+            terms[term] = terms.get(term, 0) + self.TITLE_WEIGHT
+        for term in tokenize(task.get('description')):
+            terms[term] = terms.get(term, 0) + 1
+
+        length = sum(terms.values())
+        self._doc_terms[task_id] = terms
+        self._doc_length[task_id] = length
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[task_id] = frequency
+
+    def remove(self, task_id):
+        """
+        Retire une tâche de l'index
+
+        Args:
+            task_id (str): ID de la tâche
+        """
+        terms = self._doc_terms.pop(task_id, None)
+        if terms is None:
+            return
+
+        self._total_length -= self._doc_length.pop(task_id)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[task_id]
+            if not posting:
+                del self._postings[term]
+
+    def clear(self):
+        """Vide l'index"""
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_length.clear()
+        self._total_length = 0
+
+    def search(self, query, limit=20):
+        """
+        Recherche les tâches les plus pertinentes pour une requête
+
+        Args:
+            query (str): Requête libre (ex. "quelles tâches parlent du dentiste")
+            limit (int, optional): Nombre maximal de résultats
+
+        Returns:
+            list: Tuples (ID, score) par score décroissant
+        """
+        terms = set(tokenize(query))
+        if not terms or not self._doc_terms:
+            return []
+
+        count = len(self._doc_terms)
+        average_length = self._total_length / count or 1
+        scores = {}
+
+        # Termes les plus rares d'abord : un terme très courant ("appel",
+        # "rendez") ne fait que reclasser les tâches déjà trouvées par les
+        # autres termes, sans parcourir sa longue liste
+        postings = sorted(
+            (posting for posting in map(self._postings.get, terms) if posting),
+            key=len
+        )
+        for posting in postings:
+            idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+            if scores and len(posting) > count * self.COMMON_TERM_RATIO:
+                matches = [(task_id, posting[task_id]) for task_id in scores if task_id in posting]
+            else:
+                matches = posting.items()
+            for task_id, frequency in matches:
+                norm = self.K1 * (1 - self.B + self.B * self._doc_length[task_id] / average_length)
+                scores[task_id] = scores.get(task_id, 0.0) + idf * frequency * (self.K1 + 1) / (frequency + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,494 @@
+"""
+Dépôt de tâches SQL (SQLAlchemy), SQLite en mode WAL par défaut
+
+Migration ponctuelle depuis data/tasks.json :
+    python -m server.models.sql_task_repository [DATABASE_URL]
+"""
+
+import os
+import sys
+import threading
+from pathlib import Path
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Index, Integer, MetaData, String, Table, Text,
+    create_engine, event, func, insert, inspect, select, text
+)
+from sqlalchemy.exc import DBAPIError
+
+from server.models.search_index import TaskSearchIndex
+from server.utils.dates import day_start, parse_due_date, prefix_range
+from server.utils.journal import Journal
+
+metadata = MetaData()
+
+tasks_table = Table(
+    'tasks', metadata,
+    # Ordre d'insertion stable, quel que soit le moteur SQL
+    Column('position', Integer, primary_key=True, autoincrement=True),
+    Column('id', String(36), nullable=False, unique=True),
+    Column('title', Text, nullable=False),
+    Column('description', Text, nullable=False, default=''),
+    Column('created_at', String(32), nullable=False),
+    Column('updated_at', String(32)),
+    Column('completed_at', String(32)),
+    Column('due_date', String(32)),
+    Column('priority', String(16), nullable=False, default='medium'),
+    Column('completed', Boolean, nullable=False, default=False),
+    # Échéance lue (datetime local naïf), NULL si due_date est absente ou n'est pas une date ISO
+    Column('due_at', DateTime),
+    Index('ix_tasks_completed', 'completed'),
+    Index('ix_tasks_priority', 'priority'),
+    Index('ix_tasks_due_date', 'due_date'),
+    Index('ix_tasks_due_at', 'due_at'),
+)
+
+# Compteur incrémenté dans chaque transaction d'écriture (ETag, détection de changement)
+task_version_table = Table(
+    'task_version', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('version', Integer, nullable=False, default=0),
+)
+
+# Colonnes présentes seulement quand elles ont une valeur dans le format JSON historique
+OPTIONAL_COLUMNS = ('updated_at', 'completed_at')
+TASK_COLUMNS = ('id', 'title', 'description', 'created_at', 'due_date', 'priority', 'completed') + OPTIONAL_COLUMNS
+
+
+class _BatchRejected(Exception):
+    """Annule la transaction d'un lot dont une opération vise une tâche introuvable"""
+
+    def __init__(self, results):
+        super().__init__()
+        self.results = results
+
+
+class _ConcurrentUpdate(Exception):
+    """Annule la transaction d'un lot modifié entre-temps par un autre worker"""
+
+
+def create_task_engine(database_url, pool_size=5, max_overflow=10):
+    """
+    Crée un moteur SQLAlchemy avec pool de connexions
+
+    Pour SQLite, active le mode WAL (lectures concurrentes pendant les
+    écritures) et une synchronisation NORMAL, suffisante avec WAL.
+
+    Args:
+        database_url (str): URL de la base (ex. sqlite:///data/jarvis.db)
+        pool_size (int, optional): Taille du pool de connexions
+        max_overflow (int, optional): Connexions supplémentaires autorisées
+
+    Returns:
+        sqlalchemy.engine.Engine: Moteur configuré
+    """
+    is_sqlite = database_url.startswith('sqlite')
+    in_memory = is_sqlite and (database_url in ('sqlite://', 'sqlite:///:memory:'))
+
+    options = {'future': True}
+    if not in_memory:
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+    if is_sqlite:
+        options['connect_args'] = {'check_same_thread': False, 'timeout': 30}
+
+    engine = create_engine(database_url, **options)
+
+    if is_sqlite:
+        @event.listens_for(engine, 'connect')
+        def _configure_sqlite(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            if not in_memory:
+                cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.close()
+
+    return engine
+
+
+class SqlTaskRepository:
+    """
+    Dépôt de tâches SQL, filtres exécutés par la base via les index
+
+    Les échéances sont comparées sur la colonne due_at (date lue comme par
+    TaskStore) : une échéance non ISO (« demain ») n'apparaît ni dans les
+    intervalles ni dans les retards, comme avec le dépôt JSON.
+
+    La recherche plein texte utilise un index inversé en mémoire, propre au
+    worker : les écritures de ce worker le mettent à jour directement, celles
+    d'un autre worker (version inattendue) provoquent une reconstruction à la
+    recherche suivante.
+    """
+
+    def __init__(self, database_url, pool_size=5, max_overflow=10):
+        """
+        Initialisation du dépôt
+
+        Args:
+            database_url (str): URL SQLAlchemy de la base
+            pool_size (int, optional): Taille du pool de connexions
+            max_overflow (int, optional): Connexions supplémentaires autorisées
+        """
+        self.engine = create_task_engine(database_url, pool_size, max_overflow)
+        metadata.create_all(self.engine)
+        self._migrate_due_at()
+
+        with self.engine.begin() as conn:
+            if conn.execute(select(task_version_table.c.id)).first() is None:
+                conn.execute(insert(task_version_table).values(id=1, version=0))
+
+        self._search = TaskSearchIndex()
+        self._search_version = None
+        self._search_lock = threading.Lock()
+
+    def _migrate_due_at(self):
+        """Ajoute et remplit la colonne due_at d'une base créée avant elle"""
+        columns = {column['name'] for column in inspect(self.engine).get_columns('tasks')}
+        if 'due_at' not in columns:
+            column_type = tasks_table.c.due_at.type.compile(dialect=self.engine.dialect)
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(text(f'ALTER TABLE tasks ADD COLUMN due_at {column_type}'))
+            except DBAPIError:
+                # Colonne ajoutée entre-temps par un autre worker
+                pass
+        for index in tasks_table.indexes:
+            if index.name == 'ix_tasks_due_at':
+                index.create(self.engine, checkfirst=True)
+
+        # Échéances écrites avant la colonne (les non ISO restent à NULL)
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(tasks_table.c.id, tasks_table.c.due_date)
+                .where(tasks_table.c.due_at.is_(None), tasks_table.c.due_date.is_not(None))
+            ).all()
+            for task_id, due_date in rows:
+                due_at = parse_due_date(due_date)
+                if due_at is not None:
+                    conn.execute(tasks_table.update().where(tasks_table.c.id == task_id).values(due_at=due_at))
+
+    def all(self):
+        return self._select()
+
+    def get(self, task_id):
+        rows = self._select(tasks_table.c.id == task_id)
+        return rows[0] if rows else None
+
+    def version(self):
+        """
+        Numéro de version du dépôt, identique pour tous les workers
+
+        Returns:
+            int: Version incrémentée à chaque écriture
+        """
+        with self.engine.connect() as conn:
+            return conn.execute(select(task_version_table.c.version)).scalar_one()
+
+    def count(self):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(tasks_table)).scalar_one()
+
+    def add(self, task):
+        self.add_many([task])
+
+    def add_many(self, tasks):
+        """
+        Insère plusieurs tâches dans une seule transaction
+
+        Args:
+            tasks (list): Tâches complètes
+        """
+        if not tasks:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(insert(tasks_table), [self._to_row(task) for task in tasks])
+            version = self._bump_version(conn)
+        self._sync_search(version, put=tasks)
+
+    def update(self, task_id, mutate, max_attempts=5):
+        """
+        Met à jour une tâche par compare-and-swap sur updated_at
+
+        La mise à jour ne s'applique que si la ligne n'a pas changé depuis la
+        lecture ; sinon (écriture concurrente d'un autre worker) on relit et
+        on recommence, sans verrou applicatif.
+
+        Args:
+            task_id (str): ID de la tâche
+            mutate (callable): Modifie en place une copie de la tâche
+            max_attempts (int, optional): Nombre maximal de tentatives
+
+        Returns:
+            dict: La tâche mise à jour ou None si introuvable
+        """
+        for _ in range(max_attempts):
+            task = self.get(task_id)
+            if task is None:
+                return None
+
+            previous_updated_at = task.get('updated_at')
+            mutate(task)
+
+            with self.engine.begin() as conn:
+                result = conn.execute(
+                    tasks_table.update()
+                    .where(tasks_table.c.id == task_id)
+                    .where(tasks_table.c.updated_at.is_not_distinct_from(previous_updated_at))
+                    .values(**self._to_row(task))
+                )
+                if result.rowcount:
+                    version = self._bump_version(conn)
+            if result.rowcount:
+                self._sync_search(version, put=[task])
+                return task
+
+        raise RuntimeError(f"Mise à jour concurrente de la tâche {task_id}, abandon après {max_attempts} tentatives")
+
+    def apply(self, operations, max_attempts=5):
+        """
+        Applique un lot d'opérations dans une seule transaction
+
+        Args:
+            operations (list): Tuples ('add', tâche), ('update', id, mutate) ou ('remove', id)
+            max_attempts (int, optional): Tentatives en cas d'écriture concurrente
+
+        Returns:
+            tuple: (appliqué, résultats) ; un résultat vaut la tâche écrite,
+                True pour une suppression ou None si la tâche est introuvable.
+                Rien n'est appliqué si un résultat vaut None.
+        """
+        for _ in range(max_attempts):
+            try:
+                with self.engine.begin() as conn:
+                    results = [self._apply_one(conn, operation) for operation in operations]
+                    if any(result is None for result in results):
+                        raise _BatchRejected(results)
+                    version = self._bump_version(conn)
+                self._sync_search(
+                    version,
+                    put=[result for result in results if isinstance(result, dict)],
+                    removed=[operation[1] for operation in operations if operation[0] == 'remove']
+                )
+                return True, results
+            except _BatchRejected as rejected:
+                return False, rejected.results
+            except _ConcurrentUpdate:
+                continue
+
+        raise RuntimeError(f"Lot de tâches en conflit, abandon après {max_attempts} tentatives")
+
+    def _apply_one(self, conn, operation):
+        kind, target = operation[0], operation[1]
+
+        if kind == 'add':
+            conn.execute(insert(tasks_table), [self._to_row(target)])
+            return target
+
+        if kind == 'remove':
+            result = conn.execute(tasks_table.delete().where(tasks_table.c.id == target))
+            return True if result.rowcount else None
+
+        query = select(*[tasks_table.c[name] for name in TASK_COLUMNS]).where(tasks_table.c.id == target)
+        row = conn.execute(query).mappings().first()
+        if row is None:
+            return None
+
+        task = self._to_task(row)
+        previous_updated_at = task.get('updated_at')
+        operation[2](task)
+        result = conn.execute(
+            tasks_table.update()
+            .where(tasks_table.c.id == target)
+            .where(tasks_table.c.updated_at.is_not_distinct_from(previous_updated_at))
+            .values(**self._to_row(task))
+        )
+        if not result.rowcount:
+            raise _ConcurrentUpdate()
+        return task
+
+    def remove(self, task_id):
+        with self.engine.begin() as conn:
+            result = conn.execute(tasks_table.delete().where(tasks_table.c.id == task_id))
+            if result.rowcount:
+                version = self._bump_version(conn)
+        if result.rowcount:
+            self._sync_search(version, removed=[task_id])
+        return result.rowcount > 0
+
+    def by_completed(self, completed):
+        return self._select(tasks_table.c.completed == bool(completed))
+
+    def by_priority(self, priority):
+        return self._select(tasks_table.c.priority == priority)
+
+    def by_due_date(self, prefix):
+        """
+        Récupère les tâches dont l'échéance commence par `prefix`
+
+        Comme pour le dépôt JSON : échéances non ISO filtrées par préfixe,
+        puis échéances lues dans l'intervalle du préfixe (index de due_at).
+        Les préfixes sont traduits en intervalles [prefix, prefix+1) pour
+        utiliser l'index sur due_date, contrairement à un LIKE.
+        """
+        if not prefix:
+            return self._select(tasks_table.c.due_date.is_not(None))
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        by_prefix = [tasks_table.c.due_date >= prefix, tasks_table.c.due_date < upper]
+        tasks = self._select(tasks_table.c.due_at.is_(None), *by_prefix)
+
+        bounds = prefix_range(prefix[:10])
+        if bounds is None:
+            # Préfixe partiel ('2026-1', '2026-10-1') : pas d'intervalle, filtre par préfixe
+            conditions = [tasks_table.c.due_at.is_not(None)] + by_prefix
+        else:
+            conditions = [tasks_table.c.due_at >= bounds[0], tasks_table.c.due_at < bounds[1]]
+            if len(prefix) > 10:
+                conditions += by_prefix
+        return tasks + self._select(*conditions, order_by=tasks_table.c.due_at)
+
+    def due_between(self, start=None, end=None, open_only=False, limit=None):
+        """
+        Récupère les tâches dont l'échéance est dans [start, end)
+
+        Parcours d'intervalle sur l'index de due_at ; les échéances non ISO
+        (due_at NULL) sont exclues.
+        """
+        return self._select(*self._due_conditions(start, end, open_only), order_by=tasks_table.c.due_at,
+                            limit=limit)
+
+    def count_due_between(self, start=None, end=None, open_only=False):
+        query = select(func.count()).select_from(tasks_table).where(*self._due_conditions(start, end, open_only))
+        with self.engine.connect() as conn:
+            return conn.execute(query).scalar_one()
+
+    def next_due(self, after, limit):
+        return self._select(
+            tasks_table.c.completed == False,  # noqa: E712 (expression SQL)
+            tasks_table.c.due_at >= after,
+            order_by=tasks_table.c.due_at,
+            limit=limit
+        )
+
+    def overdue(self, today, limit=None):
+        return self.due_between(end=day_start(today), open_only=True, limit=limit)
+
+    def search(self, query, limit=20):
+        """
+        Recherche plein texte dans les titres et descriptions
+
+        Args:
+            query (str): Requête libre
+            limit (int, optional): Nombre maximal de résultats
+
+        Returns:
+            list: Tâches par pertinence décroissante
+        """
+        version = self.version()
+        with self._search_lock:
+            if version != self._search_version:
+                self._search.clear()
+                for task in self.all():
+                    self._search.add(task)
+                self._search_version = version
+            hits = self._search.search(query, limit)
+
+        if not hits:
+            return []
+        found = {task['id']: task for task in self._select(tasks_table.c.id.in_([task_id for task_id, _ in hits]))}
+        return [found[task_id] for task_id, _ in hits if task_id in found]
+
+    def _sync_search(self, version, put=(), removed=()):
+        """Reporte une écriture de ce worker dans l'index de recherche s'il était à jour"""
+        with self._search_lock:
+            if self._search_version != version - 1:
+                # Index absent ou en retard (écriture d'un autre worker) : reconstruit plus tard
+                self._search_version = None
+                return
+            for task in put:
+                self._search.add(task)
+            for task_id in removed:
+                self._search.remove(task_id)
+            self._search_version = version
+
+    @staticmethod
+    def _due_conditions(start, end, open_only):
+        conditions = [tasks_table.c.due_at.is_not(None)]
+        if start is not None:
+            conditions.append(tasks_table.c.due_at >= start)
+        if end is not None:
+            conditions.append(tasks_table.c.due_at < end)
+        if open_only:
+            conditions.append(tasks_table.c.completed == False)  # noqa: E712 (expression SQL)
+        return conditions
+
+    def _select(self, *conditions, order_by=None, limit=None):
+        query = select(*[tasks_table.c[name] for name in TASK_COLUMNS])
+        if conditions:
+            query = query.where(*conditions)
+        if order_by is not None:
+            query = query.order_by(order_by)
+        query = query.order_by(tasks_table.c.position)
+        if limit is not None:
+            query = query.limit(limit)
+        with self.engine.connect() as conn:
+            return [self._to_task(row) for row in conn.execute(query).mappings()]
+
+    @staticmethod
+    def _bump_version(conn):
+        conn.execute(task_version_table.update().values(version=task_version_table.c.version + 1))
+        return conn.execute(select(task_version_table.c.version)).scalar_one()
+
+    @staticmethod
+    def _to_row(task):
+        row = {name: task.get(name) for name in TASK_COLUMNS}
+        row['due_at'] = parse_due_date(task.get('due_date'))
+        return row
+
+    @staticmethod
+    def _to_task(row):
+        task = dict(row)
+        for name in OPTIONAL_COLUMNS:
+            if task[name] is None:
+                del task[name]
+        return task
+
+
+def migrate_json_tasks(data_dir, repository):
+    """
+    Importe une seule fois les tâches JSON (instantané + journal) dans la base
+
+    L'import n'a lieu que si la table est vide. Les fichiers JSON sont
+    ensuite renommés en *.migrated pour ne plus être relus.
+
+    Args:
+        data_dir (Path): Répertoire contenant tasks.json / tasks.journal
+        repository (SqlTaskRepository): Dépôt de destination
+
+    Returns:
+        int: Nombre de tâches importées
+    """
+    data_dir = Path(data_dir)
+    snapshot_path = data_dir / 'tasks.json'
+    journal_path = data_dir / 'tasks.journal'
+
+    if not snapshot_path.exists() and not journal_path.exists():
+        return 0
+    if repository.count() > 0:
+        return 0
+
+    journal = Journal(snapshot_path, journal_path)
+    tasks = journal.load()
+    journal.close()
+
+    repository.add_many(tasks)
+
+    for path in (snapshot_path, journal_path):
+        if path.exists():
+            os.replace(path, path.with_name(path.name + '.migrated'))
+
+    return len(tasks)
+
+
+if __name__ == '__main__':
+    url = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('DATABASE_URL', 'sqlite:///data/jarvis.db')
+    count = migrate_json_tasks(Path('data'), SqlTaskRepository(url))
+    print(f"{count} tâche(s) importée(s) dans {url}")
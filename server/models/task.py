@@ -0,0 +1,153 @@
+"""
+Représentation compacte d'une tâche
+"""
+
+import sys
+import uuid
+import datetime
+
+# Champs d'une tâche dans l'ordre du format JSON historique
+TASK_FIELDS = (
+    'id', 'title', 'description', 'created_at', 'due_date', 'priority', 'completed',
+    'updated_at', 'completed_at'
+)
+
+# Champs absents du format JSON quand ils n'ont pas de valeur
+OPTIONAL_FIELDS = ('updated_at', 'completed_at')
+
+
+def _pack_id(value):
+    """UUID canonique -> 16 octets ; tout autre identifiant est gardé tel quel"""
+    if isinstance(value, str) and len(value) == 36:
+        try:
+            packed = uuid.UUID(value)
+        except ValueError:
+            return value
+        if str(packed) == value:
+            return packed.bytes
+    return value
+
+
+def _unpack_id(value):
+    return str(uuid.UUID(bytes=value)) if isinstance(value, bytes) else value
+
+
+def _pack_timestamp(value):
+    """Horodatage ISO -> datetime, seulement s'il se réécrit à l'identique"""
+    if not isinstance(value, str):
+        return value
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    return parsed if parsed.isoformat() == value else value
+
+
+def _unpack_timestamp(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+class Task:
+    """
+    Tâche stockée sans dictionnaire par instance
+
+    Les attributs sont dans des __slots__, l'UUID est gardé sous forme de
+    16 octets et les horodatages en datetime. Priorités et descriptions
+    vides sont des chaînes partagées. Les valeurs qui ne se réécriraient pas
+    à l'identique (ID non canonique, date au format libre) restent des
+    chaînes : to_dict() redonne toujours exactement le JSON d'origine.
+    """
+
+    __slots__ = (
+        '_id', 'title', 'description', '_created_at', '_due_date', 'priority', 'completed',
+        '_updated_at', '_completed_at'
+    )
+
+    def __init__(self, id, title, description='', created_at=None, due_date=None,
+                 priority='medium', completed=False, updated_at=None, completed_at=None):
+        """
+        Initialisation de la tâche
+
+        Args:
+            id (str): ID de la tâche
+            title (str): Titre
+            description (str, optional): Description détaillée
+            created_at (str, optional): Date de création ISO
+            due_date (str, optional): Date d'échéance ISO
+            priority (str, optional): Priorité (low, medium, high)
+            completed (bool, optional): Statut de complétion
+            updated_at (str, optional): Date de dernière modification ISO
+            completed_at (str, optional): Date de complétion ISO
+        """
+        self._id = _pack_id(id)
+        self.title = title
+        self.description = sys.intern(description) if description == '' else description
+        self._created_at = _pack_timestamp(created_at)
+        self._due_date = _pack_timestamp(due_date)
+        self.priority = sys.intern(priority) if isinstance(priority, str) else priority
+        self.completed = completed
+        self._updated_at = _pack_timestamp(updated_at)
+        self._completed_at = _pack_timestamp(completed_at)
+
+    @property
+    def id(self):
+        return _unpack_id(self._id)
+
+    @property
+    def created_at(self):
+        return _unpack_timestamp(self._created_at)
+
+    @property
+    def due_date(self):
+        return _unpack_timestamp(self._due_date)
+
+    @property
+    def updated_at(self):
+        return _unpack_timestamp(self._updated_at)
+
+    @property
+    def completed_at(self):
+        return _unpack_timestamp(self._completed_at)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Construit une tâche depuis le format JSON
+
+        Args:
+            data (dict): Tâche au format JSON
+
+        Returns:
+            Task: La tâche compacte
+        """
+        return cls(**{name: data[name] for name in TASK_FIELDS if name in data})
+
+    def to_dict(self):
+        """
+        Convertit la tâche au format JSON historique
+
+        Returns:
+            dict: Tâche au format JSON
+        """
+        data = {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'created_at': self.created_at,
+            'due_date': self.due_date,
+            'priority': self.priority,
+            'completed': self.completed
+        }
+        for name in OPTIONAL_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, Task):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, title={self.title!r})"
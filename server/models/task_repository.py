@@ -0,0 +1,266 @@
+"""
+Dépôt de tâches en mémoire persisté par journal JSON
+"""
+
+from server.models.task_store import TaskStore
+from server.utils.dates import day_start, prefix_range
+from server.utils.journal import Journal
+
+
+class JournalTaskRepository:
+    """
+    Dépôt de tâches par défaut : index en mémoire + journal JSON
+
+    Tous les dépôts de tâches exposent la même interface (get, all, add,
+    update, remove, by_completed, by_priority, by_due_date, overdue,
+    search, version), ce qui permet à TaskService de changer de stockage
+    sans changer de code.
+
+    Plusieurs workers peuvent partager le même répertoire de données : les
+    écritures passent par une transaction du journal (verrou de fichier +
+    rattrapage), et chaque lecture vérifie d'un `stat` si un autre worker a
+    écrit depuis la dernière fois.
+    """
+
+    def __init__(self, data_dir, fsync='batch', fsync_interval=1.0, compact_every=1000):
+        """
+        Initialisation du dépôt
+
+        Args:
+            data_dir (Path): Répertoire des données
+            fsync (str, optional): Politique fsync du journal (always, batch, none)
+            fsync_interval (float, optional): Intervalle du fsync groupé en secondes
+            compact_every (int, optional): Nombre d'enregistrements avant compaction
+        """
+        # tasks.json sert d'instantané, les mutations s'ajoutent dans tasks.journal
+        self.journal = Journal(
+            data_dir / 'tasks.json',
+            data_dir / 'tasks.journal',
+            fsync=fsync,
+            fsync_interval=fsync_interval,
+            compact_every=compact_every
+        )
+        self.store = TaskStore(self.journal.load())
+        self.journal.start(
+            self.store.values,
+            on_put=self.store.put,
+            on_delete=self.store.remove,
+            on_reset=self._reset
+        )
+
+    def _reset(self, tasks):
+        self.store.clear()
+        for task in tasks:
+            self.store.put(task)
+
+    def _read(self, query, *args, **kwargs):
+        """
+        Lecture du stockage, à jour des écritures des autres workers
+
+        Les index du stockage sont parcourus sous le verrou des écritures :
+        les threads du même worker (gthread, pont WSGI) ne les modifient
+        pas pendant la lecture.
+        """
+        self.journal.refresh()
+        with self.journal.lock:
+            return query(*args, **kwargs)
+
+    def version(self):
+        """
+        Numéro de version du dépôt, identique pour tous les workers
+
+        Returns:
+            int: Numéro de séquence du dernier enregistrement du journal
+        """
+        self.journal.refresh()
+        return self.journal.seq
+
+    def all(self):
+        return self._read(self.store.values)
+
+    def get(self, task_id):
+        return self._read(self.store.get, task_id)
+
+    def add(self, task):
+        with self.journal.transaction():
+            self.store.put(task)
+            self.journal.put(task)
+
+    def update(self, task_id, mutate):
+        """
+        Met à jour une tâche de façon atomique
+
+        Args:
+            task_id (str): ID de la tâche
+            mutate (callable): Modifie en place une copie de la tâche
+
+        Returns:
+            dict: La tâche mise à jour ou None si introuvable
+        """
+        with self.journal.transaction():
+            existing = self.store.get(task_id)
+            if existing is None:
+                return None
+
+            # Copie : l'ancienne version reste intacte pour les index et l'instantané
+            task = dict(existing)
+            mutate(task)
+            self.store.put(task)
+            self.journal.put(task)
+        return task
+
+    def remove(self, task_id):
+        with self.journal.transaction():
+            if self.store.remove(task_id) is None:
+                return False
+            self.journal.delete(task_id)
+        return True
+
+    def apply(self, operations):
+        """
+        Applique un lot d'opérations de façon atomique, en une seule écriture
+
+        Args:
+            operations (list): Tuples ('add', tâche), ('update', id, mutate) ou ('remove', id)
+
+        Returns:
+            tuple: (appliqué, résultats) ; un résultat vaut la tâche écrite,
+                True pour une suppression ou None si la tâche est introuvable.
+                Rien n'est appliqué si un résultat vaut None.
+        """
+        with self.journal.transaction():
+            # État final par ID (None = supprimée), construit sans toucher au stockage
+            staged = {}
+            results = []
+
+            for operation in operations:
+                kind, target = operation[0], operation[1]
+                if kind == 'add':
+                    staged[target['id']] = target
+                    results.append(target)
+                    continue
+
+                current = staged[target] if target in staged else self.store.get(target)
+                if current is None:
+                    results.append(None)
+                elif kind == 'update':
+                    task = dict(current)
+                    operation[2](task)
+                    staged[target] = task
+                    results.append(task)
+                else:
+                    staged[target] = None
+                    results.append(True)
+
+            if any(result is None for result in results):
+                return False, results
+
+            records = []
+            for task_id, task in staged.items():
+                if task is None:
+                    self.store.remove(task_id)
+                    records.append({'op': 'delete', 'id': task_id})
+                else:
+                    self.store.put(task)
+                    records.append({'op': 'put', 'item': task})
+            self.journal.append(records)
+
+        return True, results
+
+    def by_completed(self, completed):
+        return self._read(self.store.by_completed, completed)
+
+    def by_priority(self, priority):
+        return self._read(self.store.by_priority, priority)
+
+    def by_due_date(self, prefix):
+        """
+        Récupère les tâches dont l'échéance commence par `prefix`
+
+        Args:
+            prefix (str): Date ISO YYYY-MM-DD ou préfixe (YYYY-MM, YYYY)
+
+        Returns:
+            list: Liste des tâches correspondantes
+        """
+        self.journal.refresh()
+        with self.journal.lock:
+            # Les échéances non ISO ne sont pas dans l'index trié : filtre par préfixe
+            tasks = [task for task in self.store.unparsed_due() if task['due_date'].startswith(prefix)]
+
+            bounds = prefix_range(prefix[:10])
+            if bounds is None:
+                # Préfixe partiel ('2026-1', '2026-10-1') : pas d'intervalle, filtre par préfixe
+                tasks.extend(task for task in self.store.due_between() if task['due_date'].startswith(prefix))
+                return tasks
+            tasks.extend(task for task in self.store.due_between(*bounds)
+                         if len(prefix) <= 10 or task['due_date'].startswith(prefix))
+        return tasks
+
+    def due_between(self, start=None, end=None, open_only=False, limit=None):
+        """
+        Récupère les tâches dont l'échéance est dans [start, end)
+
+        Args:
+            start (datetime, optional): Borne inférieure incluse
+            end (datetime, optional): Borne supérieure exclue
+            open_only (bool, optional): Seulement les tâches non complétées
+            limit (int, optional): Nombre maximal de tâches (None = toutes)
+
+        Returns:
+            list: Liste des tâches, par échéance croissante
+        """
+        return self._read(self.store.due_between, start, end, open_only, limit)
+
+    def count_due_between(self, start=None, end=None, open_only=False):
+        """
+        Compte les tâches dont l'échéance est dans [start, end)
+
+        Args:
+            start (datetime, optional): Borne inférieure incluse
+            end (datetime, optional): Borne supérieure exclue
+            open_only (bool, optional): Seulement les tâches non complétées
+
+        Returns:
+            int: Nombre de tâches correspondantes
+        """
+        return self._read(self.store.count_due_between, start, end, open_only)
+
+    def next_due(self, after, limit):
+        """
+        Récupère les prochaines tâches non complétées à échéance
+
+        Args:
+            after (datetime): Échéance minimale incluse
+            limit (int): Nombre maximal de tâches
+
+        Returns:
+            list: Liste des tâches, par échéance croissante
+        """
+        return self._read(self.store.next_due, after, limit)
+
+    def search(self, query, limit=20):
+        """
+        Recherche plein texte dans les titres et descriptions
+
+        Args:
+            query (str): Requête libre
+            limit (int, optional): Nombre maximal de résultats
+
+        Returns:
+            list: Tâches par pertinence décroissante
+        """
+        return self._read(self.store.search, query, limit)
+
+    def overdue(self, today, limit=None):
+        """
+        Récupère les tâches non complétées dont l'échéance est avant `today`
+
+        Args:
+            today (datetime.date): Date du jour
+            limit (int, optional): Nombre maximal de tâches (None = toutes)
+
+        Returns:
+            list: Liste des tâches en retard, par échéance croissante
+        """
+        return self._read(self.store.due_between, end=day_start(today), open_only=True, limit=limit)
@@ -0,0 +1,270 @@
+"""
+Stockage en mémoire indexé des tâches
+"""
+
+import bisect
+
+from server.models.search_index import TaskSearchIndex
+from server.utils.dates import parse_due_date
+
+
+class TaskStore:
+    """
+    Stockage des tâches avec index secondaires
+
+    Les tâches sont rangées dans un dictionnaire principal indexé par ID.
+    Des index secondaires (statut, priorité, échéance) sont tenus à jour à
+    chaque écriture, pour que les filtres coûtent O(taille du résultat) au
+    lieu d'un parcours complet.
+
+    Les index de statut et de priorité sont des dictionnaires utilisés comme
+    ensembles ordonnés (ID -> None) : insertion et suppression en O(1), ordre
+    d'insertion conservé.
+
+    Les échéances sont analysées une seule fois, à l'écriture, et rangées dans
+    des listes triées de (échéance, ID) : une pour toutes les tâches, une pour
+    les tâches non complétées. Retard, échéances du jour, intervalles et
+    « N prochaines échéances » sont des recherches dichotomiques.
+
+    Le titre et la description alimentent un index plein texte, mis à jour
+    aux mêmes moments que les autres index.
+
+    Le stockage n'est pas protégé contre les accès concurrents : lectures et
+    écritures se font sous un même verrou (celui du journal du dépôt).
+    """
+
+    def __init__(self, tasks=None):
+        """
+        Initialisation du stockage
+
+        Args:
+            tasks (list, optional): Tâches initiales
+        """
+        self._tasks = {}
+        self._by_completed = {True: {}, False: {}}
+        self._by_priority = {}
+        self._due = {}
+        self._due_all = []
+        self._due_open = []
+        self._due_unparsed = {}
+        self._search = TaskSearchIndex()
+
+        for task in tasks or []:
+            self.put(task)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def values(self):
+        """
+        Récupère toutes les tâches dans l'ordre d'insertion
+
+        Returns:
+            list: Liste des tâches
+        """
+        return list(self._tasks.values())
+
+    def get(self, task_id):
+        """
+        Récupère une tâche par son ID
+
+        Args:
+            task_id (str): ID de la tâche
+
+        Returns:
+            dict: La tâche ou None si introuvable
+        """
+        return self._tasks.get(task_id)
+
+    def put(self, task):
+        """
+        Ajoute ou remplace une tâche et met à jour les index
+
+        Args:
+            task (dict): Tâche complète (doit contenir 'id')
+        """
+        task_id = task['id']
+        previous = self._tasks.get(task_id)
+        if previous is not None:
+            self._unindex(previous)
+
+        self._tasks[task_id] = task
+        self._index(task)
+
+    def remove(self, task_id):
+        """
+        Supprime une tâche et ses entrées d'index
+
+        Args:
+            task_id (str): ID de la tâche
+
+        Returns:
+            dict: La tâche supprimée ou None si introuvable
+        """
+        task = self._tasks.pop(task_id, None)
+        if task is not None:
+            self._unindex(task)
+        return task
+
+    def clear(self):
+        """Vide le stockage et tous les index"""
+        self._tasks.clear()
+        self._by_completed = {True: {}, False: {}}
+        self._by_priority.clear()
+        self._due.clear()
+        self._due_all = []
+        self._due_open = []
+        self._due_unparsed.clear()
+        self._search.clear()
+
+    def by_completed(self, completed):
+        """
+        Récupère les tâches selon leur statut
+
+        Args:
+            completed (bool): Statut de complétion
+
+        Returns:
+            list: Liste des tâches correspondantes
+        """
+        return self._resolve(self._by_completed.get(bool(completed), {}))
+
+    def by_priority(self, priority):
+        """
+        Récupère les tâches d'une priorité donnée
+
+        Args:
+            priority (str): Priorité (low, medium, high)
+
+        Returns:
+            list: Liste des tâches correspondantes
+        """
+        return self._resolve(self._by_priority.get(priority, {}))
+
+    def due_between(self, start=None, end=None, open_only=False, limit=None):
+        """
+        Récupère les tâches dont l'échéance est dans [start, end), par échéance croissante
+
+        Args:
+            start (datetime, optional): Borne inférieure incluse (None = pas de borne)
+            end (datetime, optional): Borne supérieure exclue (None = pas de borne)
+            open_only (bool, optional): Seulement les tâches non complétées
+            limit (int, optional): Nombre maximal de tâches (None = toutes)
+
+        Returns:
+            list: Liste des tâches correspondantes
+        """
+        entries, low, high = self._due_range(start, end, open_only)
+        if limit is not None:
+            high = min(high, low + limit)
+        return [self._tasks[task_id] for _, task_id in entries[low:high]]
+
+    def count_due_between(self, start=None, end=None, open_only=False):
+        """
+        Compte les tâches dont l'échéance est dans [start, end), sans les lire
+
+        Args:
+            start (datetime, optional): Borne inférieure incluse (None = pas de borne)
+            end (datetime, optional): Borne supérieure exclue (None = pas de borne)
+            open_only (bool, optional): Seulement les tâches non complétées
+
+        Returns:
+            int: Nombre de tâches correspondantes
+        """
+        _, low, high = self._due_range(start, end, open_only)
+        return high - low
+
+    def next_due(self, after, limit):
+        """
+        Récupère les prochaines tâches non complétées à échéance
+
+        Args:
+            after (datetime): Échéance minimale incluse
+            limit (int): Nombre maximal de tâches
+
+        Returns:
+            list: Au plus `limit` tâches, par échéance croissante
+        """
+        low = bisect.bisect_left(self._due_open, (after,))
+        return [self._tasks[task_id] for _, task_id in self._due_open[low:low + limit]]
+
+    def unparsed_due(self):
+        """
+        Récupère les tâches dont la date d'échéance n'est pas une date ISO lisible
+
+        Returns:
+            list: Liste des tâches correspondantes
+        """
+        return self._resolve(self._due_unparsed)
+
+    def search(self, query, limit=20):
+        """
+        Recherche plein texte dans les titres et descriptions
+
+        Args:
+            query (str): Requête libre
+            limit (int, optional): Nombre maximal de résultats
+
+        Returns:
+            list: Tâches par pertinence décroissante
+        """
+        return [self._tasks[task_id] for task_id, _ in self._search.search(query, limit)]
+
+    def _due_range(self, start, end, open_only):
+        entries = self._due_open if open_only else self._due_all
+        low = 0 if start is None else bisect.bisect_left(entries, (start,))
+        high = len(entries) if end is None else bisect.bisect_left(entries, (end,))
+        return entries, low, high
+
+    def _resolve(self, ids):
+        return [self._tasks[task_id] for task_id in ids]
+
+    def _index(self, task):
+        task_id = task['id']
+        self._by_completed[bool(task.get('completed'))][task_id] = None
+        self._by_priority.setdefault(task.get('priority'), {})[task_id] = None
+        self._search.add(task)
+
+        if not task.get('due_date'):
+            return
+
+        due = parse_due_date(task['due_date'])
+        if due is None:
+            self._due_unparsed[task_id] = None
+            return
+
+        self._due[task_id] = due
+        bisect.insort(self._due_all, (due, task_id))
+        if not task.get('completed'):
+            bisect.insort(self._due_open, (due, task_id))
+
+    def _unindex(self, task):
+        task_id = task['id']
+        self._by_completed[bool(task.get('completed'))].pop(task_id, None)
+        self._discard(self._by_priority, task.get('priority'), task_id)
+        self._due_unparsed.pop(task_id, None)
+        self._search.remove(task_id)
+
+        due = self._due.pop(task_id, None)
+        if due is not None:
+            self._remove_entry(self._due_all, (due, task_id))
+            if not task.get('completed'):
+                self._remove_entry(self._due_open, (due, task_id))
+
+    @staticmethod
+    def _remove_entry(entries, entry):
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+
+    @staticmethod
+    def _discard(index, key, task_id):
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(task_id, None)
+        if not bucket:
+            del index[key]
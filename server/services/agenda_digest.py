@@ -0,0 +1,196 @@
+"""
+Résumé compact des tâches et de l'agenda, inséré dans le prompt de Claude
+"""
+
+import time
+import datetime
+import threading
+
+from server.services.context_manager import CHARS_PER_TOKEN
+
+# Libellés des priorités
+PRIORITY_LABELS = {'high': 'haute', 'medium': 'moyenne', 'low': 'basse'}
+
+# Jours de la semaine abrégés (indépendants de la locale du serveur)
+WEEKDAY_ABBREVIATIONS = ('lun.', 'mar.', 'mer.', 'jeu.', 'ven.', 'sam.', 'dim.')
+
+
+def _tokens(text):
+    return len(text) / CHARS_PER_TOKEN
+
+
+class AgendaDigest:
+    """
+    Résumé des tâches en retard, des tâches à échéance proche et des
+    événements à venir, borné en tokens
+
+    Chaque partie est reconstruite seulement quand sa source change : la
+    partie tâches quand la version des tâches (ou le jour) change, la partie
+    événements quand la version du calendrier change. Chaque partie lit au
+    plus `max_items` éléments par les index du stockage, et son total par un
+    comptage, jamais par la liste complète. Les événements sont relus en arrière-plan, le résumé
+    précédent restant servi en attendant : quand la version du calendrier
+    (ou le jour) change, et toutes les `calendar_ttl` secondes pour les
+    événements modifiés directement dans Google Calendar. Seule la première
+    lecture est attendue, hors du verrou.
+
+    Le texte ne change qu'avec les données : il est placé dans le préfixe
+    du prompt mis en cache par Anthropic.
+    """
+
+    def __init__(self, task_service, calendar_service=None, max_tokens=600, days=7, max_items=10,
+                 calendar_ttl=300.0):
+        """
+        Initialisation du résumé
+
+        Args:
+            task_service (TaskService): Service des tâches
+            calendar_service (CalendarService, optional): Service du calendrier
+            max_tokens (int, optional): Taille maximale du résumé en tokens
+            days (int, optional): Horizon des échéances et événements (jours)
+            max_items (int, optional): Éléments lus au plus par partie
+            calendar_ttl (float, optional): Délai avant de relire les événements (secondes)
+        """
+        self.task_service = task_service
+        self.calendar_service = calendar_service
+        self.max_tokens = max_tokens
+        self.days = days
+        self.max_items = max_items
+        self.calendar_ttl = calendar_ttl
+        self._tasks = (None, [])
+        self._events = (None, [], 0.0)
+        self._text = (None, '')
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def text(self):
+        """
+        Texte du résumé, à jour des dernières modifications
+
+        Returns:
+            str: Résumé prêt à insérer dans le prompt système
+        """
+        today = datetime.date.today()
+        if self.calendar_service is not None and self._events[0] is None:
+            self._load_events(today)
+
+        with self._lock:
+            task_lines = self._task_lines(today)
+            event_lines = self._event_lines(today)
+
+            # Texte recomposé seulement si une partie a été recalculée
+            key = (self._tasks[0], self._events[0], self._events[2])
+            if self._text[0] != key:
+                self._text = (key, self._render(task_lines, event_lines))
+            return self._text[1]
+
+    def _task_lines(self, today):
+        """Parties tâches (en retard, à échéance proche), recalculées si la version change"""
+        key = (self.task_service.get_version(), today)
+        if self._tasks[0] == key:
+            return self._tasks[1]
+
+        # max_items tâches lues par partie ; le total vient d'un comptage sur l'index
+        start, end = today.isoformat(), (today + datetime.timedelta(days=self.days)).isoformat()
+        overdue = self.task_service.get_overdue_tasks(limit=self.max_items)
+        due_soon = self.task_service.get_tasks_due_between(start, end, limit=self.max_items)
+
+        sections = [
+            ("Tâches en retard", [self._task_line(task) for task in overdue],
+             self.task_service.count_overdue_tasks()),
+            (f"Tâches à échéance d'ici {self.days} jours", [self._task_line(task) for task in due_soon],
+             self.task_service.count_tasks_due_between(start, end)),
+        ]
+        self._tasks = (key, sections)
+        return sections
+
+    def _event_lines(self, today):
+        """Partie événements, relue en arrière-plan si la version change ou après calendar_ttl"""
+        if self.calendar_service is None:
+            return []
+
+        key = (self.calendar_service.get_version(), today)
+        cached_key, sections, fetched_at = self._events
+        stale = cached_key != key or time.monotonic() - fetched_at >= self.calendar_ttl
+        if stale and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._refresh_events, args=(key, today), daemon=True).start()
+        return sections
+
+    def _load_events(self, today):
+        """Première lecture des événements (démarrage), attendue mais hors du verrou"""
+        key = (self.calendar_service.get_version(), today)
+        sections = self._fetch_events(today)
+        with self._lock:
+            if self._events[0] is None:
+                self._events = (key, sections, time.monotonic())
+
+    def _refresh_events(self, key, today):
+        try:
+            sections = self._fetch_events(today)
+            # Version changée pendant la lecture : nouvelle relecture au prochain appel
+            with self._lock:
+                self._events = (key, sections, time.monotonic())
+        except Exception as e:
+            print(f"Erreur lors de la relecture des événements: {e}")
+        finally:
+            self._refreshing = False
+
+    def _fetch_events(self, today):
+        start, end = today.isoformat(), (today + datetime.timedelta(days=self.days)).isoformat()
+        # Un événement de plus que max_items : le comptage n'est demandé qu'en cas de dépassement
+        events = self.calendar_service.get_events(start, end, max_results=self.max_items + 1)
+        total = len(events)
+        if total > self.max_items:
+            total = max(self.calendar_service.count_events(start, end), total)
+        return [(f"Événements des {self.days} prochains jours",
+                 [self._event_line(event) for event in events[:self.max_items]], total)]
+
+    @staticmethod
+    def _task_line(task):
+        due = (task.get('due_date') or '')[:16].replace('T', ' ')
+        priority = PRIORITY_LABELS.get(task.get('priority'), task.get('priority'))
+        return f"- {task['title']} (échéance {due}, priorité {priority}, id {task['id']})"
+
+    @staticmethod
+    def _event_line(event):
+        start = event.get('start', {})
+        value = start.get('dateTime') or start.get('date') or ''
+        try:
+            moment = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+            when = f"{WEEKDAY_ABBREVIATIONS[moment.weekday()]} {value[:10]}"
+            if 'T' in value:
+                when += f" {moment:%H:%M}"
+        except ValueError:
+            when = value
+        location = f" ({event['location']})" if event.get('location') else ''
+        return f"- {when} {event.get('summary', '(sans titre)')}{location}, id {event.get('id', '?')}"
+
+    def _render(self, task_sections, event_sections):
+        """Assemble les parties dans la limite de tokens, chacune avec sa part du budget"""
+        header = ("Tâches et agenda de l'utilisateur, à jour : réponds directement à partir de ces "
+                  "informations quand elles suffisent ; utilise les outils pour modifier ou pour "
+                  "ce qui n'y figure pas.")
+        sections = [section for section in task_sections + event_sections if section[1]]
+        if not sections:
+            return header + "\nAucune tâche en retard ou à échéance proche, aucun événement à venir."
+
+        lines = [header]
+        remaining = self.max_tokens - _tokens(header)
+        for index, (title, items, total) in enumerate(sections):
+            # Part du budget restant ; ce qu'une partie n'utilise pas revient aux suivantes
+            budget = remaining / (len(sections) - index)
+            used = _tokens(title)
+            kept = []
+            for item in items:
+                if used + _tokens(item) > budget:
+                    break
+                kept.append(item)
+                used += _tokens(item)
+            if total > len(kept):
+                kept.append(f"- … et {total - len(kept)} autre(s)")
+                used += _tokens(kept[-1])
+            lines.append(f"{title} :")
+            lines.extend(kept)
+            remaining -= used
+        return '\n'.join(lines)
@@ -0,0 +1,146 @@
+"""
+Chemin asynchrone des appels à Claude (serveur ASGI)
+"""
+
+import os
+import time
+import asyncio
+
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+from server.services.claude_service import DEFAULT_SESSION
+from server.services.resilience import UpstreamUnavailable
+
+
+class AsyncClaudeService:
+    """
+    Variante asynchrone de ClaudeService
+
+    Le déroulé d'un tour (historique, cache, budget, outils, comptabilité)
+    est celui de ClaudeService.turn, avec le même état : seuls les appels
+    à l'API passent par le client asynchrone, dont le pool de connexions
+    HTTP est partagé par toutes les requêtes du processus. Échéances,
+    nouvelles tentatives et disjoncteur sont ceux de claude_service.resilience.
+    Les étapes du tour (contexte, historique SQLite, journal, agenda) et
+    les outils, bloquants, s'exécutent dans un thread : la boucle asyncio
+    n'attend que le réseau.
+    """
+
+    def __init__(self, claude_service, max_connections=100):
+        """
+        Initialisation du service
+
+        Args:
+            claude_service (ClaudeService): Service dont l'état est partagé
+            max_connections (int, optional): Taille du pool de connexions vers l'API
+        """
+        self.claude_service = claude_service
+        self.client = AsyncAnthropic(
+            api_key=os.environ.get('ANTHROPIC_API_KEY'),
+            base_url=os.environ.get('ANTHROPIC_BASE_URL') or None,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            )
+        )
+
+    async def process_input(self, user_input, session_id=DEFAULT_SESSION):
+        """
+        Traite l'entrée utilisateur et génère une réponse avec Claude
+
+        Args:
+            user_input (str): Le texte d'entrée de l'utilisateur
+            session_id (str, optional): Session de l'utilisateur
+
+        Returns:
+            dict: Même résultat que ClaudeService.process_input
+
+        Raises:
+            TokenBudgetExceeded: Si la session a épuisé son budget de tokens
+        """
+        async for kind, value in self._respond(user_input, session_id, stream=False):
+            if kind == 'done':
+                return value
+
+    def stream_input(self, user_input, session_id=DEFAULT_SESSION):
+        """
+        Traite l'entrée utilisateur en diffusant la réponse au fil de sa génération
+
+        Args:
+            user_input (str): Le texte d'entrée de l'utilisateur
+            session_id (str, optional): Session de l'utilisateur
+
+        Returns:
+            Générateur asynchrone des mêmes événements que ClaudeService.stream_input,
+            qui lève UpstreamUnavailable dans les mêmes cas
+        """
+        return self._respond(user_input, session_id, stream=True)
+
+    async def close(self):
+        """Ferme le pool de connexions"""
+        await self.client.close()
+
+    async def _open_stream(self, request, timeout):
+        """Ouvre un flux de réponse (voir ClaudeService._open_stream)"""
+        manager = self.client.messages.stream(**request, timeout=timeout)
+        return manager, await manager.__aenter__()
+
+    async def _respond(self, user_input, session_id, stream):
+        resilience = self.claude_service.resilience
+        turn = self.claude_service.turn(user_input, session_id)
+        # Étapes bloquantes du tour hors de la boucle (une seule à la fois)
+        event = await asyncio.to_thread(next, turn)
+        streamed_text = False
+        deadline = resilience.new_deadline()
+
+        while True:
+            kind, value = event
+
+            if kind == 'cached':
+                if stream:
+                    yield 'token', value
+                event = await asyncio.to_thread(next, turn)
+
+            elif kind == 'call':
+                first_token_latency = None
+                try:
+                    if stream:
+                        started = time.perf_counter()
+                        separator = '\n\n' if streamed_text else ''
+                        manager, response_stream = await resilience.call_async(
+                            lambda timeout: self._open_stream(value, timeout), deadline, hedge=False
+                        )
+                        try:
+                            async for text in response_stream.text_stream:
+                                if first_token_latency is None:
+                                    first_token_latency = time.perf_counter() - started
+                                yield 'token', separator + text
+                                separator = ''
+                                streamed_text = True
+                                resilience.check_deadline(deadline)
+                            response = await response_stream.get_final_message()
+                        finally:
+                            await manager.__aexit__(None, None, None)
+                    else:
+                        response = await resilience.call_async(
+                            lambda timeout: self.client.messages.create(**value, timeout=timeout), deadline
+                        )
+                except UpstreamUnavailable as error:
+                    event = await asyncio.to_thread(turn.throw, error)
+                    if streamed_text:
+                        # Texte déjà envoyé : fin du flux sur une erreur (voir ClaudeService)
+                        turn.close()
+                        raise
+                    continue
+                event = await asyncio.to_thread(turn.send, (response, first_token_latency))
+
+            elif kind == 'tools':
+                actions = await asyncio.to_thread(self.claude_service.tool_executor.execute, value)
+                for action in actions:
+                    yield 'action', action
+                event = await asyncio.to_thread(turn.send, actions)
+
+            else:
+                yield 'done', value
+                return
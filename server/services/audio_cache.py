@@ -0,0 +1,255 @@
+"""
+Cache des fichiers de synthèse vocale, adressés par leur contenu
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import Future
+
+from server.services.tts_pool import TtsError
+
+# Extension des fichiers audio servis
+AUDIO_EXTENSION = '.mp3'
+
+# Sous-répertoire des synthèses en cours d'écriture
+PARTIAL_DIR = '.partial'
+
+
+class AudioCache:
+    """
+    Fichiers audio de synthèse vocale réutilisés pour un même texte
+
+    Le nom d'un fichier est l'empreinte (SHA-256) du texte et des réglages
+    de la voix : une réponse déjà synthétisée ("Tâche créée.") est servie
+    depuis le disque, avec une URL stable. Une synthèse est écrite dans un
+    fichier partiel puis renommée : un fichier visible est toujours complet,
+    y compris quand plusieurs workers produisent le même en même temps.
+    Dans un worker, les demandes simultanées d'un même texte attendent une
+    seule synthèse.
+
+    Le répertoire est borné en taille (`max_bytes`) par un thread
+    d'arrière-plan qui supprime les fichiers les moins récemment utilisés :
+    la date de modification sert de date de dernière utilisation (mise à
+    jour à chaque succès), partagée ainsi entre les workers. Un fichier plus
+    récent que `min_age` secondes n'est jamais supprimé, le temps que le
+    client le télécharge.
+    """
+
+    def __init__(self, directory, settings, max_bytes=200 * 1024 * 1024, sweep_interval=60.0, min_age=300.0):
+        """
+        Initialisation du cache et démarrage de l'éviction
+
+        Args:
+            directory (Path): Répertoire des fichiers audio servis
+            settings (dict): Réglages de la voix (moteur, langue, vitesse, volume)
+            max_bytes (int, optional): Taille maximale du répertoire en octets
+            sweep_interval (float, optional): Délai entre deux passes d'éviction (secondes)
+            min_age (float, optional): Âge minimal d'un fichier supprimable (secondes)
+        """
+        self.directory = directory
+        self.partial_directory = directory / PARTIAL_DIR
+        self.partial_directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.min_age = min_age
+        self._settings = json.dumps(settings, sort_keys=True)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'evicted_bytes': 0}
+        self._usage = {'files': 0, 'bytes': 0}
+
+        threading.Thread(target=self._sweep_loop, name='jarvis-audio-cache', daemon=True).start()
+
+    def key(self, text):
+        """
+        Empreinte d'un texte avec les réglages de la voix
+
+        Args:
+            text (str): Texte à synthétiser
+
+        Returns:
+            str: Empreinte hexadécimale (nom du fichier sans extension)
+        """
+        return hashlib.sha256(f"{self._settings}\n{text}".encode('utf-8')).hexdigest()
+
+    def get_or_create(self, text, synthesize, timeout=None):
+        """
+        Fichier audio d'un texte, synthétisé seulement s'il n'existe pas
+
+        Args:
+            text (str): Texte à synthétiser
+            synthesize (callable): synthesize(text, path) écrit le fichier audio
+            timeout (float, optional): Attente maximale d'une synthèse en cours (secondes)
+
+        Returns:
+            str: Nom du fichier dans le répertoire du cache
+        """
+        key = self.key(text)
+        filename = self._lookup(key)
+        if filename is not None:
+            return filename
+
+        future, owner = self._begin(key)
+        if not owner:
+            return future.result(timeout)
+
+        try:
+            partial = self._partial_path(key)
+            synthesize(text, str(partial))
+            filename = self._commit(key, partial)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, filename=filename)
+        return filename
+
+    async def get_or_create_async(self, text, synthesize, timeout=None):
+        """
+        Variante asynchrone de get_or_create
+
+        Args:
+            text (str): Texte à synthétiser
+            synthesize (coroutine function): await synthesize(text, path) écrit le fichier audio
+            timeout (float, optional): Attente maximale d'une synthèse en cours (secondes)
+
+        Returns:
+            str: Nom du fichier dans le répertoire du cache
+        """
+        key = self.key(text)
+        filename = self._lookup(key)
+        if filename is not None:
+            return filename
+
+        future, owner = self._begin(key)
+        if not owner:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+
+        try:
+            partial = self._partial_path(key)
+            await synthesize(text, str(partial))
+            filename = self._commit(key, partial)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, filename=filename)
+        return filename
+
+    def stats(self):
+        """
+        Statistiques du cache (compteurs du worker courant, taille du répertoire
+        à la dernière passe d'éviction)
+
+        Returns:
+            dict: Succès, échecs, taux de succès, attentes groupées, évictions, taille
+        """
+        with self._lock:
+            stats = dict(self._counters, **self._usage)
+        lookups = stats['hits'] + stats['misses']
+        stats.update(
+            hit_rate=stats['hits'] / lookups if lookups else 0.0,
+            max_bytes=self.max_bytes,
+            in_flight=len(self._in_flight)
+        )
+        return stats
+
+    def _lookup(self, key):
+        filename = key + AUDIO_EXTENSION
+        try:
+            # Date de dernière utilisation, lue par l'éviction de tous les workers
+            os.utime(self.directory / filename)
+        except FileNotFoundError:
+            with self._lock:
+                self._counters['misses'] += 1
+            return None
+        with self._lock:
+            self._counters['hits'] += 1
+        return filename
+
+    def _begin(self, key):
+        """Synthèse en cours pour la clé ; owner indique si l'appelant doit la produire"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counters['coalesced'] += 1
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            return future, True
+
+    def _finish(self, key, future, filename=None, error=None):
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            # Synthèse annulée (client parti) : échec pour les demandes qui l'attendaient
+            future.set_exception(error if isinstance(error, Exception)
+                                 else TtsError("Synthèse vocale interrompue"))
+        else:
+            future.set_result(filename)
+
+    def _partial_path(self, key):
+        return self.partial_directory / f"{key}.{uuid.uuid4().hex}{AUDIO_EXTENSION}"
+
+    def _commit(self, key, partial):
+        filename = key + AUDIO_EXTENSION
+        os.replace(partial, self.directory / filename)
+        return filename
+
+    def _sweep_loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Erreur lors de l'éviction du cache audio: {e}")
+            time.sleep(self.sweep_interval)
+
+    def sweep(self):
+        """
+        Passe d'éviction : supprime les fichiers les moins récemment utilisés
+        jusqu'à repasser sous 90 % de max_bytes, et les fichiers partiels
+        abandonnés
+        """
+        now = time.time()
+        files = []
+        total = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.endswith(AUDIO_EXTENSION):
+                    continue
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        evicted = 0
+        evicted_bytes = 0
+        if total > self.max_bytes:
+            target = self.max_bytes * 0.9
+            for mtime, size, path in sorted(files):
+                if total <= target or now - mtime < self.min_age:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Déjà supprimé par un autre worker
+                    pass
+                total -= size
+                evicted += 1
+                evicted_bytes += size
+
+        # Synthèses interrompues (processus arrêté pendant l'écriture)
+        with os.scandir(self.partial_directory) as entries:
+            for entry in entries:
+                try:
+                    if now - entry.stat().st_mtime > self.min_age:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+        with self._lock:
+            self._counters['evictions'] += evicted
+            self._counters['evicted_bytes'] += evicted_bytes
+            self._usage = {'files': len(files) - evicted, 'bytes': total}
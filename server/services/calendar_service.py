@@ -10,6 +10,8 @@ from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 
+from server.utils.journal import exclusive_file_lock
+
 class CalendarService:
     """Service pour interagir avec Google Calendar"""
     
@@ -20,7 +22,32 @@ class CalendarService:
         self.data_dir.mkdir(exist_ok=True)
         
         self.credentials_path = self.data_dir / 'token.pickle'
+        self.version_path = self.data_dir / 'calendar.version'
         self.service = self._authenticate()
+    
+    def get_version(self):
+        """
+        Récupère la version des événements modifiés par JARVIS
+        
+        La version est partagée entre workers (data/calendar.version) et
+        change à chaque création, modification ou suppression faite par ce
+        service. Les modifications faites directement dans Google Calendar
+        ne la changent pas.
+        
+        Returns:
+            int: Numéro de version
+        """
+        try:
+            return int(self.version_path.read_text())
+        except (OSError, ValueError):
+            return 0
+    
+    def _bump_version(self):
+        """Incrémente la version des événements"""
+        with exclusive_file_lock(self.data_dir / 'calendar.version.lock'):
+            tmp_path = self.version_path.with_name(f'calendar.version.{os.getpid()}.tmp')
+            tmp_path.write_text(str(self.get_version() + 1))
+            os.replace(tmp_path, self.version_path)
         
     def _authenticate(self):
         """
@@ -81,22 +108,7 @@ class CalendarService:
         if not self.service:
             return []
         
-        # Configuration des paramètres de recherche
-        now = datetime.datetime.utcnow()
-        
-        if start_date:
-            start_datetime = datetime.datetime.fromisoformat(f"{start_date}T00:00:00")
-        else:
-            start_datetime = now
-        
-        if end_date:
-            end_datetime = datetime.datetime.fromisoformat(f"{end_date}T23:59:59")
-        else:
-            end_datetime = start_datetime + datetime.timedelta(days=7)
-        
-        # Conversion au format ISO pour l'API
-        time_min = start_datetime.isoformat() + 'Z'
-        time_max = end_datetime.isoformat() + 'Z'
+        time_min, time_max = self._time_range(start_date, end_date)
         
         # Appel à l'API
         try:
@@ -116,6 +128,61 @@ class CalendarService:
             print(f"Erreur lors de la récupération des événements: {e}")
             return []
     
+    def count_events(self, start_date=None, end_date=None):
+        """
+        Compte les événements du calendrier entre deux dates
+        
+        Seuls les identifiants sont demandés à l'API, par pages de 2500.
+        
+        Args:
+            start_date (str, optional): Date de début au format YYYY-MM-DD
+            end_date (str, optional): Date de fin au format YYYY-MM-DD
+            
+        Returns:
+            int: Nombre d'événements (0 si le calendrier est indisponible)
+        """
+        if not self.service:
+            return 0
+        
+        time_min, time_max = self._time_range(start_date, end_date)
+        
+        try:
+            count = 0
+            page_token = None
+            while True:
+                events_result = self.service.events().list(
+                    calendarId='primary',
+                    timeMin=time_min,
+                    timeMax=time_max,
+                    maxResults=2500,
+                    singleEvents=True,
+                    pageToken=page_token,
+                    fields='items(id),nextPageToken'
+                ).execute()
+                count += len(events_result.get('items', []))
+                page_token = events_result.get('nextPageToken')
+                if not page_token:
+                    return count
+        except Exception as e:
+            print(f"Erreur lors du comptage des événements: {e}")
+            return 0
+    
+    @staticmethod
+    def _time_range(start_date, end_date):
+        """Bornes timeMin / timeMax de l'API (7 jours à partir de maintenant par défaut)"""
+        if start_date:
+            start_datetime = datetime.datetime.fromisoformat(f"{start_date}T00:00:00")
+        else:
+            start_datetime = datetime.datetime.utcnow()
+        
+        if end_date:
+            end_datetime = datetime.datetime.fromisoformat(f"{end_date}T23:59:59")
+        else:
+            end_datetime = start_datetime + datetime.timedelta(days=7)
+        
+        # Conversion au format ISO pour l'API
+        return start_datetime.isoformat() + 'Z', end_datetime.isoformat() + 'Z'
+    
     def create_event(self, summary, start, end=None, description="", location=""):
         """
         Crée un nouvel événement dans le calendrier
@@ -158,6 +225,7 @@ class CalendarService:
                 body=event
             ).execute()
             
+            self._bump_version()
             return created_event
         except Exception as e:
             print(f"Erreur lors de la création de l'événement: {e}")
@@ -237,6 +305,7 @@ class CalendarService:
                 body=event
             ).execute()
             
+            self._bump_version()
             return updated_event
         except Exception as e:
             print(f"Erreur lors de la mise à jour de l'événement: {e}")
@@ -261,6 +330,7 @@ class CalendarService:
                 eventId=event_id
             ).execute()
             
+            self._bump_version()
             return True
         except Exception as e:
             print(f"Erreur lors de la suppression de l'événement: {e}")
@@ -3,20 +3,119 @@ Service d'intégration avec l'API Claude d'Anthropic
 """
 
 import os
+import re
 import json
+import time
+import hashlib
+import textwrap
+import datetime
+from pathlib import Path
 from anthropic import Anthropic
 
+from server.models.conversation_store import MemoryConversationStore, SqliteConversationStore
+from server.models.search_index import fold_accents
+from server.services.context_manager import ContextManager
+from server.services.resilience import CircuitBreaker, ResilientCaller, UpstreamUnavailable
+from server.services.usage_tracker import UsageTracker
+from server.utils.ttl_cache import TTLCache
+
+# Session utilisée quand l'appelant n'en précise pas
+DEFAULT_SESSION = 'default'
+
+# Jours de la semaine (indépendants de la locale du serveur)
+WEEKDAYS = ('lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi', 'dimanche')
+
+# Questions dont la réponse dépend de l'heure (texte normalisé, sans accents) :
+# leur clé de cache inclut la minute donnée à Claude, pas seulement le jour
+TIME_SENSITIVE = re.compile(
+    r"\b(?:heures?|minutes?|maintenant|instant|actuellement|bientot|tard|tot|"
+    r"matin|midi|soir|soiree|nuit|prochaine?s?|suivante?s?)\b"
+)
+
+# Nombre maximal d'allers-retours outils -> Claude pour une même question
+MAX_TOOL_ROUNDS = 5
+
+# Réponse quand Claude n'a produit aucun texte (ni action)
+EMPTY_REPLY = "Je n'ai pas de réponse à donner pour le moment."
+
+# Réponse de repli quand l'API Claude ne répond pas
+DEGRADED_REPLY = ("Je n'arrive pas à joindre mon service de réflexion pour le moment. "
+                  "Réessayez dans quelques instants.")
+
+# Consigne des résumés de conversation
+SUMMARY_PROMPT = (
+    "Tu résumes une conversation entre un utilisateur et JARVIS, son assistant personnel. "
+    "Intègre les nouveaux échanges au résumé actuel et renvoie uniquement le nouveau résumé, "
+    "court et factuel : demandes, décisions, informations personnelles, tâches et rendez-vous "
+    "évoqués, questions restées ouvertes."
+)
+
 class ClaudeService:
     """Service pour interagir avec l'API Claude d'Anthropic"""
     
-    def __init__(self):
-        """Initialisation du service Claude"""
-        self.client = Anthropic(api_key=os.environ.get('ANTHROPIC_API_KEY'))
+    def __init__(self, context_version=None, tool_executor=None, agenda=None):
+        """
+        Initialisation du service Claude
+        
+        Args:
+            context_version (callable, optional): Renvoie la version des données
+                (tâches, événements) dont dépendent les réponses ; une réponse
+                en cache n'est réutilisée que si cette version n'a pas changé
+            tool_executor (ToolExecutor, optional): Exécute les outils proposés
+                à Claude (sans exécuteur, Claude répond sans outils)
+            agenda (AgendaDigest, optional): Résumé des tâches et de l'agenda
+                ajouté au prompt système
+        """
+        # ANTHROPIC_BASE_URL : autre point d'accès (ex. benchmarks/anthropic_standin.py)
+        # Les nouvelles tentatives sont faites par self.resilience, pas par le SDK
+        self.client = Anthropic(
+            api_key=os.environ.get('ANTHROPIC_API_KEY'),
+            base_url=os.environ.get('ANTHROPIC_BASE_URL') or None,
+            max_retries=0
+        )
+        
+        # Échéance par requête, nouvelles tentatives, appels doublés et disjoncteur
+        self.resilience = ResilientCaller(
+            deadline=float(os.environ.get('JARVIS_LLM_DEADLINE', 30)),
+            max_retries=int(os.environ.get('JARVIS_LLM_MAX_RETRIES', 2)),
+            base_delay=float(os.environ.get('JARVIS_LLM_RETRY_BASE_DELAY', 0.5)),
+            max_delay=float(os.environ.get('JARVIS_LLM_RETRY_MAX_DELAY', 8)),
+            hedge_after=float(os.environ.get('JARVIS_LLM_HEDGE_AFTER', 0)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.environ.get('JARVIS_LLM_BREAKER_THRESHOLD', 5)),
+                reset_timeout=float(os.environ.get('JARVIS_LLM_BREAKER_RESET', 30))
+            )
+        )
         self.model = "claude-3-7-sonnet-20250219"  # Utilisation du modèle le plus récent
-        self.conversation_history = []
+        self.conversations = self._create_conversation_store()
+        self.context_version = context_version or (lambda: None)
+        self.tool_executor = tool_executor
+        self.agenda = agenda
+        
+        # Messages envoyés sous un budget de tokens, les plus anciens résumés en arrière-plan
+        self.summary_model = os.environ.get('JARVIS_SUMMARY_MODEL', 'claude-3-5-haiku-20241022')
+        self.summary_tokens = int(os.environ.get('JARVIS_SUMMARY_TOKENS', 400))
+        self.context = ContextManager(
+            self.conversations,
+            self._summarize,
+            history_tokens=int(os.environ.get('JARVIS_HISTORY_TOKENS', 2000))
+        )
+        
+        # Cache des réponses (JARVIS_RESPONSE_CACHE_SIZE=0 pour le désactiver)
+        self.response_cache = TTLCache(
+            max_size=int(os.environ.get('JARVIS_RESPONSE_CACHE_SIZE', 512)),
+            ttl=float(os.environ.get('JARVIS_RESPONSE_CACHE_TTL', 300))
+        )
+        
+        # Tokens consommés par requête et par session (budget 0 = illimité)
+        self.usage = UsageTracker(
+            session_budget=int(os.environ.get('JARVIS_SESSION_TOKEN_BUDGET', 0)),
+            max_sessions=int(os.environ.get('JARVIS_MAX_SESSIONS', 1000))
+        )
         
         # Système prompt pour définir le comportement de l'assistant
-        self.system_prompt = """
+        # (désindenté : l'indentation du code coûterait des tokens à chaque appel)
+        self.system_prompt = textwrap.dedent("""
         Tu es JARVIS, un assistant personnel vocal intelligent. Tu peux aider avec:
         1. La gestion de tâches et de listes
         2. Les rappels et notifications
@@ -24,89 +123,432 @@ class ClaudeService:
         4. La prise de notes et le stockage d'informations
 
         Réponds de manière concise, naturelle et utile, comme un assistant personnel efficace.
-        Si l'utilisateur te demande de créer une tâche, un rappel ou un événement, tu dois extraire
-        les informations pertinentes (titre, date, description, etc.) et les formater correctement.
+        Pour consulter ou modifier les tâches, les rappels et le calendrier, utilise les outils
+        à ta disposition plutôt que de décrire l'action, puis confirme brièvement ce qui a été fait.
+        Pour modifier ou supprimer un élément, retrouve d'abord son identifiant avec l'outil de
+        liste ou de recherche correspondant.
         
         Pour les dates et heures, utilise le format ISO 8601 (YYYY-MM-DDTHH:MM:SS).
+        """).strip()
+    
+    def _create_conversation_store(self):
         """
+        Crée le stockage des conversations configuré par JARVIS_CONVERSATIONS_BACKEND
+        
+        - memory (défaut) : en mémoire, propre à chaque worker
+        - sqlite : base data/conversations.db partagée entre workers
+        
+        Returns:
+            Le stockage des conversations
+        """
+        backend = os.environ.get('JARVIS_CONVERSATIONS_BACKEND', 'memory')
+        
+        # Messages conservés par session, au-delà de ce qu'envoie le ContextManager
+        # pour qu'il puisse les résumer ; nombre pair : l'historique commence
+        # toujours par un message utilisateur
+        max_messages = int(os.environ.get('JARVIS_HISTORY_MESSAGES', 40))
+        max_messages += max_messages % 2
+        options = {
+            'max_messages': max_messages,
+            'max_sessions': int(os.environ.get('JARVIS_MAX_SESSIONS', 1000)),
+            'ttl': float(os.environ.get('JARVIS_SESSION_TTL', 3600))
+        }
+        
+        if backend == 'sqlite':
+            data_dir = Path('data')
+            data_dir.mkdir(exist_ok=True)
+            return SqliteConversationStore(data_dir / 'conversations.db', **options)
+        
+        if backend != 'memory':
+            raise ValueError(f"Backend de conversations inconnu: {backend} (attendu: memory, sqlite)")
+        
+        return MemoryConversationStore(**options)
     
-    def process_input(self, user_input):
+    def process_input(self, user_input, session_id=DEFAULT_SESSION):
         """
         Traite l'entrée utilisateur et génère une réponse avec Claude
         
+        Les outils demandés par Claude (tâches, rappels, calendrier) sont
+        exécutés côté serveur avant la réponse finale. Si l'API ne répond
+        pas à temps, une réponse de repli est renvoyée (clé 'degraded').
+        
         Args:
             user_input (str): Le texte d'entrée de l'utilisateur
+            session_id (str, optional): Session de l'utilisateur (historique propre)
             
         Returns:
-            dict: Un dictionnaire contenant la réponse et les actions à effectuer
+            dict: Un dictionnaire contenant la réponse, les actions exécutées
+                et les tokens consommés
+            
+        Raises:
+            TokenBudgetExceeded: Si la session a épuisé son budget de tokens
+        """
+        for kind, value in self._respond(user_input, session_id, stream=False):
+            if kind == 'done':
+                return value
+    
+    def stream_input(self, user_input, session_id=DEFAULT_SESSION):
         """
-        # Ajout de l'entrée utilisateur à l'historique de conversation
-        self.conversation_history.append({"role": "user", "content": user_input})
+        Traite l'entrée utilisateur en diffusant la réponse au fil de sa génération
         
-        # Création de la liste de messages pour l'API Claude
-        messages = [{"role": "system", "content": self.system_prompt}]
+        L'historique n'est mis à jour qu'à la fin du flux : un flux
+        interrompu (client déconnecté) ne laisse pas de réponse tronquée dans
+        la conversation. Les actions déjà exécutées le restent.
         
-        # Ajout des derniers messages de l'historique (limitons à 10 pour garder le contexte gérable)
-        messages.extend(self.conversation_history[-10:])
+        Args:
+            user_input (str): Le texte d'entrée de l'utilisateur
+            session_id (str, optional): Session de l'utilisateur (historique propre)
+            
+        Yields:
+            tuple: ('token', fragment de texte) au fil de la réponse,
+                ('action', action exécutée) après chaque appel d'outil, puis
+                ('done', dictionnaire identique à celui de process_input)
+            
+        Raises:
+            TokenBudgetExceeded: Si la session a épuisé son budget de tokens
+            UpstreamUnavailable: Si l'API cesse de répondre (échéance, erreurs)
+                après l'envoi d'une partie du texte ; avant, la réponse de
+                repli arrive comme 'done'
+        """
+        return self._respond(user_input, session_id, stream=True)
+    
+    def _respond(self, user_input, session_id, stream):
+        """Tour de conversation complet, commun aux modes bloquant et flux"""
+        turn = self.turn(user_input, session_id)
+        event = next(turn)
+        streamed_text = False
+        deadline = self.resilience.new_deadline()
         
-        # Appel à l'API Claude
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            temperature=0.7,
-            messages=messages
-        )
+        while True:
+            kind, value = event
+            
+            if kind == 'cached':
+                if stream:
+                    yield 'token', value
+                event = next(turn)
+            
+            elif kind == 'call':
+                first_token_latency = None
+                try:
+                    if stream:
+                        started = time.perf_counter()
+                        # Les textes de deux allers-retours successifs sont séparés d'une ligne vide
+                        separator = '\n\n' if streamed_text else ''
+                        # Nouvelles tentatives possibles jusqu'à l'ouverture du flux seulement
+                        manager, response_stream = self.resilience.call(
+                            lambda timeout: self._open_stream(value, timeout), deadline, hedge=False
+                        )
+                        try:
+                            for text in response_stream.text_stream:
+                                if first_token_latency is None:
+                                    first_token_latency = time.perf_counter() - started
+                                yield 'token', separator + text
+                                separator = ''
+                                streamed_text = True
+                                self.resilience.check_deadline(deadline)
+                            response = response_stream.get_final_message()
+                        finally:
+                            manager.__exit__(None, None, None)
+                    else:
+                        response = self.resilience.call(
+                            lambda timeout: self.client.messages.create(**value, timeout=timeout), deadline
+                        )
+                except UpstreamUnavailable as error:
+                    event = turn.throw(error)
+                    if streamed_text:
+                        # Texte déjà envoyé : la réponse de repli ne peut pas le compléter,
+                        # le flux se termine sur une erreur (événement error côté routes)
+                        turn.close()
+                        raise
+                    continue
+                event = turn.send((response, first_token_latency))
+            
+            elif kind == 'tools':
+                actions = self.tool_executor.execute(value)
+                for action in actions:
+                    yield 'action', action
+                event = turn.send(actions)
+            
+            else:
+                yield 'done', value
+                return
+    
+    def turn(self, user_input, session_id=DEFAULT_SESSION):
+        """
+        Déroulé d'un tour de conversation, sans entrée-sortie réseau
         
-        # Extraction du texte de réponse
-        assistant_response = response.content[0].text
+        Historique, cache des réponses, budget, boucle d'outils et
+        comptabilité sont gérés ici ; l'appelant se charge des appels à
+        l'API et de l'exécution des outils, de façon bloquante ou
+        asynchrone. Le générateur est piloté par send() :
         
-        # Ajout de la réponse à l'historique
-        self.conversation_history.append({"role": "assistant", "content": assistant_response})
+        - ('cached', texte) : réponse servie par le cache (next())
+        - ('call', paramètres) : appel de l'API à faire, reçoit
+          (réponse, délai du premier fragment ou None), ou UpstreamUnavailable
+          par throw() si l'API n'a pas répondu
+        - ('tools', appels) : outils à exécuter, reçoit les actions
+        - ('done', résultat) : fin du tour
         
-        # Extraction des actions éventuelles (tâches, rappels, événements)
-        actions = self._extract_actions(assistant_response)
+        Args:
+            user_input (str): Le texte d'entrée de l'utilisateur
+            session_id (str, optional): Session de l'utilisateur
+            
+        Raises:
+            TokenBudgetExceeded: Si la session a épuisé son budget de tokens
+        """
+        user_message = {"role": "user", "content": user_input}
+        summary, history = self.context.build(session_id)
+        now = datetime.datetime.now()
         
+        # Question déjà posée dans le même contexte : pas d'appel à l'API
+        cache_key = self._cache_key(user_input, summary, history, now)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            yield 'cached', cached['message']
+            result = self._finish(session_id, user_message, cached['message'], cached['actions'])
+            result['usage'] = self.usage.record(session_id)
+            yield 'done', result
+            return
+        
+        self.usage.check_budget(session_id)
+        
+        messages = self._messages(history, user_message, self._clock(now))
+        texts = []
+        actions = []
+        usages = []
+        first_token_latency = None
+        started = time.perf_counter()
+        
+        for _ in range(MAX_TOOL_ROUNDS):
+            call_started = time.perf_counter()
+            try:
+                response, call_first_token_latency = yield 'call', self._request(messages, summary)
+            except UpstreamUnavailable as error:
+                yield 'done', self._degraded(session_id, error, actions, usages, started)
+                return
+            if first_token_latency is None and call_first_token_latency is not None:
+                first_token_latency = call_started - started + call_first_token_latency
+            
+            usages.append(response.usage)
+            texts.extend(block.text for block in response.content if block.type == 'text' and block.text)
+            calls = [block for block in response.content if block.type == 'tool_use']
+            if response.stop_reason != 'tool_use' or not calls or self.tool_executor is None:
+                break
+            
+            # Exécution des outils (en parallèle) puis relance avec leurs résultats
+            executed = yield 'tools', calls
+            actions.extend(executed)
+            
+            messages.append({"role": "assistant", "content": [self._content_block(block) for block in response.content]})
+            messages.append({"role": "user", "content": [self.tool_executor.tool_result(action) for action in executed]})
+        
+        usage = self.usage.record(
+            session_id,
+            usages,
+            time.perf_counter() - started,
+            first_token_latency=first_token_latency
+        )
+        
+        if texts:
+            result = self._remember(cache_key, self._finish(session_id, user_message, '\n\n'.join(texts), actions))
+        else:
+            # Outils sans texte (ou allers-retours épuisés) : l'API refuse un message
+            # assistant vide dans l'historique, le résumé des actions le remplace
+            result = self._finish(session_id, user_message, self._actions_reply(actions), actions)
+        result['usage'] = usage
+        yield 'done', result
+    
+    def _degraded(self, session_id, error, actions, usages, started):
+        """
+        Réponse de repli quand l'API Claude n'a pas répondu
+        
+        Elle n'entre ni dans l'historique ni dans le cache ; les actions
+        déjà exécutées lors des allers-retours précédents sont renvoyées.
+        """
+        print(f"API Claude indisponible, réponse de repli: {error}")
+        self.resilience.record_degraded()
         return {
-            "message": assistant_response,
-            "actions": actions
+            "message": DEGRADED_REPLY,
+            "actions": actions,
+            "degraded": True,
+            "usage": self.usage.record(session_id, usages, time.perf_counter() - started)
+        }
+    
+    def _cache_key(self, user_input, summary, history, now):
+        """
+        Clé de cache d'une question dans son contexte
+        
+        La question est normalisée (casse, accents, ponctuation, espaces) ;
+        le prompt système, le résumé et l'historique envoyés et la version des tâches et
+        des événements font partie de la clé, donc toute modification de
+        ces données rend les anciennes réponses inaccessibles. Le jour en
+        fait aussi partie, et la minute pour une question qui dépend de
+        l'heure (« quelle heure est-il », « dans deux heures »).
+        """
+        normalized = ' '.join(re.findall(r'\w+', fold_accents(user_input)))
+        moment = now.strftime('%Y-%m-%dT%H:%M') if TIME_SENSITIVE.search(normalized) else now.date().isoformat()
+        context = [normalized, self.system_prompt, summary, history, self.context_version(), moment]
+        payload = json.dumps(context, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _actions_reply(actions):
+        """Réponse décrivant les actions exécutées, quand Claude n'a pas rédigé de texte"""
+        if not actions:
+            return EMPTY_REPLY
+        # Chaque outil cité une fois, dans l'ordre d'exécution
+        done = dict.fromkeys(action['tool'] for action in actions if action['status'] == 'success')
+        failed = dict.fromkeys(action['tool'] for action in actions if action['status'] != 'success')
+        parts = []
+        if done:
+            parts.append(f"Actions effectuées : {', '.join(done)}.")
+        if failed:
+            parts.append(f"Actions en échec : {', '.join(failed)}.")
+        return ' '.join(parts)
+    
+    def _remember(self, cache_key, result):
+        """Met une réponse en cache, sauf si elle a modifié des données"""
+        if all(action['read_only'] for action in result['actions']):
+            self.response_cache.set(cache_key, {'message': result['message'], 'actions': result['actions']})
+        return result
+    
+    @staticmethod
+    def _messages(history, user_message, clock):
+        """
+        Messages envoyés pour un nouveau message de la session
+        
+        Le dernier message de l'historique porte un point de cache de prompt :
+        d'un tour à l'autre, seul le nouvel échange est facturé au prix plein.
+        La date et l'heure, qui changent à chaque minute, sont placées dans
+        le nouveau message, après tous les points de cache (l'historique
+        enregistre le message sans elles).
+        """
+        # Derniers messages de la session (fenêtre bornée par le ContextManager)
+        messages = history + [{
+            "role": "user",
+            "content": [{"type": "text", "text": clock}, {"type": "text", "text": user_message["content"]}]
+        }]
+        if history:
+            last = history[-1]
+            messages[len(history) - 1] = {
+                "role": last["role"],
+                "content": [{"type": "text", "text": last["content"], "cache_control": {"type": "ephemeral"}}]
+            }
+        return messages
+    
+    def _open_stream(self, request, timeout):
+        """
+        Ouvre un flux de réponse : la requête part ici, et les erreurs HTTP
+        (429, 529...) sont levées avant le premier fragment
+        
+        Returns:
+            tuple: (gestionnaire à fermer avec __exit__, flux ouvert)
+        """
+        manager = self.client.messages.stream(**request, timeout=timeout)
+        return manager, manager.__enter__()
+    
+    def _request(self, messages, summary=''):
+        """Paramètres d'appel de l'API Claude"""
+        request = {
+            "model": self.model,
+            "max_tokens": 2000,
+            "temperature": 0.7,
+            # Le prompt système est un paramètre à part : l'API refuse le rôle "system"
+            "system": self._system_blocks(summary),
+            "messages": messages
         }
+        if self.tool_executor is not None:
+            request["tools"] = self.tool_executor.tools
+        return request
+    
+    def _system_blocks(self, summary=''):
+        """
+        Prompt système, préfixe statique marqué pour le cache de prompt d'Anthropic
+        
+        Un premier point de cache couvre les définitions d'outils (placées
+        avant le prompt système par l'API) et le prompt lui-même, un second
+        le résumé des tâches et de l'agenda, qui ne change qu'avec les
+        données ; le résumé de la conversation, qui change plus souvent,
+        vient après. Rien ne dépend de l'heure : la date et l'heure sont
+        dans le nouveau message (voir _messages).
+        
+        Args:
+            summary (str, optional): Résumé des échanges anciens de la session
+        
+        Returns:
+            list: Blocs de texte du paramètre system
+        """
+        blocks = [{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}]
+        if self.agenda is not None:
+            blocks.append({"type": "text", "text": self.agenda.text(), "cache_control": {"type": "ephemeral"}})
+        if summary:
+            blocks.append({"type": "text", "text": f"Résumé des échanges précédents avec l'utilisateur :\n{summary}"})
+        return blocks
     
-    def _extract_actions(self, text):
+    @staticmethod
+    def _clock(now):
+        """Date et heure données à Claude avec le message de l'utilisateur"""
+        return f"Nous sommes le {WEEKDAYS[now.weekday()]} {now:%Y-%m-%d}, il est {now:%H:%M}."
+    
+    def _summarize(self, summary, messages):
         """
-        Analyse le texte de réponse pour extraire les actions à effectuer
+        Intègre des messages au résumé d'une conversation (appelé en arrière-plan)
         
         Args:
-            text (str): Le texte de réponse de Claude
+            summary (str): Résumé actuel (vide au premier résumé)
+            messages (list): Messages à intégrer, du plus ancien au plus récent
             
         Returns:
-            list: Liste des actions à effectuer
+            str: Nouveau résumé, borné à summary_tokens tokens
         """
-        actions = []
+        transcript = '\n'.join(
+            f"{'Utilisateur' if message['role'] == 'user' else 'JARVIS'} : {message['content']}"
+            for message in messages
+        )
+        response = self.resilience.call(
+            lambda timeout: self.client.messages.create(
+                model=self.summary_model,
+                max_tokens=self.summary_tokens,
+                temperature=0,
+                system=SUMMARY_PROMPT,
+                messages=[{
+                    "role": "user",
+                    "content": f"Résumé actuel :\n{summary or '(aucun)'}\n\nNouveaux échanges :\n{transcript}"
+                }],
+                timeout=timeout
+            ),
+            self.resilience.new_deadline(),
+            hedge=False
+        )
+        return '\n'.join(block.text for block in response.content if block.type == 'text').strip()
+    
+    @staticmethod
+    def _content_block(block):
+        """Bloc de réponse de l'API converti en bloc de message à renvoyer"""
+        if block.type == 'tool_use':
+            return {"type": "tool_use", "id": block.id, "name": block.name, "input": block.input}
+        return {"type": "text", "text": block.text}
+    
+    def _finish(self, session_id, user_message, assistant_response, actions):
+        """Enregistre l'échange et construit la réponse renvoyée au client"""
+        # Ajout de l'échange à l'historique, seulement une fois la réponse obtenue
+        # (les appels d'outils intermédiaires ne sont pas conservés)
+        self.conversations.append(
+            session_id,
+            user_message,
+            {"role": "assistant", "content": assistant_response}
+        )
         
-        # Recherche de patterns indiquant des actions
-        if "J'ai créé une tâche" in text or "J'ai ajouté une tâche" in text:
-            # Extraction de la tâche
-            # Ceci est simplifié, une implémentation réelle utiliserait
-            # des expressions régulières ou du NLP plus avancé
-            actions.append({
-                "type": "task",
-                "operation": "create"
-            })
-        
-        if "J'ai programmé un rappel" in text or "Je te rappellerai" in text:
-            actions.append({
-                "type": "reminder",
-                "operation": "create"
-            })
-        
-        if "J'ai ajouté un événement" in text or "J'ai créé un rendez-vous" in text:
-            actions.append({
-                "type": "calendar_event",
-                "operation": "create"
-            })
-        
-        return actions
-    
-    def clear_history(self):
-        """Efface l'historique de la conversation"""
-        self.conversation_history = []
+        return {
+            "message": assistant_response,
+            "actions": actions
+        }
+    
+    def clear_history(self, session_id=DEFAULT_SESSION):
+        """
+        Efface l'historique d'une conversation
+        
+        Args:
+            session_id (str, optional): Session à effacer
+        """
+        self.conversations.clear(session_id)
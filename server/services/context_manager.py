@@ -0,0 +1,139 @@
+"""
+Fenêtre de contexte des conversations, bornée en tokens, avec résumé glissant
+"""
+
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Caractères par token, estimation prudente pour du français
+CHARS_PER_TOKEN = 3.5
+
+# Surcoût d'un message (rôle, délimiteurs), en tokens
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(message):
+    """
+    Estimation du nombre de tokens d'un message, sans appel à l'API
+
+    Args:
+        message (dict): Message {'role', 'content'}
+
+    Returns:
+        int: Nombre de tokens estimé
+    """
+    return math.ceil(len(message['content']) / CHARS_PER_TOKEN) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextManager:
+    """
+    Choisit les messages envoyés à Claude sous un budget de tokens
+
+    Les échanges les plus récents sont envoyés tels quels, tant qu'ils tiennent
+    dans `history_tokens` (le dernier échange est toujours envoyé). Les plus
+    anciens sont remplacés par un résumé, enregistré avec la session et mis à
+    jour en arrière-plan, hors du chemin de la requête : les tokens d'entrée
+    restent constants quelle que soit la longueur de la conversation.
+
+    Un résumé replie d'un coup les messages jusqu'à ne garder que
+    `keep_ratio` du budget : la fenêtre se remplit ensuite sur plusieurs tours
+    avant le repli suivant, et d'ici là le début du prompt (résumé compris)
+    ne change pas, ce qui profite au cache de prompt.
+    """
+
+    def __init__(self, conversations, summarizer, history_tokens=2000, keep_ratio=0.5, max_workers=2):
+        """
+        Initialisation du gestionnaire
+
+        Args:
+            conversations: Stockage des conversations (snapshot, set_summary)
+            summarizer (callable): summarizer(résumé actuel, messages) -> nouveau résumé
+            history_tokens (int, optional): Budget de tokens des messages envoyés
+            keep_ratio (float, optional): Part du budget gardée en messages après un résumé
+            max_workers (int, optional): Résumés générés simultanément
+        """
+        self.conversations = conversations
+        self.summarizer = summarizer
+        self.history_tokens = history_tokens
+        self.keep_ratio = keep_ratio
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jarvis-summary')
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def build(self, session_id):
+        """
+        Contexte d'une session pour le prochain appel à Claude
+
+        Si des messages sortent du budget sans être encore résumés, un
+        résumé est programmé en arrière-plan ; en attendant, ils ne sont
+        pas envoyés.
+
+        Args:
+            session_id (str): ID de la session
+
+        Returns:
+            tuple: (résumé des échanges anciens, messages récents à envoyer)
+        """
+        snapshot = self.conversations.snapshot(session_id)
+        window = self._unsummarized(snapshot)
+        cut = self._cut(window, self.history_tokens)
+        if cut:
+            self._schedule(session_id)
+        return snapshot['summary'], window[cut:]
+
+    def _unsummarized(self, snapshot):
+        """Messages de la session que le résumé ne couvre pas encore"""
+        messages = snapshot['messages']
+        first = snapshot['total'] - len(messages)
+        return messages[max(snapshot['summarized'] - first, 0):]
+
+    @staticmethod
+    def _cut(messages, budget):
+        """
+        Indice du premier message gardé pour tenir dans le budget
+
+        La coupe se fait avant un message utilisateur, pour que la fenêtre
+        commence toujours par une question ; le dernier échange est gardé
+        même s'il dépasse le budget à lui seul.
+        """
+        cut = len(messages)
+        used = 0
+        for index in range(len(messages) - 1, -1, -1):
+            used += estimate_tokens(messages[index])
+            if messages[index]['role'] != 'user':
+                continue
+            if used > budget and cut < len(messages):
+                break
+            cut = index
+            if used > budget:
+                break
+        return cut
+
+    def _schedule(self, session_id):
+        """Programme le résumé d'une session (un seul à la fois par session)"""
+        with self._lock:
+            if session_id in self._pending:
+                return
+            self._pending.add(session_id)
+        self._executor.submit(self._summarize, session_id)
+
+    def _summarize(self, session_id):
+        """Replie les messages anciens d'une session dans son résumé (arrière-plan)"""
+        try:
+            snapshot = self.conversations.snapshot(session_id)
+            window = self._unsummarized(snapshot)
+            cut = self._cut(window, self.history_tokens * self.keep_ratio)
+            if not cut:
+                return
+
+            summary = self.summarizer(snapshot['summary'], window[:cut])
+            # Messages couverts : ceux déjà résumés (ou évincés) et ceux repliés ici
+            summarized = snapshot['total'] - len(window) + cut
+            # Refusé si un autre worker a résumé la session entre-temps
+            self.conversations.set_summary(session_id, summary, summarized, snapshot['summarized'])
+        except Exception as e:
+            print(f"Erreur lors du résumé de la conversation {session_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(session_id)
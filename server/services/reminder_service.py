@@ -0,0 +1,329 @@
+"""
+Service de rappels de l'assistant JARVIS
+"""
+
+import os
+import time
+import heapq
+import queue
+import asyncio
+import datetime
+import threading
+import uuid
+from pathlib import Path
+
+from server.utils.dates import parse_due_date
+from server.utils.journal import Journal
+
+
+class ThreadSubscriber(queue.Queue):
+    """
+    File de rappels lue depuis un thread (route Flask)
+
+    None est lu quand l'abonné a été retiré (file pleine) : le flux doit se
+    fermer pour que le client se reconnecte.
+    """
+
+    def drop(self):
+        """Vide la file et y laisse None (appelé par le planificateur)"""
+        with self.mutex:
+            self.queue.clear()
+            self.queue.append(None)
+            self.not_empty.notify()
+
+
+class LoopSubscriber:
+    """
+    File de rappels lue depuis une boucle asyncio (route ASGI)
+
+    Les rappels sont déclenchés par le thread du planificateur : ils sont
+    transmis à la boucle par call_soon_threadsafe, et lus sans thread. None
+    est lu quand l'abonné a été retiré (file pleine).
+    """
+
+    def __init__(self, loop, max_pending):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def put_nowait(self, reminder):
+        # Taille lue hors de la boucle : approximative, suffisante pour écarter un client lent
+        if self.queue.full():
+            raise queue.Full
+        try:
+            self.loop.call_soon_threadsafe(self._put, reminder)
+        except RuntimeError:
+            # Boucle arrêtée : abonné à retirer
+            raise queue.Full
+
+    def drop(self):
+        """Vide la file et y laisse None (appelé par le planificateur)"""
+        try:
+            self.loop.call_soon_threadsafe(self._drop)
+        except RuntimeError:
+            pass
+
+    def _put(self, reminder):
+        try:
+            self.queue.put_nowait(reminder)
+        except asyncio.QueueFull:
+            # Remplie entre la vérification et l'ajout : rappel perdu, le client doit relire
+            self._drop()
+
+    def _drop(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self):
+        """Prochain rappel déclenché, None si l'abonné a été retiré"""
+        return await self.queue.get()
+
+
+class ReminderService:
+    """
+    Planificateur de rappels à base de tas (file de priorité)
+
+    Les rappels en attente sont persistés par journal (data/reminders.*) et
+    rechargés au démarrage. Un unique thread attend l'échéance du prochain
+    rappel du tas : aucun thread par rappel et aucun parcours périodique,
+    le coût d'un ajout ou d'un déclenchement est O(log n).
+
+    Avec plusieurs workers, chaque worker arme le même tas ; le déclenchement
+    se fait dans une transaction du journal, donc un seul worker l'écrit,
+    et les autres le voient en rattrapant le journal et préviennent leurs
+    propres clients.
+    """
+
+    # Au-delà, un worker vérifie quand même (un stat) si un autre worker a écrit
+    MAX_IDLE_WAIT = 1.0
+
+    def __init__(self):
+        """Initialisation du service de rappels"""
+        self.data_dir = Path('data')
+        self.data_dir.mkdir(exist_ok=True)
+
+        self.journal = Journal(
+            self.data_dir / 'reminders.json',
+            self.data_dir / 'reminders.journal',
+            fsync=os.environ.get('JARVIS_REMINDERS_FSYNC', 'batch'),
+            compact_every=int(os.environ.get('JARVIS_REMINDERS_COMPACT_EVERY', 1000))
+        )
+
+        # Un seul verrou pour l'état, le tas et le journal : pas d'inversion d'ordre
+        self._wakeup = threading.Condition(self.journal.lock)
+        self._reminders = {}
+        self._heap = []
+        self._subscribers = set()
+        self._closed = False
+
+        for reminder in self.journal.load():
+            # Les rappels déjà déclenchés disparaissent à la prochaine compaction
+            if reminder.get('status') == 'pending':
+                self._track(reminder)
+        heapq.heapify(self._heap)
+
+        self.journal.start(
+            lambda: list(self._reminders.values()),
+            on_put=self._on_journal_put,
+            on_delete=self._on_journal_delete,
+            on_reset=self._on_journal_reset
+        )
+
+        self._dispatcher = threading.Thread(target=self._run, name='reminder-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def create_reminder(self, message, remind_at, task_id=None):
+        """
+        Programme un rappel
+
+        Args:
+            message (str): Texte du rappel
+            remind_at (str): Date et heure du rappel au format ISO
+            task_id (str, optional): Tâche associée
+
+        Returns:
+            dict: Le rappel créé
+
+        Raises:
+            ValueError: Si la date du rappel n'est pas une date ISO valide
+        """
+        if parse_due_date(remind_at) is None:
+            raise ValueError(f"Date de rappel invalide: {remind_at}")
+
+        reminder = {
+            'id': str(uuid.uuid4()),
+            'message': message,
+            'remind_at': remind_at,
+            'task_id': task_id,
+            'created_at': datetime.datetime.now().isoformat(),
+            'status': 'pending'
+        }
+
+        with self.journal.transaction():
+            self._track(reminder, push=True)
+            self.journal.put(reminder)
+            self._wakeup.notify()
+
+        return reminder
+
+    def cancel_reminder(self, reminder_id):
+        """
+        Annule un rappel en attente
+
+        Args:
+            reminder_id (str): ID du rappel
+
+        Returns:
+            bool: True si annulé, False si introuvable ou déjà déclenché
+        """
+        with self.journal.transaction():
+            # L'entrée du tas devient orpheline et sera ignorée à son échéance
+            if self._reminders.pop(reminder_id, None) is None:
+                return False
+            self.journal.delete(reminder_id)
+            self._compact_heap_if_needed()
+        return True
+
+    def get_pending_reminders(self, limit=50):
+        """
+        Récupère les rappels en attente, du plus proche au plus lointain
+
+        Args:
+            limit (int, optional): Nombre maximal de rappels
+
+        Returns:
+            list: Liste des rappels
+        """
+        self.journal.refresh()
+        with self.journal.lock:
+            reminders = list(self._reminders.values())
+        # Sélection partielle en O(n log limit) : les rappels ne sont jamais tous triés
+        return heapq.nsmallest(limit, reminders, key=self._fire_time)
+
+    def subscribe(self, max_pending=100, loop=None):
+        """
+        Abonne un client aux rappels déclenchés
+
+        Args:
+            max_pending (int, optional): Taille de la file du client
+            loop (asyncio.AbstractEventLoop, optional): Boucle du client
+                asynchrone (file lue par `await subscriber.get()`)
+
+        Returns:
+            ThreadSubscriber ou LoopSubscriber: File dans laquelle arrivent les
+                rappels déclenchés ; None y arrive si le client, trop lent, est retiré
+        """
+        subscriber = ThreadSubscriber(maxsize=max_pending) if loop is None else LoopSubscriber(loop, max_pending)
+        with self.journal.lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        Désabonne un client
+
+        Args:
+            subscriber (ThreadSubscriber ou LoopSubscriber): File renvoyée par subscribe
+        """
+        with self.journal.lock:
+            self._subscribers.discard(subscriber)
+
+    def close(self):
+        """Arrête le thread de déclenchement (le journal reste ouvert)"""
+        with self.journal.lock:
+            self._closed = True
+            self._wakeup.notify()
+        # Laisse un déclenchement en cours se terminer
+        if self._dispatcher is not threading.current_thread():
+            self._dispatcher.join(timeout=5)
+
+    @staticmethod
+    def _fire_time(reminder):
+        return parse_due_date(reminder['remind_at']).timestamp()
+
+    def _track(self, reminder, push=False):
+        """Ajoute un rappel en attente à l'état et au tas (sous verrou)"""
+        self._reminders[reminder['id']] = reminder
+        entry = (self._fire_time(reminder), reminder['id'])
+        if push:
+            heapq.heappush(self._heap, entry)
+        else:
+            self._heap.append(entry)
+
+    def _compact_heap_if_needed(self):
+        """Reconstruit le tas quand les entrées orphelines y deviennent majoritaires"""
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._reminders):
+            self._heap = [(self._fire_time(reminder), reminder_id)
+                          for reminder_id, reminder in self._reminders.items()]
+            heapq.heapify(self._heap)
+
+    def _run(self):
+        """Boucle du thread de déclenchement"""
+        while True:
+            self.journal.refresh()
+
+            with self.journal.lock:
+                if self._closed:
+                    return
+
+                due = self._pop_due(time.time())
+                if due is None:
+                    timeout = self.MAX_IDLE_WAIT
+                    if self._heap:
+                        timeout = min(timeout, max(self._heap[0][0] - time.time(), 0))
+                    self._wakeup.wait(timeout)
+                    continue
+
+            self._fire(due)
+
+    def _pop_due(self, now):
+        """Retire du tas le prochain rappel échu encore valide (sous verrou)"""
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, reminder_id = heapq.heappop(self._heap)
+            reminder = self._reminders.get(reminder_id)
+            if reminder is not None and self._fire_time(reminder) == fire_at:
+                return reminder_id
+        return None
+
+    def _fire(self, reminder_id):
+        """Déclenche un rappel, une seule fois pour l'ensemble des workers"""
+        with self.journal.transaction():
+            # Le rattrapage a pu montrer qu'un autre worker l'a déjà déclenché ou annulé
+            reminder = self._reminders.pop(reminder_id, None)
+            if reminder is None:
+                return
+            fired = dict(reminder, status='fired', fired_at=datetime.datetime.now().isoformat())
+            self.journal.put(fired)
+            self._publish(fired)
+
+    def _publish(self, reminder):
+        """Envoie un rappel déclenché aux clients abonnés de ce worker (sous verrou)"""
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(reminder)
+            except queue.Full:
+                # Client trop lent ou déconnecté : on ne bloque pas le déclenchement ;
+                # son flux se ferme et EventSource se reconnecte
+                self._subscribers.discard(subscriber)
+                subscriber.drop()
+
+    def _on_journal_put(self, reminder):
+        if reminder.get('status') == 'fired':
+            # Déclenché par un autre worker : prévient nos clients
+            if self._reminders.pop(reminder['id'], None) is not None:
+                self._publish(reminder)
+            return
+        self._track(reminder, push=True)
+        self._wakeup.notify()
+
+    def _on_journal_delete(self, reminder_id):
+        self._reminders.pop(reminder_id, None)
+
+    def _on_journal_reset(self, reminders):
+        self._reminders = {}
+        self._heap = []
+        for reminder in reminders:
+            if reminder.get('status') == 'pending':
+                self._track(reminder)
+        heapq.heapify(self._heap)
+        self._wakeup.notify()
@@ -0,0 +1,392 @@
+"""
+Résilience des appels à l'API Claude : échéances, nouvelles tentatives,
+requêtes doublées et disjoncteur
+"""
+
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from anthropic import APIConnectionError, APIStatusError
+
+
+class UpstreamUnavailable(Exception):
+    """Levée quand l'API Claude n'a pas pu répondre (erreurs répétées, échéance, disjoncteur)"""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    """Levée sans appel quand le disjoncteur est ouvert"""
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """Levée quand l'échéance de la requête est dépassée"""
+
+
+def is_retryable(error):
+    """
+    Indique si une erreur de l'API justifie une nouvelle tentative
+
+    Args:
+        error (Exception): Erreur levée par le client Anthropic
+
+    Returns:
+        bool: True pour les erreurs réseau, délais dépassés, 408, 409, 429 et 5xx
+    """
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur : coupe les appels après des échecs consécutifs
+
+    Fermé, il laisse passer les appels. Après `failure_threshold` échecs
+    consécutifs, il s'ouvre et refuse tout appel pendant `reset_timeout`
+    secondes ; il laisse alors passer un seul appel d'essai (demi-ouvert),
+    qui le referme s'il réussit ou le rouvre s'il échoue.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Initialisation du disjoncteur
+
+        Args:
+            failure_threshold (int, optional): Échecs consécutifs avant ouverture
+            reset_timeout (float, optional): Durée d'ouverture avant un appel d'essai (secondes)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._opens = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Indique si un appel peut partir
+
+        Returns:
+            bool: False si le disjoncteur est ouvert (ou son appel d'essai en cours)
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            # Nouvel essai aussi si le précédent n'a jamais abouti (requête annulée)
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self._opens += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self):
+        """
+        État du disjoncteur
+
+        Returns:
+            dict: État, échecs consécutifs, nombre d'ouvertures, délai avant essai
+        """
+        with self._lock:
+            stats = {'state': self.state, 'consecutive_failures': self._failures, 'opens': self._opens}
+            if self.state == self.OPEN:
+                stats['retry_in'] = max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+            return stats
+
+
+class ResilientCaller:
+    """
+    Appels à l'API Claude avec échéance, nouvelles tentatives et disjoncteur
+
+    Chaque requête de l'utilisateur a une échéance (`deadline` secondes)
+    partagée par tous ses appels à l'API ; chaque tentative reçoit le temps
+    restant comme délai. Les erreurs passagères (réseau, 429, 5xx) sont
+    retentées après une attente exponentielle à gigue complète, ou celle
+    demandée par l'en-tête Retry-After, tant que l'échéance le permet. Si
+    `hedge_after` est non nul, un appel sans réponse après ce délai est doublé
+    d'un second, identique, et la première réponse l'emporte (latence de
+    queue réduite, au prix de tokens en plus).
+
+    Le même objet sert aux chemins bloquant (call) et asynchrone (call_async).
+    """
+
+    def __init__(self, deadline=30.0, max_retries=2, base_delay=0.5, max_delay=8.0, hedge_after=0.0,
+                 breaker=None, max_workers=32):
+        """
+        Initialisation de la politique d'appel
+
+        Args:
+            deadline (float, optional): Échéance d'une requête (secondes)
+            max_retries (int, optional): Nouvelles tentatives au maximum par appel
+            base_delay (float, optional): Attente de base avant une nouvelle tentative (secondes)
+            max_delay (float, optional): Attente maximale avant une nouvelle tentative (secondes)
+            hedge_after (float, optional): Délai avant de doubler un appel (0 = jamais)
+            breaker (CircuitBreaker, optional): Disjoncteur partagé
+            max_workers (int, optional): Threads des appels doublés (chemin bloquant)
+        """
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self._max_workers = max_workers
+        self._executor = None
+        self._counters = dict.fromkeys((
+            'calls', 'attempts', 'successes', 'failures', 'retries', 'hedges', 'hedge_wins',
+            'deadline_exceeded', 'circuit_rejections', 'degraded_replies'
+        ), 0)
+        self._lock = threading.Lock()
+
+    def new_deadline(self):
+        """
+        Échéance d'une nouvelle requête
+
+        Returns:
+            float: Instant limite (horloge time.monotonic)
+        """
+        return time.monotonic() + self.deadline
+
+    def call(self, function, deadline, hedge=True):
+        """
+        Appel bloquant
+
+        Args:
+            function (callable): function(timeout) -> réponse, timeout en secondes
+            deadline (float): Instant limite (voir new_deadline)
+            hedge (bool, optional): Autorise le doublement de l'appel
+
+        Returns:
+            La réponse de function
+
+        Raises:
+            UpstreamUnavailable: Disjoncteur ouvert, échéance dépassée ou erreurs répétées
+        """
+        self._count('calls')
+        attempt = 0
+        while True:
+            timeout = self._before_attempt(deadline)
+            try:
+                if hedge and self.hedge_after and self.hedge_after < timeout:
+                    result = self._hedged(function, timeout)
+                else:
+                    result = function(timeout)
+            except Exception as error:
+                delay = self._after_failure(error, attempt, deadline)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._after_success()
+            return result
+
+    async def call_async(self, function, deadline, hedge=True):
+        """
+        Appel asynchrone, mêmes règles que call
+
+        Args:
+            function (callable): function(timeout) -> awaitable de la réponse
+            deadline (float): Instant limite (voir new_deadline)
+            hedge (bool, optional): Autorise le doublement de l'appel
+
+        Returns:
+            La réponse de function
+
+        Raises:
+            UpstreamUnavailable: Disjoncteur ouvert, échéance dépassée ou erreurs répétées
+        """
+        self._count('calls')
+        attempt = 0
+        while True:
+            timeout = self._before_attempt(deadline)
+            try:
+                if hedge and self.hedge_after and self.hedge_after < timeout:
+                    result = await self._hedged_async(function, timeout)
+                else:
+                    result = await asyncio.wait_for(function(timeout), timeout)
+            except Exception as error:
+                delay = self._after_failure(error, attempt, deadline)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._after_success()
+            return result
+
+    def check_deadline(self, deadline):
+        """
+        Vérifie l'échéance en cours de flux (entre deux fragments)
+
+        Raises:
+            DeadlineExceeded: Si l'échéance est dépassée
+        """
+        if time.monotonic() >= deadline:
+            self._count('deadline_exceeded')
+            raise DeadlineExceeded("Échéance de la requête dépassée pendant la réponse")
+
+    def record_degraded(self):
+        """Compte une réponse de repli servie à la place de celle de Claude"""
+        self._count('degraded_replies')
+
+    def stats(self):
+        """
+        Compteurs des appels et état du disjoncteur
+
+        Returns:
+            dict: Compteurs cumulés (worker courant), paramètres et disjoncteur
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        stats.update(
+            breaker=self.breaker.stats(),
+            deadline=self.deadline,
+            max_retries=self.max_retries,
+            hedge_after=self.hedge_after
+        )
+        return stats
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _before_attempt(self, deadline):
+        """Vérifie disjoncteur et échéance ; renvoie le temps restant"""
+        if not self.breaker.allow():
+            self._count('circuit_rejections')
+            raise CircuitOpen("API Claude indisponible (disjoncteur ouvert)")
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            self._count('deadline_exceeded')
+            raise DeadlineExceeded("Échéance de la requête dépassée")
+        self._count('attempts')
+        return timeout
+
+    def _after_success(self):
+        self._count('successes')
+        self.breaker.record_success()
+
+    def _after_failure(self, error, attempt, deadline):
+        """
+        Enregistre un échec et renvoie l'attente avant la tentative suivante
+
+        Raises:
+            L'erreur d'origine si elle n'est pas passagère, UpstreamUnavailable
+            si les tentatives ou le temps sont épuisés
+        """
+        self._count('failures')
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            self.breaker.record_failure()
+            self._count('deadline_exceeded')
+            raise DeadlineExceeded("Échéance de la requête dépassée") from error
+        if not is_retryable(error):
+            # L'API a répondu : le service est joignable, l'erreur vient de la requête
+            self.breaker.record_success()
+            raise error
+        self.breaker.record_failure()
+
+        if attempt >= self.max_retries:
+            raise UpstreamUnavailable(f"API Claude indisponible après {attempt + 1} tentatives: {error}") from error
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if time.monotonic() + delay >= deadline:
+            self._count('deadline_exceeded')
+            raise DeadlineExceeded(f"Échéance atteinte avant une nouvelle tentative: {error}") from error
+
+        self._count('retries')
+        return delay
+
+    @staticmethod
+    def _retry_after(error):
+        """Attente demandée par l'en-tête Retry-After (secondes), None si absente"""
+        response = getattr(error, 'response', None)
+        value = response.headers.get('retry-after') if response is not None else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def _hedged(self, function, timeout):
+        """Appel doublé après hedge_after secondes sans réponse (threads)"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                        thread_name_prefix='jarvis-hedge')
+        started = time.monotonic()
+        primary = self._executor.submit(function, timeout)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        self._count('hedges')
+        hedge = self._executor.submit(function, timeout - (time.monotonic() - started))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            remaining = timeout - (time.monotonic() - started)
+            done, pending = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError()
+            for future in done:
+                if future.exception() is None:
+                    # L'appel perdant se termine en arrière-plan, sa réponse est ignorée
+                    if future is hedge:
+                        self._count('hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _hedged_async(self, function, timeout):
+        """Appel doublé après hedge_after secondes sans réponse (asyncio)"""
+        started = time.monotonic()
+        primary = asyncio.ensure_future(function(timeout))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        self._count('hedges')
+        hedge = asyncio.ensure_future(function(timeout - (time.monotonic() - started)))
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                remaining = timeout - (time.monotonic() - started)
+                done, pending = await asyncio.wait(pending, timeout=max(remaining, 0),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count('hedge_wins')
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # L'appel perdant est annulé (connexion libérée)
+            for task in pending:
+                task.cancel()
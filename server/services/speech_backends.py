@@ -0,0 +1,180 @@
+"""
+Moteurs de reconnaissance vocale (distant ou local) et mesure de leurs temps
+"""
+
+import os
+import json
+import threading
+from collections import deque
+
+import speech_recognition as sr
+
+# Fréquence d'échantillonnage attendue par les modèles Vosk
+VOSK_SAMPLE_RATE = 16000
+
+
+class SpeechBackend:
+    """
+    Interface d'un moteur de reconnaissance vocale
+
+    Le moteur est chargé une fois (load), au démarrage du worker, puis
+    partagé par toutes les requêtes : recognize doit pouvoir être appelé
+    depuis plusieurs threads à la fois.
+    """
+
+    name = None
+
+    def load(self):
+        """Charge le modèle du moteur (rien à faire pour un moteur distant)"""
+
+    def recognize(self, audio_data):
+        """
+        Transcrit un enregistrement
+
+        Args:
+            audio_data (sr.AudioData): Enregistrement décodé
+
+        Returns:
+            str: Texte reconnu
+
+        Raises:
+            sr.UnknownValueError: Si rien n'a été compris
+            sr.RequestError: Si le moteur est indisponible
+        """
+        raise NotImplementedError
+
+
+class GoogleBackend(SpeechBackend):
+    """Reconnaissance par l'API Google (connexion internet nécessaire)"""
+
+    name = 'google'
+
+    def __init__(self, recognizer, language='fr-FR'):
+        self.recognizer = recognizer
+        self.language = language
+
+    def recognize(self, audio_data):
+        return self.recognizer.recognize_google(audio_data, language=self.language)
+
+
+class VoskBackend(SpeechBackend):
+    """
+    Reconnaissance locale par Vosk (Kaldi), sur le processeur, hors ligne
+
+    Le modèle (ex. vosk-model-small-fr-0.22, à télécharger sur
+    https://alphacephei.com/vosk/models) est chargé une fois et partagé ;
+    chaque enregistrement a son propre KaldiRecognizer, peu coûteux à créer.
+    """
+
+    name = 'vosk'
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.model = None
+        self._vosk = None
+
+    def load(self):
+        try:
+            import vosk
+        except ImportError:
+            raise RuntimeError("Le moteur vosk nécessite le paquet vosk (pip install vosk)")
+        if not os.path.isdir(self.model_path):
+            raise RuntimeError(f"Modèle Vosk introuvable : {self.model_path}")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(self.model_path)
+
+    def recognize(self, audio_data):
+        if self.model is None:
+            raise sr.RequestError("Modèle Vosk non chargé")
+        recognizer = self._vosk.KaldiRecognizer(self.model, VOSK_SAMPLE_RATE)
+        recognizer.AcceptWaveform(audio_data.get_raw_data(convert_rate=VOSK_SAMPLE_RATE, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get('text', '')
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def create_backend(engine, recognizer, language='fr-FR', vosk_model_path='models/vosk-model-small-fr-0.22'):
+    """
+    Crée et charge le moteur de reconnaissance configuré
+
+    Args:
+        engine (str): google ou vosk
+        recognizer (sr.Recognizer): Reconnaisseur (moteur google)
+        language (str, optional): Langue du moteur google
+        vosk_model_path (str, optional): Répertoire du modèle Vosk
+
+    Returns:
+        SpeechBackend: Moteur chargé, prêt à servir
+
+    Raises:
+        ValueError: Si le moteur est inconnu
+    """
+    if engine == 'google':
+        backend = GoogleBackend(recognizer, language)
+    elif engine == 'vosk':
+        backend = VoskBackend(vosk_model_path)
+    else:
+        raise ValueError(f"Moteur de reconnaissance inconnu : {engine} (google ou vosk)")
+    backend.load()
+    return backend
+
+
+class RecognitionStats:
+    """
+    Temps de reconnaissance par enregistrement, pour comparer les moteurs
+
+    Le facteur temps réel (temps de reconnaissance / durée de l'audio)
+    mesure le débit : en dessous de 1, le moteur transcrit plus vite que
+    l'on ne parle.
+    """
+
+    def __init__(self, engine, window=500):
+        """
+        Args:
+            engine (str): Nom du moteur mesuré
+            window (int, optional): Mesures récentes gardées pour les percentiles
+        """
+        self.engine = engine
+        self._durations = deque(maxlen=window)
+        self._counters = {'utterances': 0, 'failures': 0, 'audio_seconds': 0.0, 'recognition_seconds': 0.0}
+        self._lock = threading.Lock()
+
+    def record(self, duration, audio_seconds, failed=False):
+        """
+        Enregistre la reconnaissance d'un enregistrement
+
+        Args:
+            duration (float): Temps de reconnaissance (secondes)
+            audio_seconds (float): Durée de l'enregistrement (secondes)
+            failed (bool, optional): Rien compris ou moteur indisponible
+        """
+        with self._lock:
+            self._durations.append(duration)
+            self._counters['utterances'] += 1
+            self._counters['failures'] += int(failed)
+            self._counters['audio_seconds'] += audio_seconds
+            self._counters['recognition_seconds'] += duration
+
+    def stats(self):
+        """
+        Compteurs cumulés (worker courant) et latences récentes
+
+        Returns:
+            dict: Moteur, compteurs, facteur temps réel, p50/p95 en millisecondes
+        """
+        with self._lock:
+            stats = dict(self._counters, engine=self.engine)
+            durations = sorted(self._durations)
+        stats['real_time_factor'] = (stats['recognition_seconds'] / stats['audio_seconds']
+                                     if stats['audio_seconds'] else None)
+        for name, ratio in (('p50_ms', 0.50), ('p95_ms', 0.95)):
+            stats[name] = (durations[min(int(len(durations) * ratio), len(durations) - 1)] * 1000
+                           if durations else None)
+        return stats
+
+
+def audio_duration(audio_data):
+    """Durée d'un enregistrement décodé (secondes)"""
+    return len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
@@ -4,41 +4,84 @@ Service de gestion des tâches pour l'assistant JARVIS
 
 import os
 import json
+import base64
+import bisect
 import datetime
 from pathlib import Path
 import uuid
 
+from server.models.task_repository import JournalTaskRepository
+from server.utils.dates import day_start
+from server.utils.journal import exclusive_file_lock
+
+# Ordre de tri des priorités (de la plus urgente à la moins urgente)
+PRIORITY_RANK = {'high': 0, 'medium': 1, 'low': 2}
+
+# Clés de tri acceptées par query_tasks : (valeur absente, valeur)
+SORT_KEYS = {
+    'created_at': lambda task: (task.get('created_at') is None, task.get('created_at') or ''),
+    'due_date': lambda task: (not task.get('due_date'), task.get('due_date') or ''),
+    'priority': lambda task: (task.get('priority') not in PRIORITY_RANK, PRIORITY_RANK.get(task.get('priority'), 0)),
+    'title': lambda task: (False, (task.get('title') or '').lower()),
+}
+
 class TaskService:
     """Service pour gérer les tâches de l'utilisateur"""
     
-    def __init__(self):
-        """Initialisation du service de tâches"""
+    def __init__(self, repository=None):
+        """
+        Initialisation du service de tâches
+        
+        Args:
+            repository (optional): Dépôt de tâches (par défaut selon JARVIS_TASKS_BACKEND)
+        """
         self.data_dir = Path('data')
         self.data_dir.mkdir(exist_ok=True)
         
-        self.tasks_file = self.data_dir / 'tasks.json'
-        self.tasks = self._load_tasks()
+        self.repository = repository or self._create_repository()
     
-    def _load_tasks(self):
+    def _create_repository(self):
         """
-        Charge les tâches depuis le fichier JSON
+        Crée le dépôt configuré par JARVIS_TASKS_BACKEND
+        
+        - json (défaut) : index en mémoire + journal dans data/
+        - sql : base SQLAlchemy désignée par DATABASE_URL (SQLite en WAL par défaut)
         
         Returns:
-            list: Liste des tâches
+            Le dépôt de tâches
         """
-        if not self.tasks_file.exists():
-            return []
+        backend = os.environ.get('JARVIS_TASKS_BACKEND', 'json')
         
-        try:
-            with open(self.tasks_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+        if backend == 'sql':
+            # Import local : SQLAlchemy n'est requis que pour ce backend
+            from server.models.sql_task_repository import SqlTaskRepository, migrate_json_tasks
+            
+            # Un seul worker à la fois crée le schéma et migre tasks.json
+            with exclusive_file_lock(self.data_dir / 'tasks.db.lock'):
+                repository = SqlTaskRepository(
+                    os.environ.get('DATABASE_URL', f"sqlite:///{self.data_dir / 'jarvis.db'}"),
+                    pool_size=int(os.environ.get('JARVIS_DB_POOL_SIZE', 5)),
+                    max_overflow=int(os.environ.get('JARVIS_DB_MAX_OVERFLOW', 10))
+                )
+                imported = migrate_json_tasks(self.data_dir, repository)
+            if imported:
+                print(f"{imported} tâche(s) migrée(s) depuis tasks.json vers la base SQL")
+            return repository
+        
+        if backend != 'json':
+            raise ValueError(f"Backend de tâches inconnu: {backend} (attendu: json, sql)")
+        
+        return JournalTaskRepository(
+            self.data_dir,
+            fsync=os.environ.get('JARVIS_TASKS_FSYNC', 'batch'),
+            fsync_interval=float(os.environ.get('JARVIS_TASKS_FSYNC_INTERVAL', 1.0)),
+            compact_every=int(os.environ.get('JARVIS_TASKS_COMPACT_EVERY', 1000))
+        )
     
-    def _save_tasks(self):
-        """Sauvegarde les tâches dans le fichier JSON"""
-        with open(self.tasks_file, 'w', encoding='utf-8') as f:
-            json.dump(self.tasks, f, ensure_ascii=False, indent=2)
+    @property
+    def tasks(self):
+        """Liste des tâches (compatibilité avec l'ancien stockage en liste)"""
+        return self.repository.all()
     
     def get_all_tasks(self):
         """
@@ -47,7 +90,7 @@ class TaskService:
         Returns:
             list: Liste de toutes les tâches
         """
-        return self.tasks
+        return self.repository.all()
     
     def get_task(self, task_id):
         """
@@ -59,10 +102,7 @@ class TaskService:
         Returns:
             dict: La tâche trouvée ou None si introuvable
         """
-        for task in self.tasks:
-            if task['id'] == task_id:
-                return task
-        return None
+        return self.repository.get(task_id)
     
     def create_task(self, title, description="", due_date=None, priority="medium"):
         """
@@ -77,18 +117,9 @@ class TaskService:
         Returns:
             dict: La tâche créée
         """
-        task = {
-            'id': str(uuid.uuid4()),
-            'title': title,
-            'description': description,
-            'created_at': datetime.datetime.now().isoformat(),
-            'due_date': due_date,
-            'priority': priority,
-            'completed': False
-        }
+        task = self._new_task(title, description, due_date, priority)
         
-        self.tasks.append(task)
-        self._save_tasks()
+        self.repository.add(task)
         
         return task
     
@@ -108,35 +139,50 @@ class TaskService:
         Returns:
             dict: La tâche mise à jour ou None si introuvable
         """
-        task = self.get_task(task_id)
-        
-        if not task:
-            return None
-        
-        if title is not None:
-            task['title'] = title
-        
-        if description is not None:
-            task['description'] = description
-        
-        if due_date is not None:
-            task['due_date'] = due_date
-        
-        if priority is not None:
-            task['priority'] = priority
+        apply_changes = self._task_changes(title, description, due_date, priority, completed)
         
-        if completed is not None:
-            task['completed'] = completed
-            if completed:
-                task['completed_at'] = datetime.datetime.now().isoformat()
-            else:
-                task.pop('completed_at', None)
-        
-        task['updated_at'] = datetime.datetime.now().isoformat()
-        
-        self._save_tasks()
+        # Lecture-modification-écriture atomique, y compris entre workers
+        return self.repository.update(task_id, apply_changes)
+    
+    @staticmethod
+    def _new_task(title, description="", due_date=None, priority="medium"):
+        """Construit une nouvelle tâche (sans l'enregistrer)"""
+        return {
+            'id': str(uuid.uuid4()),
+            'title': title,
+            'description': description,
+            'created_at': datetime.datetime.now().isoformat(),
+            'due_date': due_date,
+            'priority': priority,
+            'completed': False
+        }
+    
+    @staticmethod
+    def _task_changes(title=None, description=None, due_date=None, priority=None, completed=None):
+        """Construit la fonction qui applique une mise à jour à une copie de tâche"""
+        def apply_changes(task):
+            if title is not None:
+                task['title'] = title
+            
+            if description is not None:
+                task['description'] = description
+            
+            if due_date is not None:
+                task['due_date'] = due_date
+            
+            if priority is not None:
+                task['priority'] = priority
+            
+            if completed is not None:
+                task['completed'] = completed
+                if completed:
+                    task['completed_at'] = datetime.datetime.now().isoformat()
+                else:
+                    task.pop('completed_at', None)
+            
+            task['updated_at'] = datetime.datetime.now().isoformat()
         
-        return task
+        return apply_changes
     
     def delete_task(self, task_id):
         """
@@ -148,15 +194,85 @@ class TaskService:
         Returns:
             bool: True si supprimée, False sinon
         """
-        initial_count = len(self.tasks)
+        return self.repository.remove(task_id)
+    
+    def apply_batch(self, operations):
+        """
+        Applique un lot de créations, modifications et suppressions
         
-        self.tasks = [task for task in self.tasks if task['id'] != task_id]
+        Le lot est atomique : soit toutes les opérations sont appliquées et
+        persistées en une seule écriture (un ajout au journal ou une
+        transaction SQL), soit aucune ne l'est.
         
-        if len(self.tasks) < initial_count:
-            self._save_tasks()
-            return True
+        Args:
+            operations (list): Opérations {'op': 'create'|'update'|'delete', ...}
+                avec les mêmes champs que create_task / update_task ('id'
+                pour update et delete)
+            
+        Returns:
+            dict: {'applied': bool, 'results': [...]} avec un résultat par opération
+        """
+        planned = []
+        results = []
+        
+        for index, operation in enumerate(operations):
+            kind = operation.get('op') if isinstance(operation, dict) else None
+            result = {'index': index, 'op': kind}
+            results.append(result)
+            
+            if kind == 'create':
+                if not operation.get('title'):
+                    result.update(status='error', message="Task title is required")
+                    continue
+                planned.append(('add', self._new_task(
+                    operation['title'],
+                    operation.get('description', ''),
+                    operation.get('due_date'),
+                    operation.get('priority', 'medium')
+                )))
+            elif kind in ('update', 'delete'):
+                if not operation.get('id'):
+                    result.update(status='error', message="Task ID is required")
+                    continue
+                if kind == 'update':
+                    planned.append(('update', operation['id'], self._task_changes(
+                        operation.get('title'),
+                        operation.get('description'),
+                        operation.get('due_date'),
+                        operation.get('priority'),
+                        operation.get('completed')
+                    )))
+                else:
+                    planned.append(('remove', operation['id']))
+            else:
+                result.update(status='error', message=f"Unknown operation: {kind}")
+        
+        if any('status' in result for result in results):
+            self._mark_skipped(results)
+            return {'applied': False, 'results': results}
+        
+        applied, outcomes = self.repository.apply(planned)
+        
+        for result, outcome in zip(results, outcomes):
+            if outcome is None:
+                result.update(status='error', message="Task not found")
+            elif isinstance(outcome, dict):
+                result.update(status='success', task=outcome)
+            else:
+                result.update(status='success')
         
-        return False
+        if not applied:
+            self._mark_skipped(results)
+        
+        return {'applied': applied, 'results': results}
+    
+    @staticmethod
+    def _mark_skipped(results):
+        """Les opérations valides d'un lot rejeté ne sont pas appliquées"""
+        for result in results:
+            if result.get('status') != 'error':
+                result.pop('task', None)
+                result.update(status='skipped')
     
     def get_tasks_by_status(self, completed=False):
         """
@@ -168,7 +284,7 @@ class TaskService:
         Returns:
             list: Liste des tâches correspondantes
         """
-        return [task for task in self.tasks if task['completed'] == completed]
+        return self.repository.by_completed(completed)
     
     def get_tasks_by_priority(self, priority):
         """
@@ -180,34 +296,231 @@ class TaskService:
         Returns:
             list: Liste des tâches correspondantes
         """
-        return [task for task in self.tasks if task['priority'] == priority]
+        return self.repository.by_priority(priority)
     
     def get_tasks_by_due_date(self, date):
         """
         Récupère les tâches ayant une date d'échéance spécifique
         
         Args:
-            date (str): Date au format ISO YYYY-MM-DD
+            date (str): Date au format ISO YYYY-MM-DD (ou un préfixe, ex. YYYY-MM)
             
         Returns:
             list: Liste des tâches correspondantes
         """
-        return [task for task in self.tasks if task.get('due_date', '').startswith(date)]
+        return self.repository.by_due_date(date)
     
-    def get_overdue_tasks(self):
+    def get_overdue_tasks(self, limit=None):
         """
         Récupère les tâches en retard (non complétées avec date d'échéance passée)
         
+        Args:
+            limit (int, optional): Nombre maximal de tâches (None = toutes)
+            
+        Returns:
+            list: Liste des tâches en retard, par échéance croissante
+        """
+        return self.repository.overdue(datetime.date.today(), limit=limit)
+    
+    def count_overdue_tasks(self):
+        """
+        Compte les tâches en retard, sans les lire
+        
+        Returns:
+            int: Nombre de tâches en retard
+        """
+        return self.repository.count_due_between(end=day_start(datetime.date.today()), open_only=True)
+    
+    def get_tasks_due_today(self):
+        """
+        Récupère les tâches non complétées dont l'échéance tombe aujourd'hui
+        
+        Returns:
+            list: Liste des tâches, par échéance croissante
+        """
+        start = day_start(datetime.date.today())
+        return self.repository.due_between(start, start + datetime.timedelta(days=1), open_only=True)
+    
+    def get_tasks_due_between(self, start, end, include_completed=False, limit=None):
+        """
+        Récupère les tâches dont l'échéance est comprise dans un intervalle
+        
+        Args:
+            start (str): Premier jour inclus (YYYY-MM-DD)
+            end (str): Dernier jour inclus (YYYY-MM-DD)
+            include_completed (bool, optional): Inclure les tâches complétées
+            limit (int, optional): Nombre maximal de tâches (None = toutes)
+            
+        Returns:
+            list: Liste des tâches, par échéance croissante
+        """
+        return self.repository.due_between(*self._day_bounds(start, end), open_only=not include_completed,
+                                           limit=limit)
+    
+    def count_tasks_due_between(self, start, end, include_completed=False):
+        """
+        Compte les tâches dont l'échéance est comprise dans un intervalle, sans les lire
+        
+        Args:
+            start (str): Premier jour inclus (YYYY-MM-DD)
+            end (str): Dernier jour inclus (YYYY-MM-DD)
+            include_completed (bool, optional): Inclure les tâches complétées
+            
         Returns:
-            list: Liste des tâches en retard
+            int: Nombre de tâches correspondantes
+        """
+        return self.repository.count_due_between(*self._day_bounds(start, end), open_only=not include_completed)
+    
+    def get_next_due_tasks(self, limit=5):
         """
-        today = datetime.datetime.now().date()
+        Récupère les prochaines tâches non complétées à échéance
         
-        overdue_tasks = []
-        for task in self.tasks:
-            if not task['completed'] and task.get('due_date'):
-                due_date = datetime.datetime.fromisoformat(task['due_date']).date()
-                if due_date < today:
-                    overdue_tasks.append(task)
+        Les tâches du jour sont incluses : tout ce qui n'est pas en retard
+        (voir get_overdue_tasks) est à venir.
         
-        return overdue_tasks
+        Args:
+            limit (int, optional): Nombre maximal de tâches
+            
+        Returns:
+            list: Liste des tâches, par échéance croissante
+        """
+        return self.repository.next_due(day_start(datetime.date.today()), limit)
+    
+    def search(self, query, limit=20, completed=None, priority=None):
+        """
+        Recherche des tâches par mots-clés dans le titre et la description
+        
+        La requête est normalisée comme les tâches (accents, racines,
+        mots vides) : "quelles tâches parlent du dentiste" trouve
+        "Rendez-vous chez le dentiste".
+        
+        Args:
+            query (str): Requête libre
+            limit (int, optional): Nombre maximal de tâches renvoyées
+            completed (bool, optional): Statut de complétion
+            priority (str, optional): Priorité (low, medium, high)
+            
+        Returns:
+            list: Liste des tâches, de la plus pertinente à la moins pertinente
+        """
+        if completed is None and priority is None:
+            return self.repository.search(query, limit)
+        
+        # Les filtres s'appliquent après le classement : on élargit la recherche
+        tasks = self.repository.search(query, max(limit * 10, 200))
+        if completed is not None:
+            tasks = [task for task in tasks if task['completed'] == completed]
+        if priority is not None:
+            tasks = [task for task in tasks if task['priority'] == priority]
+        return tasks[:limit]
+    
+    def get_version(self):
+        """
+        Récupère la version courante des tâches
+        
+        La version change à chaque création, modification ou suppression,
+        quel que soit le worker qui l'a faite.
+        
+        Returns:
+            int: Numéro de version
+        """
+        return self.repository.version()
+    
+    def query_tasks(self, completed=None, priority=None, due_from=None, due_to=None,
+                    sort='created_at', descending=False, limit=None, cursor=None):
+        """
+        Filtre, trie et pagine les tâches
+        
+        L'ensemble de départ vient de l'aide get_tasks_by_* la plus sélective,
+        les autres filtres s'appliquent ensuite. La pagination se fait par
+        curseur (clé de tri + ID de la dernière tâche renvoyée), ce qui reste
+        stable quand des tâches sont ajoutées entre deux pages.
+        
+        Args:
+            completed (bool, optional): Statut de complétion
+            priority (str, optional): Priorité (low, medium, high)
+            due_from (str, optional): Échéance minimale incluse (YYYY-MM-DD)
+            due_to (str, optional): Échéance maximale incluse (YYYY-MM-DD)
+            sort (str, optional): Clé de tri (created_at, due_date, priority, title)
+            descending (bool, optional): Tri décroissant
+            limit (int, optional): Nombre maximal de tâches renvoyées
+            cursor (str, optional): Curseur renvoyé par la page précédente
+            
+        Returns:
+            tuple: (liste des tâches, curseur de la page suivante ou None)
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Clé de tri inconnue: {sort}")
+        
+        if due_from is not None or due_to is not None:
+            # Intervalle d'échéance : recherche dichotomique dans l'index trié
+            tasks = self.repository.due_between(
+                day_start(datetime.date.fromisoformat(due_from)) if due_from else None,
+                day_start(datetime.date.fromisoformat(due_to) + datetime.timedelta(days=1)) if due_to else None
+            )
+            if completed is not None:
+                tasks = [task for task in tasks if task['completed'] == completed]
+        elif completed is not None:
+            tasks = self.get_tasks_by_status(completed)
+        elif priority is not None:
+            tasks = self.get_tasks_by_priority(priority)
+        else:
+            tasks = self.get_all_tasks()
+        
+        if priority is not None and (completed is not None or due_from or due_to):
+            tasks = [task for task in tasks if task['priority'] == priority]
+        
+        sort_key = SORT_KEYS[sort]
+        keyed = []
+        for task in tasks:
+            missing, value = sort_key(task)
+            # Les tâches sans valeur passent en dernier, dans les deux sens de tri
+            missing = (not missing) if descending else missing
+            keyed.append((((missing, value), task['id']), task))
+        keyed.sort()
+        keys = [key for key, _ in keyed]
+        
+        start = 0
+        if cursor:
+            position = self._decode_cursor(cursor, sort)
+            if descending:
+                # Ordre décroissant : on reprend après les clés supérieures ou égales au curseur
+                start = len(keys) - bisect.bisect_left(keys, position)
+            else:
+                start = bisect.bisect_right(keys, position)
+        
+        if descending:
+            keyed.reverse()
+            keys.reverse()
+        
+        end = len(keyed) if limit is None else min(start + limit, len(keyed))
+        page = [task for _, task in keyed[start:end]]
+        next_cursor = self._encode_cursor(keys[end - 1]) if end < len(keyed) and page else None
+        
+        return page, next_cursor
+    
+    @staticmethod
+    def _day_bounds(start, end):
+        """Jours ISO inclus -> [début du premier jour, début du lendemain du dernier)"""
+        return (day_start(datetime.date.fromisoformat(start)),
+                day_start(datetime.date.fromisoformat(end) + datetime.timedelta(days=1)))
+    
+    @staticmethod
+    def _encode_cursor(position):
+        (missing, value), task_id = position
+        payload = json.dumps([missing, value, task_id], ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii')
+    
+    @staticmethod
+    def _decode_cursor(cursor, sort):
+        try:
+            missing, value, task_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (ValueError, TypeError):
+            raise ValueError("Curseur de pagination invalide")
+        # Valeur du type de la clé de tri (curseur d'un autre tri ou forgé) : sinon
+        # la comparaison avec les clés lève TypeError
+        value_type = type(SORT_KEYS[sort]({})[1])
+        if (not isinstance(missing, bool) or not isinstance(task_id, str)
+                or not isinstance(value, value_type) or isinstance(value, bool)):
+            raise ValueError("Curseur de pagination invalide")
+        return (missing, value), task_id
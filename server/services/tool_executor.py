@@ -0,0 +1,364 @@
+"""
+Outils (tool use) de Claude pour les tâches, rappels et événements
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+_PRIORITY = {"type": "string", "enum": ["low", "medium", "high"]}
+_DATE = {"type": "string", "description": "Date ISO 8601 (YYYY-MM-DD)"}
+_DATETIME = {"type": "string", "description": "Date et heure ISO 8601 (YYYY-MM-DDTHH:MM:SS)"}
+
+# Définitions envoyées à l'API : nom, description et schéma JSON des paramètres
+TOOLS = [
+    {
+        "name": "create_task",
+        "description": "Crée une tâche dans la liste de l'utilisateur.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string", "description": "Titre court de la tâche"},
+                "description": {"type": "string"},
+                "due_date": {"type": "string", "description": "Échéance ISO 8601 (YYYY-MM-DD ou YYYY-MM-DDTHH:MM:SS)"},
+                "priority": _PRIORITY
+            },
+            "required": ["title"]
+        }
+    },
+    {
+        "name": "update_task",
+        "description": "Modifie une tâche existante (seuls les champs fournis changent). "
+                       "Pour marquer une tâche comme faite, passer completed=true.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string"},
+                "title": {"type": "string"},
+                "description": {"type": "string"},
+                "due_date": {"type": "string"},
+                "priority": _PRIORITY,
+                "completed": {"type": "boolean"}
+            },
+            "required": ["task_id"]
+        }
+    },
+    {
+        "name": "delete_task",
+        "description": "Supprime définitivement une tâche.",
+        "input_schema": {
+            "type": "object",
+            "properties": {"task_id": {"type": "string"}},
+            "required": ["task_id"]
+        }
+    },
+    {
+        "name": "list_tasks",
+        "description": "Liste les tâches, filtrées par statut, priorité ou intervalle d'échéance.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "enum": ["pending", "completed", "all"]},
+                "priority": _PRIORITY,
+                "due_from": _DATE,
+                "due_to": _DATE,
+                "limit": {"type": "integer", "minimum": 1, "maximum": 100}
+            }
+        }
+    },
+    {
+        "name": "search_tasks",
+        "description": "Recherche des tâches par mots-clés dans leur titre et leur description.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "limit": {"type": "integer", "minimum": 1, "maximum": 100}
+            },
+            "required": ["query"]
+        }
+    },
+    {
+        "name": "create_reminder",
+        "description": "Programme un rappel envoyé à l'utilisateur à la date et l'heure indiquées.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "message": {"type": "string"},
+                "remind_at": _DATETIME,
+                "task_id": {"type": "string", "description": "Tâche associée (facultatif)"}
+            },
+            "required": ["message", "remind_at"]
+        }
+    },
+    {
+        "name": "list_reminders",
+        "description": "Liste les rappels en attente, du plus proche au plus lointain.",
+        "input_schema": {
+            "type": "object",
+            "properties": {"limit": {"type": "integer", "minimum": 1, "maximum": 100}}
+        }
+    },
+    {
+        "name": "cancel_reminder",
+        "description": "Annule un rappel en attente.",
+        "input_schema": {
+            "type": "object",
+            "properties": {"reminder_id": {"type": "string"}},
+            "required": ["reminder_id"]
+        }
+    },
+    {
+        "name": "list_events",
+        "description": "Liste les événements du calendrier entre deux dates (7 jours par défaut).",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "start_date": _DATE,
+                "end_date": _DATE,
+                "max_results": {"type": "integer", "minimum": 1, "maximum": 50}
+            }
+        }
+    },
+    {
+        "name": "create_event",
+        "description": "Crée un événement dans le calendrier (une heure par défaut).",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "summary": {"type": "string"},
+                "start": _DATETIME,
+                "end": _DATETIME,
+                "description": {"type": "string"},
+                "location": {"type": "string"}
+            },
+            "required": ["summary", "start"]
+        }
+    },
+    {
+        "name": "update_event",
+        "description": "Modifie un événement existant (seuls les champs fournis changent).",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "event_id": {"type": "string"},
+                "summary": {"type": "string"},
+                "start": _DATETIME,
+                "end": _DATETIME,
+                "description": {"type": "string"},
+                "location": {"type": "string"}
+            },
+            "required": ["event_id"]
+        }
+    },
+    {
+        "name": "delete_event",
+        "description": "Supprime un événement du calendrier.",
+        "input_schema": {
+            "type": "object",
+            "properties": {"event_id": {"type": "string"}},
+            "required": ["event_id"]
+        }
+    }
+]
+
+# Outil -> (type d'action, opération, lecture seule)
+TOOL_ACTIONS = {
+    'create_task': ('task', 'create', False),
+    'update_task': ('task', 'update', False),
+    'delete_task': ('task', 'delete', False),
+    'list_tasks': ('task', 'list', True),
+    'search_tasks': ('task', 'search', True),
+    'create_reminder': ('reminder', 'create', False),
+    'list_reminders': ('reminder', 'list', True),
+    'cancel_reminder': ('reminder', 'delete', False),
+    'list_events': ('calendar_event', 'list', True),
+    'create_event': ('calendar_event', 'create', False),
+    'update_event': ('calendar_event', 'update', False),
+    'delete_event': ('calendar_event', 'delete', False),
+}
+
+# Paramètres désignant l'objet visé : deux appels sur le même objet s'exécutent dans l'ordre
+TARGET_KEYS = ('task_id', 'reminder_id', 'event_id')
+
+
+class ToolError(Exception):
+    """Erreur d'exécution d'un outil, renvoyée à Claude comme résultat en erreur"""
+
+
+class ToolExecutor:
+    """
+    Exécute les appels d'outils de Claude sur les services de l'assistant
+
+    Les appels d'une même réponse sont indépendants (Claude les émet en
+    parallèle) : ils s'exécutent simultanément sur un pool de threads, sauf
+    ceux qui visent le même objet (même task_id, reminder_id ou event_id),
+    qui s'enchaînent dans l'ordre où Claude les a émis.
+    """
+
+    def __init__(self, task_service, calendar_service=None, reminder_service=None, max_workers=4):
+        """
+        Initialisation de l'exécuteur
+
+        Args:
+            task_service (TaskService): Service des tâches
+            calendar_service (CalendarService, optional): Service du calendrier
+            reminder_service (ReminderService, optional): Service des rappels
+            max_workers (int, optional): Nombre d'appels exécutés simultanément
+        """
+        self.task_service = task_service
+        self.calendar_service = calendar_service
+        self.reminder_service = reminder_service
+        self.tools = [tool for tool in TOOLS if self._available(tool['name'])]
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jarvis-tool')
+
+    def _available(self, name):
+        kind = TOOL_ACTIONS[name][0]
+        if kind == 'reminder':
+            return self.reminder_service is not None
+        if kind == 'calendar_event':
+            return self.calendar_service is not None
+        return True
+
+    def execute(self, calls):
+        """
+        Exécute un lot d'appels d'outils
+
+        Args:
+            calls (list): Blocs tool_use de la réponse (attributs id, name, input)
+
+        Returns:
+            list: Une action par appel, dans l'ordre des appels :
+                {'tool_use_id', 'tool', 'type', 'operation', 'read_only',
+                'input', 'status', 'result' | 'message'}
+        """
+        groups = {}
+        for position, call in enumerate(calls):
+            target = next((call.input.get(key) for key in TARGET_KEYS if call.input.get(key)), None)
+            groups.setdefault(target or ('call', position), []).append(position)
+
+        actions = [None] * len(calls)
+
+        def run_group(positions):
+            for position in positions:
+                actions[position] = self._run(calls[position])
+
+        if len(groups) == 1:
+            run_group(next(iter(groups.values())))
+        else:
+            for future in [self._pool.submit(run_group, positions) for positions in groups.values()]:
+                future.result()
+
+        return actions
+
+    @staticmethod
+    def tool_result(action):
+        """
+        Bloc tool_result à renvoyer à Claude pour une action exécutée
+
+        Args:
+            action (dict): Action renvoyée par execute
+
+        Returns:
+            dict: Bloc de contenu tool_result
+        """
+        if action['status'] == 'error':
+            return {
+                "type": "tool_result",
+                "tool_use_id": action['tool_use_id'],
+                "content": action['message'],
+                "is_error": True
+            }
+        return {
+            "type": "tool_result",
+            "tool_use_id": action['tool_use_id'],
+            "content": json.dumps(action['result'], ensure_ascii=False, default=str)
+        }
+
+    def _run(self, call):
+        """Exécute un appel et le décrit, sans jamais lever d'exception"""
+        kind, operation, read_only = TOOL_ACTIONS.get(call.name, (None, None, False))
+        action = {
+            'tool_use_id': call.id,
+            'tool': call.name,
+            'type': kind,
+            'operation': operation,
+            'read_only': read_only,
+            'input': call.input
+        }
+
+        handler = getattr(self, f'_{call.name}', None)
+        if kind is None or handler is None or not self._available(call.name):
+            return dict(action, status='error', message=f"Outil inconnu: {call.name}")
+
+        try:
+            return dict(action, status='success', result=handler(**call.input))
+        except (ToolError, ValueError, TypeError) as e:
+            return dict(action, status='error', message=str(e))
+        except Exception as e:
+            print(f"Erreur lors de l'exécution de l'outil {call.name}: {e}")
+            return dict(action, status='error', message=f"Erreur interne: {e}")
+
+    # Tâches
+
+    def _create_task(self, title, description='', due_date=None, priority='medium'):
+        return self.task_service.create_task(title, description, due_date, priority)
+
+    def _update_task(self, task_id, title=None, description=None, due_date=None, priority=None, completed=None):
+        task = self.task_service.update_task(task_id, title, description, due_date, priority, completed)
+        if task is None:
+            raise ToolError(f"Tâche introuvable: {task_id}")
+        return task
+
+    def _delete_task(self, task_id):
+        if not self.task_service.delete_task(task_id):
+            raise ToolError(f"Tâche introuvable: {task_id}")
+        return {'deleted': task_id}
+
+    def _list_tasks(self, status='all', priority=None, due_from=None, due_to=None, limit=20):
+        tasks, _ = self.task_service.query_tasks(
+            completed=None if status == 'all' else status == 'completed',
+            priority=priority,
+            due_from=due_from,
+            due_to=due_to,
+            sort='due_date',
+            limit=limit
+        )
+        return tasks
+
+    def _search_tasks(self, query, limit=10):
+        return self.task_service.search(query, limit)
+
+    # Rappels
+
+    def _create_reminder(self, message, remind_at, task_id=None):
+        return self.reminder_service.create_reminder(message, remind_at, task_id)
+
+    def _list_reminders(self, limit=20):
+        return self.reminder_service.get_pending_reminders(limit)
+
+    def _cancel_reminder(self, reminder_id):
+        if not self.reminder_service.cancel_reminder(reminder_id):
+            raise ToolError(f"Rappel introuvable ou déjà déclenché: {reminder_id}")
+        return {'cancelled': reminder_id}
+
+    # Calendrier
+
+    def _list_events(self, start_date=None, end_date=None, max_results=10):
+        return self.calendar_service.get_events(start_date, end_date, max_results)
+
+    def _create_event(self, summary, start, end=None, description='', location=''):
+        event = self.calendar_service.create_event(summary, start, end, description, location)
+        if event is None:
+            raise ToolError("Création de l'événement impossible (calendrier indisponible ?)")
+        return event
+
+    def _update_event(self, event_id, summary=None, start=None, end=None, description=None, location=None):
+        event = self.calendar_service.update_event(event_id, summary, start, end, description, location)
+        if event is None:
+            raise ToolError(f"Modification de l'événement impossible: {event_id}")
+        return event
+
+    def _delete_event(self, event_id):
+        if not self.calendar_service.delete_event(event_id):
+            raise ToolError(f"Suppression de l'événement impossible: {event_id}")
+        return {'deleted': event_id}
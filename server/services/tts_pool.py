@@ -0,0 +1,285 @@
+"""
+Synthèse vocale sur un pool de processus, chacun avec son moteur pyttsx3
+"""
+
+import os
+import queue
+import asyncio
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+# Délai entre deux vérifications des processus (secondes)
+POLL_INTERVAL = 1.0
+
+
+class TtsQueueFull(Exception):
+    """Levée quand la file des synthèses reste pleine au-delà du délai d'attente"""
+
+
+class TtsError(Exception):
+    """Échec d'une synthèse dans un processus du pool"""
+
+
+def _init_engine(rate, volume, language):
+    """Moteur pyttsx3 configuré (voix de la langue demandée si disponible)"""
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    voices = engine.getProperty('voices')
+    voice = next((voice for voice in voices if language in voice.id.lower()), None)
+    if voice:
+        engine.setProperty('voice', voice.id)
+    engine.setProperty('rate', rate)
+    engine.setProperty('volume', volume)
+    return engine
+
+
+def _worker(jobs, results, settings, parent_pid):
+    """Boucle d'un processus du pool : un moteur initialisé une fois, puis les synthèses"""
+    try:
+        engine = _init_engine(**settings)
+    except Exception as e:
+        results.put((None, f"Initialisation du moteur de synthèse impossible : {e}"))
+        return
+
+    while True:
+        try:
+            job = jobs.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            # Worker web arrêté sans fermer le pool : le processus s'arrête aussi
+            if os.getppid() != parent_pid:
+                return
+            continue
+        if job is None:
+            return
+
+        job_id, text, path = job
+        try:
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+            results.put((job_id, None))
+        except Exception as e:
+            results.put((job_id, str(e)))
+
+
+class TtsPool:
+    """
+    Pool de processus de synthèse vocale alimenté par une file bornée
+
+    pyttsx3 n'est pas utilisable depuis plusieurs threads : chaque processus
+    du pool a son propre moteur, initialisé à son démarrage, et traite les
+    synthèses une par une. Le débit croît avec le nombre de processus (et de
+    cœurs), et le thread de la requête n'exécute jamais le moteur.
+
+    La file est bornée (`max_pending`) : quand elle est pleine, une nouvelle
+    synthèse attend au plus `queue_timeout` secondes une place, puis est
+    refusée (TtsQueueFull). Un processus arrêté brutalement est remplacé.
+
+    Les processus sont créés par fork quand le système le permet : le pool
+    doit être créé au démarrage du worker, avant les threads des autres
+    services.
+    """
+
+    def __init__(self, processes=2, max_pending=32, queue_timeout=10.0, rate=175, volume=0.8, language='fr'):
+        """
+        Initialisation et démarrage du pool
+
+        Args:
+            processes (int, optional): Processus de synthèse
+            max_pending (int, optional): Synthèses en attente au maximum
+            queue_timeout (float, optional): Attente maximale d'une place dans la file (secondes)
+            rate (int, optional): Vitesse de parole
+            volume (float, optional): Volume (0-1)
+            language (str, optional): Langue de la voix recherchée
+        """
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        self.processes = processes
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._settings = {'rate': rate, 'volume': volume, 'language': language}
+        self._jobs = self._context.Queue(maxsize=max_pending)
+        self._results = self._context.Queue()
+        self._futures = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'restarts': 0}
+        self._closed = False
+
+        self._workers = [self._start_worker() for _ in range(processes)]
+        self._collector = threading.Thread(target=self._collect, name='jarvis-tts-results', daemon=True)
+        self._collector.start()
+
+    def submit(self, text, path):
+        """
+        Ajoute une synthèse à la file
+
+        Args:
+            text (str): Texte à synthétiser
+            path (str): Fichier audio à écrire
+
+        Returns:
+            concurrent.futures.Future: Résolu avec `path` une fois le fichier écrit
+
+        Raises:
+            TtsQueueFull: Si la file reste pleine au-delà de queue_timeout
+            TtsError: Si aucun processus de synthèse n'est disponible
+        """
+        try:
+            return self._enqueue(text, path, block=True)
+        except queue.Full:
+            with self._lock:
+                self._counters['rejected'] += 1
+            raise TtsQueueFull("Trop de synthèses vocales en attente")
+
+    def synthesize(self, text, path, timeout=None):
+        """
+        Synthèse bloquante (chemin Flask)
+
+        Args:
+            text (str): Texte à synthétiser
+            path (str): Fichier audio à écrire
+            timeout (float, optional): Attente maximale du résultat (secondes)
+
+        Returns:
+            str: Chemin du fichier écrit
+
+        Raises:
+            TtsQueueFull: Si la file est pleine
+            TtsError: Si la synthèse échoue
+            TimeoutError: Si le résultat n'arrive pas à temps
+        """
+        future = self.submit(text, path)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # Résultat ignoré s'il arrive plus tard
+            future.cancel()
+            raise TimeoutError("Synthèse vocale trop longue")
+
+    async def synthesize_async(self, text, path, timeout=None):
+        """
+        Synthèse sans bloquer la boucle asyncio (chemin ASGI)
+
+        Args:
+            text (str): Texte à synthétiser
+            path (str): Fichier audio à écrire
+            timeout (float, optional): Attente maximale du résultat (secondes)
+
+        Returns:
+            str: Chemin du fichier écrit
+
+        Raises:
+            TtsQueueFull: Si la file est pleine
+            TtsError: Si la synthèse échoue
+            asyncio.TimeoutError: Si le résultat n'arrive pas à temps
+        """
+        try:
+            future = self._enqueue(text, path, block=False)
+        except queue.Full:
+            # File pleine : l'attente d'une place se fait hors de la boucle
+            future = await asyncio.to_thread(self.submit, text, path)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+    def _enqueue(self, text, path, block):
+        if not any(process.is_alive() for process in self._workers):
+            raise TtsError("Aucun processus de synthèse vocale disponible")
+
+        future = Future()
+        job_id = next(self._ids)
+        with self._lock:
+            self._futures[job_id] = (future, path)
+        try:
+            self._jobs.put((job_id, text, path), block, self.queue_timeout)
+        except queue.Full:
+            with self._lock:
+                self._futures.pop(job_id, None)
+            raise
+        with self._lock:
+            self._counters['submitted'] += 1
+        # Synthèse abandonnée (délai dépassé) : plus attendue, même si son processus s'est arrêté
+        future.add_done_callback(lambda done: done.cancelled() and self._forget(job_id))
+        return future
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def stats(self):
+        """
+        Compteurs du pool (worker web courant)
+
+        Returns:
+            dict: Processus actifs, synthèses en cours, compteurs cumulés
+        """
+        with self._lock:
+            stats = dict(self._counters, pending=len(self._futures))
+        stats.update(
+            processes=sum(1 for process in self._workers if process.is_alive()),
+            max_pending=self.max_pending
+        )
+        return stats
+
+    def close(self, timeout=5.0):
+        """Arrête les processus du pool (synthèses en cours terminées si possible)"""
+        self._closed = True
+        for _ in self._workers:
+            try:
+                self._jobs.put_nowait(None)
+            except queue.Full:
+                break
+        for process in self._workers:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        for future, _ in futures.values():
+            if not future.done():
+                future.set_exception(TtsError("Pool de synthèse vocale arrêté"))
+
+    def _start_worker(self):
+        process = self._context.Process(
+            target=_worker,
+            args=(self._jobs, self._results, self._settings, os.getpid()),
+            name='jarvis-tts',
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def _collect(self):
+        """Thread de résolution des résultats ; remplace les processus arrêtés"""
+        while not self._closed:
+            try:
+                job_id, error = self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                self._replace_dead_workers()
+                continue
+            except (EOFError, OSError):
+                return
+
+            if job_id is None:
+                print(f"Erreur lors du démarrage d'un processus de synthèse vocale: {error}")
+                continue
+
+            with self._lock:
+                future, path = self._futures.pop(job_id, (None, None))
+                self._counters['failed' if error else 'completed'] += 1
+            if future is None or not future.set_running_or_notify_cancel():
+                continue
+            if error:
+                future.set_exception(TtsError(error))
+            else:
+                future.set_result(path)
+
+    def _replace_dead_workers(self):
+        # Un processus sorti normalement (moteur impossible à initialiser) n'est pas relancé
+        for index, process in enumerate(self._workers):
+            if not process.is_alive() and process.exitcode != 0 and not self._closed:
+                process.join(0)
+                self._workers[index] = self._start_worker()
+                with self._lock:
+                    self._counters['restarts'] += 1
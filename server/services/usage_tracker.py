@@ -0,0 +1,171 @@
+"""
+Comptabilité des tokens consommés par les appels à Claude
+"""
+
+import time
+import threading
+from collections import OrderedDict, deque
+
+# Compteurs repris de response.usage
+USAGE_FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+
+
+class TokenBudgetExceeded(Exception):
+    """Levée quand une session a consommé tout son budget de tokens"""
+
+    def __init__(self, session_id, used, budget):
+        super().__init__(f"Budget de tokens épuisé pour la session {session_id} ({used}/{budget})")
+        self.session_id = session_id
+        self.used = used
+        self.budget = budget
+
+
+def _empty_totals():
+    totals = dict.fromkeys(USAGE_FIELDS, 0)
+    totals.update(requests=0, api_calls=0, response_cache_hits=0, latency=0.0)
+    return totals
+
+
+def total_tokens(totals):
+    """
+    Nombre total de tokens d'un compteur (entrée, sortie et cache)
+
+    Args:
+        totals (dict): Compteurs d'une requête ou d'une session
+
+    Returns:
+        int: Somme des tokens
+    """
+    return sum(totals[field] for field in USAGE_FIELDS)
+
+
+class UsageTracker:
+    """
+    Compteurs de tokens par requête, par session et pour le worker
+
+    Les sessions suivies sont bornées (LRU) comme les historiques de
+    conversation, et seules les `max_recent` dernières requêtes sont
+    gardées en détail. Les compteurs sont propres au worker : avec
+    plusieurs workers, une session répartie entre eux dispose au plus
+    d'un budget par worker.
+    """
+
+    def __init__(self, session_budget=0, max_sessions=1000, max_recent=100):
+        """
+        Initialisation des compteurs
+
+        Args:
+            session_budget (int, optional): Tokens autorisés par session (0 = illimité)
+            max_sessions (int, optional): Nombre maximal de sessions suivies
+            max_recent (int, optional): Nombre de requêtes récentes gardées en détail
+        """
+        self.session_budget = session_budget
+        self.max_sessions = max_sessions
+        self._totals = _empty_totals()
+        self._sessions = OrderedDict()
+        self._recent = deque(maxlen=max_recent)
+        self._lock = threading.Lock()
+
+    def check_budget(self, session_id):
+        """
+        Vérifie qu'une session peut encore appeler Claude
+
+        Args:
+            session_id (str): ID de la session
+
+        Raises:
+            TokenBudgetExceeded: Si la session a atteint son budget
+        """
+        if not self.session_budget:
+            return
+        with self._lock:
+            session = self._sessions.get(session_id)
+            used = total_tokens(session) if session else 0
+        if used >= self.session_budget:
+            raise TokenBudgetExceeded(session_id, used, self.session_budget)
+
+    def record(self, session_id, usage=None, latency=0.0, first_token_latency=None):
+        """
+        Enregistre la consommation d'une requête
+
+        Args:
+            session_id (str): ID de la session
+            usage (optional): Objet `usage` de la réponse de l'API, ou liste de
+                ces objets (un par appel, avec des outils), None pour une
+                réponse servie par le cache des réponses
+            latency (float, optional): Durée de l'appel en secondes
+            first_token_latency (float, optional): Délai avant le premier fragment (flux)
+
+        Returns:
+            dict: Compteurs de la requête
+        """
+        usages = [] if usage is None else usage if isinstance(usage, list) else [usage]
+        entry = {field: sum(getattr(item, field, None) or 0 for item in usages) for field in USAGE_FIELDS}
+        entry.update(
+            api_calls=len(usages),
+            session_id=session_id,
+            timestamp=time.time(),
+            latency=latency,
+            response_cache_hit=usage is None
+        )
+        if first_token_latency is not None:
+            entry['first_token_latency'] = first_token_latency
+
+        with self._lock:
+            session = self._sessions.pop(session_id, None) or _empty_totals()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+            for totals in (self._totals, session):
+                for field in USAGE_FIELDS:
+                    totals[field] += entry[field]
+                totals['latency'] += latency
+                if usage is None:
+                    totals['response_cache_hits'] += 1
+                else:
+                    totals['requests'] += 1
+                    totals['api_calls'] += len(usages)
+            self._recent.append(entry)
+
+        return entry
+
+    def session(self, session_id):
+        """
+        Compteurs d'une session
+
+        Args:
+            session_id (str): ID de la session
+
+        Returns:
+            dict: Compteurs cumulés, tokens totaux et budget restant
+        """
+        with self._lock:
+            totals = dict(self._sessions.get(session_id) or _empty_totals())
+        return self._describe(totals, self.session_budget)
+
+    def summary(self):
+        """
+        Compteurs du worker et dernières requêtes
+
+        Returns:
+            dict: {'totals', 'recent', 'sessions'}
+        """
+        with self._lock:
+            totals = dict(self._totals)
+            recent = list(self._recent)
+            sessions = len(self._sessions)
+        return {'totals': self._describe(totals), 'recent': recent, 'sessions': sessions}
+
+    @staticmethod
+    def _describe(totals, budget=0):
+        used = total_tokens(totals)
+        prompt_tokens = totals['input_tokens'] + totals['cache_creation_input_tokens'] + totals['cache_read_input_tokens']
+        totals.update(
+            total_tokens=used,
+            # Part du prompt lue depuis le cache d'Anthropic (facturée à prix réduit)
+            cache_read_ratio=totals['cache_read_input_tokens'] / prompt_tokens if prompt_tokens else 0.0
+        )
+        if budget:
+            totals.update(budget=budget, budget_remaining=max(budget - used, 0))
+        return totals
@@ -3,85 +3,188 @@ Service de reconnaissance et synthèse vocale
 """
 
 import os
-import tempfile
-import uuid
+import time
 import speech_recognition as sr
-import pyttsx3
 from pathlib import Path
 
+from server.services.audio_cache import AudioCache
+from server.services.speech_backends import RecognitionStats, audio_duration, create_backend
+from server.services.tts_pool import TtsPool
+from server.utils.uploads import read_upload
+
 class VoiceService:
     """Service pour la conversion parole-texte et texte-parole"""
     
     def __init__(self):
         """Initialisation du service vocal"""
-        self.recognizer = sr.Recognizer()
-        self.engine = pyttsx3.init()
+        # Synthèse vocale sur un pool de processus, chacun avec son moteur pyttsx3
+        # (créé en premier : les processus partent d'un worker encore sans threads)
+        self.voice_settings = {
+            'rate': 175,  # Vitesse de parole
+            'volume': 0.8,  # Volume (0-1)
+            'language': 'fr'  # Voix française si disponible
+        }
+        self.tts_pool = TtsPool(
+            processes=int(os.environ.get('JARVIS_TTS_PROCESSES', 2)),
+            max_pending=int(os.environ.get('JARVIS_TTS_MAX_PENDING', 32)),
+            queue_timeout=float(os.environ.get('JARVIS_TTS_QUEUE_TIMEOUT', 10)),
+            **self.voice_settings
+        )
+        self.tts_timeout = float(os.environ.get('JARVIS_TTS_TIMEOUT', 30))
         
-        # Configuration de la voix
-        voices = self.engine.getProperty('voices')
-        # Utiliser une voix française si disponible
-        french_voice = next((voice for voice in voices if 'fr' in voice.id.lower()), None)
-        if french_voice:
-            self.engine.setProperty('voice', french_voice.id)
+        self.recognizer = sr.Recognizer()
         
-        # Paramètres de la voix
-        self.engine.setProperty('rate', 175)  # Vitesse de parole
-        self.engine.setProperty('volume', 0.8)  # Volume (0-1)
+        # Moteur de reconnaissance, chargé une fois par worker (google ou vosk, hors ligne)
+        self.stt_backend = create_backend(
+            os.environ.get('JARVIS_STT_ENGINE', 'google'),
+            self.recognizer,
+            language=os.environ.get('JARVIS_STT_LANGUAGE', 'fr-FR'),
+            vosk_model_path=os.environ.get('JARVIS_VOSK_MODEL_PATH', 'models/vosk-model-small-fr-0.22')
+        )
+        self.stt_stats = RecognitionStats(self.stt_backend.name)
         
         # Répertoire de stockage pour les fichiers audio
         self.output_dir = Path('client/build/static/audio')
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Fichiers audio réutilisés pour un même texte, répertoire borné en taille
+        self.audio_cache = AudioCache(
+            self.output_dir,
+            dict(self.voice_settings, engine='pyttsx3'),
+            max_bytes=int(os.environ.get('JARVIS_TTS_CACHE_MAX_BYTES', 200 * 1024 * 1024)),
+            sweep_interval=float(os.environ.get('JARVIS_TTS_CACHE_SWEEP_INTERVAL', 60))
+        )
+        
+        # Taille maximale des fichiers audio reçus (octets)
+        self.max_audio_bytes = int(os.environ.get('JARVIS_MAX_AUDIO_BYTES', 10 * 1024 * 1024))
     
     def speech_to_text(self, audio_file):
         """
         Convertit un fichier audio en texte
         
+        Le fichier est décodé depuis la mémoire (WAV, AIFF ou FLAC), sans
+        fichier temporaire, puis transcrit par le moteur configuré
+        (JARVIS_STT_ENGINE) ; le temps de reconnaissance est mesuré.
+        
+        Args:
+            audio_file: Fichier audio à convertir (objet FileStorage de Flask
+                ou tout objet avec read())
+            
+        Returns:
+            str: Texte reconnu
+            
+        Raises:
+            UploadTooLarge: Si le fichier dépasse JARVIS_MAX_AUDIO_BYTES
+        """
+        audio_buffer = read_upload(audio_file, self.max_audio_bytes)
+        
+        with sr.AudioFile(audio_buffer) as source:
+            audio_data = self.recognizer.record(source)
+        
+        return self.transcribe(audio_data)
+    
+    def transcribe_pcm(self, pcm, sample_rate):
+        """
+        Convertit un énoncé brut en texte (flux audio découpé par la VAD)
+        
         Args:
-            audio_file: Fichier audio à convertir (objet FileStorage de Flask)
+            pcm (bytes): Échantillons PCM signés 16 bits mono, petit-boutiste
+            sample_rate (int): Fréquence d'échantillonnage
             
         Returns:
             str: Texte reconnu
         """
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio:
-            audio_file.save(temp_audio.name)
+        return self.transcribe(sr.AudioData(pcm, sample_rate, 2))
+    
+    def transcribe(self, audio_data):
+        """
+        Transcrit un enregistrement décodé avec le moteur configuré
+        
+        Args:
+            audio_data (sr.AudioData): Enregistrement
             
-            with sr.AudioFile(temp_audio.name) as source:
-                audio_data = self.recognizer.record(source)
-                
-                try:
-                    # Utilisation de Google pour la reconnaissance (nécessite une connexion internet)
-                    # Spécifier "fr-FR" pour le français
-                    text = self.recognizer.recognize_google(audio_data, language="fr-FR")
-                    return text
-                except sr.UnknownValueError:
-                    return "Désolé, je n'ai pas compris ce que vous avez dit."
-                except sr.RequestError:
-                    return "Désolé, je ne peux pas accéder au service de reconnaissance vocale."
-                finally:
-                    # Nettoyage du fichier temporaire
-                    os.unlink(temp_audio.name)
+        Returns:
+            str: Texte reconnu, ou message d'excuse si rien n'a été compris
+        """
+        start = time.perf_counter()
+        failed = True
+        try:
+            text = self.stt_backend.recognize(audio_data)
+            failed = False
+            return text
+        except sr.UnknownValueError:
+            return "Désolé, je n'ai pas compris ce que vous avez dit."
+        except sr.RequestError:
+            return "Désolé, je ne peux pas accéder au service de reconnaissance vocale."
+        finally:
+            self.stt_stats.record(time.perf_counter() - start, audio_duration(audio_data), failed)
+    
+    def recognition_stats(self):
+        """
+        Temps de reconnaissance du moteur configuré (worker courant)
+        
+        Returns:
+            dict: Voir RecognitionStats.stats
+        """
+        return self.stt_stats.stats()
     
     def text_to_speech(self, text):
         """
         Convertit du texte en parole et enregistre dans un fichier
         
+        Un texte déjà synthétisé avec les mêmes réglages est servi depuis le
+        cache ; sinon la synthèse est exécutée par un processus du pool, le
+        thread appelant attendant seulement le résultat.
+        
         Args:
             text (str): Texte à convertir en parole
             
         Returns:
             str: URL du fichier audio généré
+            
+        Raises:
+            TtsQueueFull: Si trop de synthèses sont en attente
         """
-        # Génération d'un nom de fichier unique
-        filename = f"{uuid.uuid4()}.mp3"
-        filepath = self.output_dir / filename
-        
-        # Conversion et enregistrement
-        self.engine.save_to_file(text, str(filepath))
-        self.engine.runAndWait()
+        filename = self.audio_cache.get_or_create(text, self._synthesize, timeout=self.tts_timeout)
         
         # Retourne l'URL relative pour accès depuis le frontend
         return f"/static/audio/{filename}"
-
+    
+    async def text_to_speech_async(self, text):
+        """
+        Convertit du texte en parole sans bloquer la boucle asyncio
+        
+        Args:
+            text (str): Texte à convertir en parole
+            
+        Returns:
+            str: URL du fichier audio généré
+            
+        Raises:
+            TtsQueueFull: Si trop de synthèses sont en attente
+        """
+        filename = await self.audio_cache.get_or_create_async(text, self._synthesize_async, timeout=self.tts_timeout)
+        return f"/static/audio/{filename}"
+    
+    def _synthesize(self, text, path):
+        self.tts_pool.synthesize(text, path, timeout=self.tts_timeout)
+    
+    async def _synthesize_async(self, text, path):
+        await self.tts_pool.synthesize_async(text, path, timeout=self.tts_timeout)
+    
+    def synthesis_stats(self):
+        """
+        Compteurs du pool de synthèse vocale et du cache audio (worker courant)
+        
+        Returns:
+            dict: pool (voir TtsPool.stats) et cache (voir AudioCache.stats)
+        """
+        return {'pool': self.tts_pool.stats(), 'cache': self.audio_cache.stats()}
+    
+    def close(self):
+        """Arrête les processus de synthèse vocale"""
+        self.tts_pool.close()
+    
     def cleanup_old_files(self, max_age_hours=24):
         """
         Supprime les fichiers audio plus anciens que max_age_hours
@@ -0,0 +1,113 @@
+"""
+Limitation du nombre de requêtes simultanées (asyncio)
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class LimiterRejected(Exception):
+    """Levée quand une requête ne peut pas obtenir de place (file pleine ou attente trop longue)"""
+
+
+class ConcurrencyLimiter:
+    """
+    Limite globale et par session des requêtes en cours, avec file d'attente
+
+    Au-delà de `global_limit` requêtes en cours (ou `session_limit` pour une
+    même session), les suivantes attendent leur tour dans l'ordre d'arrivée.
+    La file est bornée (`max_queue`) et l'attente aussi (`queue_timeout`) :
+    une requête refusée reçoit une réponse immédiate au lieu d'attendre
+    indéfiniment. Avec session_limit=1, les tours d'une même conversation
+    s'exécutent l'un après l'autre.
+
+    À utiliser depuis une seule boucle asyncio.
+    """
+
+    def __init__(self, global_limit=64, session_limit=1, max_queue=256, queue_timeout=30.0):
+        """
+        Initialisation du limiteur
+
+        Args:
+            global_limit (int, optional): Requêtes simultanées pour le processus
+            session_limit (int, optional): Requêtes simultanées par session
+            max_queue (int, optional): Requêtes en attente au maximum
+            queue_timeout (float, optional): Attente maximale d'une place (secondes)
+        """
+        self.global_limit = global_limit
+        self.session_limit = session_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._global = asyncio.Semaphore(global_limit)
+        self._sessions = {}
+        self._in_flight = 0
+        self._waiting = 0
+        self._rejected = 0
+
+    @asynccontextmanager
+    async def slot(self, session_id):
+        """
+        Réserve une place pour une requête de la session
+
+        Args:
+            session_id (str): ID de la session
+
+        Raises:
+            LimiterRejected: Si la file est pleine ou l'attente trop longue
+        """
+        if self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise LimiterRejected("Trop de requêtes en attente")
+
+        # Sémaphore de session partagé par ses requêtes en cours ou en attente
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = [asyncio.Semaphore(self.session_limit), 0]
+        session[1] += 1
+
+        self._waiting += 1
+        acquired = []
+        try:
+            try:
+                await asyncio.wait_for(self._acquire(session[0], acquired), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._rejected += 1
+                raise LimiterRejected("Attente d'une place trop longue")
+            finally:
+                self._waiting -= 1
+
+            self._in_flight += 1
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+        finally:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+            session[1] -= 1
+            if not session[1]:
+                del self._sessions[session_id]
+
+    async def _acquire(self, session_semaphore, acquired):
+        # Session d'abord : une session bavarde n'occupe qu'une place globale
+        await session_semaphore.acquire()
+        acquired.append(session_semaphore)
+        await self._global.acquire()
+        acquired.append(self._global)
+
+    def stats(self):
+        """
+        État du limiteur
+
+        Returns:
+            dict: Requêtes en cours, en attente, refusées et limites
+        """
+        return {
+            'in_flight': self._in_flight,
+            'waiting': self._waiting,
+            'rejected': self._rejected,
+            'sessions': len(self._sessions),
+            'global_limit': self.global_limit,
+            'session_limit': self.session_limit,
+            'max_queue': self.max_queue
+        }
@@ -0,0 +1,71 @@
+"""
+Fonctions utilitaires de manipulation des dates d'échéance
+"""
+
+import datetime
+
+
+def parse_due_date(value):
+    """
+    Convertit une date d'échéance ISO en datetime naïf (heure locale)
+
+    Args:
+        value (str): Date ISO (YYYY-MM-DD ou YYYY-MM-DDTHH:MM:SS[+HH:MM])
+
+    Returns:
+        datetime.datetime: Date d'échéance, ou None si absente ou illisible
+    """
+    if not value or not isinstance(value, str):
+        return None
+
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def day_start(date):
+    """
+    Début (minuit) d'un jour
+
+    Args:
+        date (datetime.date): Jour
+
+    Returns:
+        datetime.datetime: Minuit au début du jour
+    """
+    return datetime.datetime.combine(date, datetime.time.min)
+
+
+def prefix_range(prefix):
+    """
+    Traduit un préfixe de date ISO en intervalle [début, fin)
+
+    Args:
+        prefix (str): YYYY, YYYY-MM ou YYYY-MM-DD
+
+    Returns:
+        tuple: (début, fin) en datetime, ou None si le préfixe n'est pas une date
+    """
+    try:
+        if len(prefix) == 4:
+            year = int(prefix)
+            return datetime.datetime(year, 1, 1), datetime.datetime(year + 1, 1, 1)
+
+        if len(prefix) == 7 and prefix[4] == '-':
+            year, month = int(prefix[:4]), int(prefix[5:])
+            start = datetime.datetime(year, month, 1)
+            end = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+            return start, end
+
+        if len(prefix) == 10:
+            start = day_start(datetime.date.fromisoformat(prefix))
+            return start, start + datetime.timedelta(days=1)
+    except ValueError:
+        return None
+
+    return None
@@ -0,0 +1,475 @@
+"""
+Journal d'écriture anticipée (write-ahead log) pour la persistance JSON
+"""
+
+import os
+import json
+import atexit
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus, un seul worker
+    fcntl = None
+
+FSYNC_ALWAYS = 'always'
+FSYNC_BATCH = 'batch'
+FSYNC_NONE = 'none'
+FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NONE)
+
+
+@contextmanager
+def exclusive_file_lock(path):
+    """
+    Verrou exclusif inter-processus sur un fichier (sans effet sous Windows)
+
+    Args:
+        path (Path): Fichier de verrou, créé au besoin
+    """
+    with open(path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class Journal:
+    """
+    Persistance par journal en ajout seul + instantané compacté
+
+    Chaque mutation ajoute une ligne JSON au journal ({"seq", "op", ...}).
+    Quand le journal dépasse `compact_every` enregistrements, un thread
+    d'arrière-plan écrit un instantané complet (fichier temporaire puis
+    remplacement atomique) et repart d'un journal vide. Au démarrage,
+    l'instantané est chargé puis le journal est rejoué.
+
+    Le journal est partageable entre plusieurs processus (workers gunicorn) :
+    les écritures se font sous verrou exclusif `flock` après avoir rattrapé
+    les enregistrements écrits par les autres processus, et `refresh()`
+    détecte un changement avec un simple `stat` (inode + taille) avant de
+    relire uniquement la fin du journal.
+
+    Les éléments sont des dictionnaires avec une clé 'id'. Un élément passé
+    à `put` ne doit plus être modifié en place : l'instantané le sérialise
+    en arrière-plan sans le copier.
+
+    Politiques de synchronisation disque (fsync) :
+        - always : fsync après chaque écriture
+        - batch  : fsync groupé toutes les `fsync_interval` secondes
+        - none   : laisse le système d'exploitation décider
+    """
+
+    def __init__(self, snapshot_path, journal_path=None, fsync=FSYNC_BATCH,
+                 fsync_interval=1.0, compact_every=1000):
+        """
+        Initialisation du journal
+
+        Args:
+            snapshot_path (Path): Fichier de l'instantané JSON
+            journal_path (Path, optional): Fichier du journal (par défaut <instantané>.journal)
+            fsync (str, optional): Politique de synchronisation (always, batch, none)
+            fsync_interval (float, optional): Intervalle du fsync groupé en secondes
+            compact_every (int, optional): Nombre d'enregistrements avant compaction
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Politique fsync inconnue: {fsync} (attendu: {', '.join(FSYNC_POLICIES)})")
+
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path) if journal_path else self.snapshot_path.with_suffix('.journal')
+        self.rotated_path = self.journal_path.with_name(self.journal_path.name + '.old')
+        self.lock_path = self.journal_path.with_name(self.journal_path.name + '.lock')
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        # Verrou à tenir pendant qu'on modifie l'état et qu'on l'écrit dans le journal
+        self.lock = threading.RLock()
+
+        self._seq = 0
+        self._pending = 0
+        self._dirty = False
+        self._file = None
+        self._inode = None
+        self._offset = 0
+        self._lock_file = None
+        self._flock_depth = 0
+        self._source = None
+        self._on_put = None
+        self._on_delete = None
+        self._on_reset = None
+        self._closed = False
+        self._wakeup = threading.Condition(self.lock)
+        self._worker = None
+
+    @property
+    def seq(self):
+        """Numéro de séquence du dernier enregistrement écrit ou rejoué"""
+        return self._seq
+
+    def load(self):
+        """
+        Charge l'instantané puis rejoue le journal
+
+        Returns:
+            list: Éléments reconstruits, dans l'ordre d'insertion
+        """
+        with self._flocked(exclusive=True):
+            items = self._read_all(truncate=True)
+
+            # Une compaction a été interrompue : on la termine tout de suite
+            if self.rotated_path.exists():
+                self._write_snapshot(list(items.values()), self._seq)
+                self.rotated_path.unlink()
+
+            return list(items.values())
+
+    def start(self, source, on_put=None, on_delete=None, on_reset=None):
+        """
+        Démarre le thread d'arrière-plan (fsync groupé et compaction)
+
+        Les rappels servent à appliquer à l'état en mémoire les
+        enregistrements écrits par d'autres processus.
+
+        Args:
+            source (callable): Renvoie la liste courante des éléments (appelé sous `lock`)
+            on_put (callable, optional): Applique un élément ajouté ou remplacé
+            on_delete (callable, optional): Applique la suppression d'un ID
+            on_reset (callable, optional): Remplace tout l'état par une liste d'éléments
+        """
+        self._source = source
+        self._on_put = on_put
+        self._on_delete = on_delete
+        self._on_reset = on_reset
+        self._worker = threading.Thread(target=self._run, name='journal-writer', daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Section critique d'écriture, entre threads et entre processus
+
+        Prend le verrou exclusif puis rattrape les écritures des autres
+        processus : l'état en mémoire est à jour pendant tout le bloc.
+        """
+        with self._flocked(exclusive=True):
+            self._catch_up(truncate=True)
+            yield
+
+    def refresh(self):
+        """
+        Rattrape les écritures des autres processus si le journal a changé
+
+        Returns:
+            bool: True si l'état en mémoire a été mis à jour
+        """
+        if self._unchanged():
+            return False
+        with self._flocked(exclusive=False):
+            return self._catch_up(truncate=False)
+
+    def put(self, item):
+        """
+        Enregistre l'ajout ou le remplacement d'un élément
+
+        Args:
+            item (dict): Élément complet
+        """
+        self.append([{'op': 'put', 'item': item}])
+
+    def delete(self, item_id):
+        """
+        Enregistre la suppression d'un élément
+
+        Args:
+            item_id (str): ID de l'élément
+        """
+        self.append([{'op': 'delete', 'id': item_id}])
+
+    def append(self, records):
+        """
+        Ajoute des enregistrements au journal en une seule écriture
+
+        L'appelant englobe la modification de son état en mémoire et l'appel
+        à `append` dans un même bloc `transaction()`.
+
+        Args:
+            records (list): Enregistrements {'op': 'put', 'item': ...} ou {'op': 'delete', 'id': ...}
+        """
+        if not records:
+            return
+
+        with self.transaction():
+            lines = []
+            for record in records:
+                self._seq += 1
+                lines.append(json.dumps(dict(record, seq=self._seq), ensure_ascii=False))
+
+            self._file.write('\n'.join(lines) + '\n')
+            self._file.flush()
+            self._offset = self._file.tell()
+
+            if self.fsync == FSYNC_ALWAYS:
+                os.fsync(self._file.fileno())
+            elif self.fsync == FSYNC_BATCH:
+                self._dirty = True
+
+            self._pending += len(records)
+            if self._pending >= self.compact_every:
+                self._wakeup.notify()
+
+    def compact(self):
+        """Écrit un instantané complet et vide le journal"""
+        with self.transaction():
+            # Un autre processus est déjà en train de compacter
+            if self._closed or self._source is None or self.rotated_path.exists():
+                return
+            items = list(self._source())
+            seq = self._seq
+
+            # Rotation : les écritures suivantes partent dans un journal neuf
+            self._sync()
+            self._file.close()
+            os.replace(self.journal_path, self.rotated_path)
+            self._open_journal()
+            self._pending = 0
+
+        # Sérialisation hors verrou : les requêtes continuent d'écrire
+        tmp_path = self._write_snapshot_file(items, seq)
+
+        with self._flocked(exclusive=True):
+            if not self.rotated_path.exists():
+                # Un processus redémarré a déjà terminé cette compaction
+                os.unlink(tmp_path)
+                return
+            self._publish_snapshot(tmp_path)
+            self.rotated_path.unlink()
+
+    def close(self):
+        """Synchronise et ferme le journal"""
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+        # Laisse une compaction en cours se terminer avant l'arrêt du processus
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join(timeout=5)
+
+    def _run(self):
+        """Boucle du thread d'arrière-plan"""
+        while True:
+            with self.lock:
+                timeout = self.fsync_interval if self.fsync == FSYNC_BATCH else None
+                # close() pendant une compaction : pas de nouvelle attente (notification déjà passée)
+                if not self._closed:
+                    self._wakeup.wait(timeout)
+                if self._closed:
+                    return
+                if self._dirty:
+                    self._sync()
+                needs_compaction = self._pending >= self.compact_every
+
+            if needs_compaction:
+                try:
+                    self.compact()
+                except OSError as e:
+                    print(f"Erreur lors de la compaction du journal {self.journal_path}: {e}")
+
+    @contextmanager
+    def _flocked(self, exclusive):
+        """Verrou de thread + verrou de fichier (partagé ou exclusif) réentrant"""
+        with self.lock:
+            if fcntl is None or self._flock_depth > 0:
+                # Déjà tenu par ce thread : un verrou exclusif couvre aussi les lectures
+                self._flock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._flock_depth -= 1
+                return
+
+            if self._lock_file is None:
+                self._lock_file = open(self.lock_path, 'a')
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._flock_depth = 1
+            try:
+                yield
+            finally:
+                self._flock_depth = 0
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _unchanged(self):
+        """Vérification sans verrou : un seul stat sur le journal"""
+        try:
+            st = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return False
+        return st.st_ino == self._inode and st.st_size == self._offset
+
+    def _catch_up(self, truncate):
+        """
+        Applique les enregistrements écrits par d'autres processus
+
+        Returns:
+            bool: True si l'état en mémoire a changé
+        """
+        if self._unchanged():
+            return False
+
+        try:
+            inode = os.stat(self.journal_path).st_ino
+        except FileNotFoundError:
+            inode = None
+
+        if inode != self._inode:
+            # Un autre processus a compacté : rechargement complet
+            items = self._read_all(truncate)
+            if self._on_reset:
+                self._on_reset(list(items.values()))
+            return True
+
+        records, self._offset = self._read_records(self.journal_path, self._offset, truncate)
+        for record in records:
+            if record['seq'] <= self._seq:
+                continue
+            if record['op'] == 'put' and self._on_put:
+                self._on_put(record['item'])
+            elif record['op'] == 'delete' and self._on_delete:
+                self._on_delete(record['id'])
+            self._seq = record['seq']
+            self._pending += 1
+        return bool(records)
+
+    def _read_all(self, truncate):
+        """Relit instantané + journaux et rouvre le journal courant"""
+        items = {}
+        self._seq = self._load_snapshot(items)
+        self._pending = 0
+
+        for path in (self.rotated_path, self.journal_path):
+            if not path.exists():
+                continue
+            records, _ = self._read_records(path, 0, truncate)
+            for record in records:
+                if record['seq'] <= self._seq:
+                    continue
+                if record['op'] == 'put':
+                    item = record['item']
+                    items[item['id']] = item
+                elif record['op'] == 'delete':
+                    items.pop(record['id'], None)
+                self._seq = record['seq']
+                self._pending += 1
+
+        if self._file is not None:
+            self._file.close()
+        self._open_journal()
+        return items
+
+    def _open_journal(self):
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+        st = os.fstat(self._file.fileno())
+        self._inode = st.st_ino
+        self._offset = st.st_size
+
+    @staticmethod
+    def _read_records(path, offset, truncate):
+        """
+        Lit les enregistrements d'un journal à partir d'un offset
+
+        Returns:
+            tuple: (enregistrements, offset de fin de la partie valide)
+        """
+        records = []
+        valid_size = offset
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    # Dernière ligne tronquée par un arrêt brutal
+                    print(f"Enregistrement tronqué ignoré à la fin de {path}")
+                    break
+                records.append(record)
+                valid_size += len(raw)
+
+        # Retire la ligne tronquée pour que les ajouts suivants restent lisibles
+        if truncate and valid_size < path.stat().st_size:
+            os.truncate(path, valid_size)
+
+        return records, valid_size
+
+    def _sync(self):
+        if self._file is not None and self.fsync != FSYNC_NONE:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._dirty = False
+
+    def _load_snapshot(self, items):
+        """
+        Charge l'instantané dans `items`
+
+        Accepte l'ancien format (liste JSON brute) comme le nouveau
+        ({"seq": n, "items": [...]}). Un instantané illisible est mis de côté
+        au lieu d'être écrasé.
+
+        Returns:
+            int: Numéro de séquence couvert par l'instantané
+        """
+        if not self.snapshot_path.exists():
+            return 0
+
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            corrupt_path = self.snapshot_path.with_name(self.snapshot_path.name + '.corrupt')
+            os.replace(self.snapshot_path, corrupt_path)
+            print(f"Instantané illisible {self.snapshot_path} ({e}), conservé sous {corrupt_path}")
+            return 0
+
+        if isinstance(data, list):
+            data = {'seq': 0, 'items': data}
+
+        for item in data.get('items', []):
+            items[item['id']] = item
+        return data.get('seq', 0)
+
+    def _write_snapshot(self, items, seq):
+        """Écrit l'instantané de façon atomique (fichier temporaire + remplacement)"""
+        self._publish_snapshot(self._write_snapshot_file(items, seq))
+
+    def _write_snapshot_file(self, items, seq):
+        """Écrit l'instantané dans un fichier temporaire propre à ce processus"""
+        tmp_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'seq': seq, 'items': items}, f, ensure_ascii=False)
+            f.flush()
+            if self.fsync != FSYNC_NONE:
+                os.fsync(f.fileno())
+        return tmp_path
+
+    def _publish_snapshot(self, tmp_path):
+        os.replace(tmp_path, self.snapshot_path)
+
+        if self.fsync != FSYNC_NONE and hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(self.snapshot_path.parent, os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
@@ -0,0 +1,54 @@
+"""
+Mesure des étapes d'une requête (en-tête Server-Timing)
+"""
+
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Durées des étapes d'une requête (reconnaissance, Claude, synthèse...)
+
+    Les durées sont renvoyées au client dans l'en-tête standard
+    Server-Timing, lisible par les outils de développement des navigateurs
+    et par le générateur de charge (benchmarks/load_test.py).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Mesure une étape
+
+        Args:
+            name (str): Nom de l'étape (stt, llm, tts...)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, duration):
+        """
+        Enregistre une étape mesurée par l'appelant
+
+        Args:
+            name (str): Nom de l'étape
+            duration (float): Durée en secondes
+        """
+        self.stages.append((name, duration))
+
+    def header(self):
+        """
+        Valeur de l'en-tête Server-Timing
+
+        Returns:
+            str: Durées des étapes et durée totale, en millisecondes
+        """
+        stages = self.stages + [('total', time.perf_counter() - self.started)]
+        return ', '.join(f"{name};dur={duration * 1000:.1f}" for name, duration in stages)
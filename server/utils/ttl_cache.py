@@ -0,0 +1,104 @@
+"""
+Cache LRU à durée de vie limitée, avec statistiques
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Cache clé -> valeur borné en taille (LRU) et en âge (TTL)
+
+    Les entrées sont rangées de la moins récemment utilisée à la plus
+    récente : au-delà de `max_size`, la tête est évincée. Une entrée plus
+    vieille que `ttl` secondes est traitée comme absente et supprimée.
+    """
+
+    def __init__(self, max_size=512, ttl=300):
+        """
+        Initialisation du cache
+
+        Args:
+            max_size (int, optional): Nombre maximal d'entrées (0 = cache désactivé)
+            ttl (float, optional): Durée de vie d'une entrée en secondes
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Récupère une valeur encore valide
+
+        Args:
+            key (str): Clé
+
+        Returns:
+            La valeur, ou None si absente ou expirée
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """
+        Enregistre une valeur
+
+        Args:
+            key (str): Clé
+            value: Valeur (ne doit plus être modifiée ensuite)
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """Vide le cache (les statistiques sont conservées)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Statistiques d'utilisation du cache
+
+        Returns:
+            dict: Taille, succès, échecs, taux de succès, évictions et expirations
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
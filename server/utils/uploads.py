@@ -0,0 +1,71 @@
+"""
+Réception des fichiers envoyés par les clients, en mémoire et bornée en taille
+"""
+
+import io
+from flask import Request
+
+# Taille des blocs lus dans le flux d'envoi
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Fichier envoyé plus grand que la taille autorisée"""
+
+    def __init__(self, max_bytes):
+        super().__init__(f"Fichier trop volumineux (maximum {max_bytes} octets)")
+        self.max_bytes = max_bytes
+
+
+def read_upload(upload, max_bytes, chunk_size=CHUNK_SIZE):
+    """
+    Tampon mémoire lisible d'un fichier envoyé, sans passer par le disque
+
+    Un flux déjà en mémoire (InMemoryRequest) est rendu tel quel, sans
+    copie. Sinon le flux est lu par blocs et la lecture s'arrête dès que la
+    taille autorisée est dépassée, sans lire le reste de l'envoi.
+
+    Args:
+        upload: Fichier envoyé (FileStorage de Flask ou objet avec read())
+        max_bytes (int): Taille maximale en octets
+        chunk_size (int, optional): Taille des blocs lus
+
+    Returns:
+        io.BytesIO: Contenu du fichier, positionné au début
+
+    Raises:
+        UploadTooLarge: Si le fichier dépasse max_bytes
+    """
+    stream = getattr(upload, 'stream', upload)
+    if isinstance(stream, io.BytesIO):
+        size = stream.seek(0, io.SEEK_END)
+        if size > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        stream.seek(0)
+        return stream
+
+    buffer = io.BytesIO()
+    size = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+class InMemoryRequest(Request):
+    """
+    Requête Flask dont les fichiers reçus restent en mémoire
+
+    Par défaut, Werkzeug écrit sur le disque tout fichier de plus de 500 Ko.
+    Ici les fichiers sont reçus dans un io.BytesIO : la taille totale de la
+    requête doit être bornée par MAX_CONTENT_LENGTH (413 au-delà).
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
@@ -0,0 +1,148 @@
+"""
+Détection d'activité vocale (VAD) par l'énergie du signal
+"""
+
+import sys
+import math
+import array
+from collections import deque
+
+
+def frame_rms(frame):
+    """
+    Énergie (moyenne quadratique) d'une trame PCM 16 bits
+
+    Args:
+        frame (bytes): Échantillons PCM signés 16 bits, petit-boutiste
+
+    Returns:
+        float: Énergie de la trame (0 à 32768)
+    """
+    samples = array.array('h', frame)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+
+class EnergyVad:
+    """
+    Découpage d'un flux audio en énoncés, au fil de la réception
+
+    Le flux (PCM 16 bits mono) est découpé en trames de `frame_ms`. Une
+    trame est « parlée » si son énergie dépasse le bruit de fond estimé
+    (moyenne glissante sur les trames silencieuses) multiplié par
+    `threshold_ratio`, avec un plancher `min_threshold`. La parole commence
+    après `start_ms` de trames parlées consécutives ; l'énoncé se termine
+    après `end_silence_ms` de silence, ou au bout de `max_utterance_ms`.
+    Les `pre_roll_ms` précédant le début sont conservés pour ne pas couper
+    la première syllabe.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, threshold_ratio=3.0, min_threshold=300.0,
+                 start_ms=90, end_silence_ms=700, pre_roll_ms=300, max_utterance_ms=30000):
+        """
+        Initialisation du détecteur
+
+        Args:
+            sample_rate (int, optional): Fréquence d'échantillonnage du flux
+            frame_ms (int, optional): Durée d'une trame d'analyse
+            threshold_ratio (float, optional): Rapport énergie / bruit de fond pour la parole
+            min_threshold (float, optional): Énergie minimale d'une trame parlée
+            start_ms (int, optional): Parole continue nécessaire pour ouvrir un énoncé
+            end_silence_ms (int, optional): Silence qui termine un énoncé
+            pre_roll_ms (int, optional): Audio conservé avant le début de la parole
+            max_utterance_ms (int, optional): Durée maximale d'un énoncé
+        """
+        self.sample_rate = sample_rate
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+        self.frame_ms = frame_ms
+        self.threshold_ratio = threshold_ratio
+        self.min_threshold = min_threshold
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_silence_ms // frame_ms)
+        self.max_frames = max(1, max_utterance_ms // frame_ms)
+        self.noise_floor = min_threshold / threshold_ratio
+        self._pending = b''
+        self._pre_roll = deque(maxlen=max(self.start_frames, pre_roll_ms // frame_ms))
+        self._voiced_run = 0
+        self._utterance = None
+        self._silent_run = 0
+
+    @property
+    def in_speech(self):
+        """Vrai si un énoncé est en cours"""
+        return self._utterance is not None
+
+    def feed(self, data):
+        """
+        Analyse un morceau du flux
+
+        Args:
+            data (bytes): Échantillons reçus (taille quelconque)
+
+        Returns:
+            list: Événements ('start', None) au début de la parole et
+                ('end', bytes) avec l'audio de l'énoncé terminé
+        """
+        data = self._pending + data
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        events = []
+        for offset in range(0, usable, self.frame_bytes):
+            event = self._frame(data[offset:offset + self.frame_bytes])
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self):
+        """
+        Termine l'énoncé en cours (fin du flux ou demande du client)
+
+        Returns:
+            list: Événement ('end', bytes) si un énoncé était en cours
+        """
+        if self._utterance is None:
+            return []
+        # Demi-échantillon final (flux coupé au milieu d'un échantillon) écarté
+        self._utterance.append(self._pending[:len(self._pending) - len(self._pending) % 2])
+        self._pending = b''
+        return [self._end()]
+
+    def _frame(self, frame):
+        energy = frame_rms(frame)
+        voiced = energy > max(self.min_threshold, self.noise_floor * self.threshold_ratio)
+
+        if self._utterance is None:
+            self._pre_roll.append(frame)
+            if not voiced:
+                # Bruit de fond suivi sur les trames silencieuses uniquement
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * energy
+                self._voiced_run = 0
+                return None
+            self._voiced_run += 1
+            if self._voiced_run < self.start_frames:
+                return None
+            self._utterance = list(self._pre_roll)
+            self._pre_roll.clear()
+            self._silent_run = 0
+            return ('start', None)
+
+        self._utterance.append(frame)
+        self._silent_run = 0 if voiced else self._silent_run + 1
+        if self._silent_run >= self.end_frames or len(self._utterance) >= self.max_frames:
+            return self._end()
+        return None
+
+    def _end(self):
+        frames = self._utterance
+        # Silence final retiré, à part une marge égale au pré-enregistrement
+        trailing = self._silent_run - self._pre_roll.maxlen
+        if trailing > 0:
+            frames = frames[:-trailing]
+        audio = b''.join(frames)
+        self._utterance = None
+        self._voiced_run = 0
+        self._silent_run = 0
+        return ('end', audio)
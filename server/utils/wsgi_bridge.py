@@ -0,0 +1,145 @@
+"""
+Exécution d'une application WSGI (Flask) derrière un serveur ASGI
+"""
+
+import io
+import sys
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+_END = object()
+
+
+class WsgiBridge:
+    """
+    Adaptateur ASGI -> WSGI sur un pool de threads dédié
+
+    Chaque requête est exécutée dans un thread du pool, sans bloquer la
+    boucle asyncio. Les réponses en flux (Server-Sent Events) sont relayées
+    morceau par morceau, et le flux WSGI est fermé dès que le client se
+    déconnecte, ce qui libère le thread.
+    """
+
+    def __init__(self, wsgi_app, max_threads=32, max_body_bytes=None):
+        """
+        Initialisation de l'adaptateur
+
+        Args:
+            wsgi_app (callable): Application WSGI
+            max_threads (int, optional): Requêtes WSGI exécutées simultanément
+            max_body_bytes (int, optional): Taille maximale du corps des
+                requêtes (413 au-delà, None = illimitée)
+        """
+        self.wsgi_app = wsgi_app
+        self.max_body_bytes = max_body_bytes
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='jarvis-wsgi')
+
+    async def __call__(self, scope, receive, send):
+        body = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.append(message.get('body', b''))
+            size += len(body[-1])
+            if self.max_body_bytes is not None and size > self.max_body_bytes:
+                # Corps refusé dès le dépassement, sans attendre la fin de l'envoi
+                await self.send_too_large(send)
+                return
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return self._write_unsupported
+
+        environ = self._environ(scope, b''.join(body))
+        iterable = await loop.run_in_executor(self.executor, self.wsgi_app, environ, start_response)
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        iterator = iter(iterable)
+        started = False
+        try:
+            while not disconnected.is_set():
+                chunk = await loop.run_in_executor(self.executor, next, iterator, _END)
+                if not started:
+                    await send({'type': 'http.response.start', 'status': response['status'],
+                                'headers': response['headers']})
+                    started = True
+                if chunk is _END:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if started and not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            watcher.cancel()
+            if hasattr(iterable, 'close'):
+                await loop.run_in_executor(self.executor, iterable.close)
+
+    async def send_too_large(self, send):
+        """Réponse 413 (corps de requête au-delà de max_bytes), connexion fermée"""
+        payload = json.dumps({
+            "status": "error",
+            "message": f"Requête trop volumineuse (maximum {self.max_body_bytes} octets)"
+        }, ensure_ascii=False).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(payload)).encode('ascii')),
+                                (b'connection', b'close')]})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    @staticmethod
+    def _write_unsupported(data):
+        raise RuntimeError("L'écriture directe (write) de WSGI n'est pas prise en charge")
+
+    @staticmethod
+    def _environ(scope, body):
+        """Environnement WSGI (PEP 3333) d'une requête ASGI"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').upper().replace('-', '_')
+            value = raw_value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+        return environ
@@ -0,0 +1,60 @@
+"""
+Fixtures communes aux tests de l'API
+"""
+
+import importlib
+import sys
+
+import pytest
+
+
+class OfflineVoice:
+    """Service vocal sans moteur STT/TTS (les routes de tâches et de rappels n'en ont pas besoin)"""
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """
+    Module server.api.routes neuf, ses données dans un répertoire temporaire
+
+    Les services sont créés à l'import de routes : le calendrier est branché
+    sans authentification Google et le service vocal est remplacé, le reste
+    (tâches, rappels, Claude) est réel. Renvoie (client de test, module routes).
+    """
+    for module in ('anthropic', 'speech_recognition', 'googleapiclient', 'google_auth_oauthlib'):
+        pytest.importorskip(module)
+    flask = pytest.importorskip('flask')
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('JARVIS_CONVERSATIONS_BACKEND', 'memory')
+
+    from server.services import calendar_service, voice_service
+    monkeypatch.setattr(calendar_service.CalendarService, '_authenticate', lambda self: None)
+    monkeypatch.setattr(voice_service, 'VoiceService', OfflineVoice)
+
+    monkeypatch.delitem(sys.modules, 'server.api.routes', raising=False)
+    routes = importlib.import_module('server.api.routes')
+    app = flask.Flask(__name__)
+    app.register_blueprint(routes.api_blueprint, url_prefix='/api')
+
+    yield app.test_client(), routes
+
+    # Journaux fermés avant le retour au répertoire de départ (chemins relatifs à data/)
+    routes.reminder_service.close()
+    routes.reminder_service.journal.close()
+    journal = getattr(routes.task_service.repository, 'journal', None)
+    if journal is not None:
+        journal.close()
+    sys.modules.pop('server.api.routes', None)
+
+
+@pytest.fixture
+def asgi(api, monkeypatch):
+    """Module server.asgi neuf, construit sur les services de la fixture api"""
+    pytest.importorskip('flask_cors')
+    pytest.importorskip('dotenv')
+    for name in ('app', 'server.asgi'):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    yield importlib.import_module('server.asgi')
+    for name in ('app', 'server.asgi'):
+        sys.modules.pop(name, None)
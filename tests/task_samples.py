@@ -0,0 +1,92 @@
+"""
+Jeux de tâches reproductibles partagés par les tests du stockage
+"""
+
+import random
+import datetime
+
+from server.utils.dates import parse_due_date
+
+PRIORITIES = ('high', 'medium', 'low')
+
+# Échéances ISO (avec ou sans heure, avec fuseau), vides et non ISO
+DUE_DATES = (
+    '2026-10-18', '2026-10-18T09:30:00', '2026-10-19T08:00', '2026-10-20T10:00:00.500000',
+    '2026-10-17T23:00:00+00:00', '2026-11-02', '2027-01-01T00:00:00', None, '', 'demain', 'zzz'
+)
+
+WORDS = ('dentiste', 'rapport', 'courses', 'garage', 'anniversaire', 'facture')
+
+START = datetime.datetime(2026, 10, 18)
+END = datetime.datetime(2026, 10, 21)
+TODAY = datetime.date(2026, 10, 19)
+
+
+def make_task(rng, index):
+    """Tâche aléatoire (titre, statut, priorité, échéance)"""
+    return {
+        'id': f'task-{index}',
+        'title': f"{rng.choice(WORDS)} {index}",
+        'description': rng.choice(WORDS),
+        'created_at': '2026-01-01T00:00:00',
+        'due_date': rng.choice(DUE_DATES),
+        'priority': rng.choice(PRIORITIES),
+        'completed': rng.random() < 0.3,
+    }
+
+
+def mutations(seed=7, count=400):
+    """Suite reproductible d'ajouts, remplacements et suppressions ('put', tâche) / ('remove', id)"""
+    rng = random.Random(seed)
+    ids = []
+    for index in range(count):
+        roll = rng.random()
+        if ids and roll < 0.2:
+            yield 'remove', ids.pop(rng.randrange(len(ids)))
+        elif ids and roll < 0.6:
+            task = make_task(rng, 0)
+            task['id'] = rng.choice(ids)
+            yield 'put', task
+        else:
+            task = make_task(rng, index)
+            ids.append(task['id'])
+            yield 'put', task
+
+
+def apply(repository, operations):
+    """Rejoue des mutations sur un dépôt (add / update / remove)"""
+    for kind, value in operations:
+        if kind == 'put':
+            if repository.get(value['id']) is None:
+                repository.add(value)
+            else:
+                repository.update(value['id'], lambda task, value=value: task.update(value))
+        else:
+            assert repository.remove(value)
+
+
+def final_tasks(operations):
+    """État attendu après les mutations, dans l'ordre d'insertion"""
+    tasks = {}
+    for kind, value in operations:
+        if kind == 'put':
+            tasks[value['id']] = value
+        else:
+            del tasks[value]
+    return list(tasks.values())
+
+
+def ids(tasks):
+    return sorted(task['id'] for task in tasks)
+
+
+def reference_due(tasks, start=None, end=None, open_only=False):
+    """IDs par échéance croissante dans [start, end), par parcours complet (référence des index)"""
+    found = []
+    for task in tasks:
+        due = parse_due_date(task.get('due_date'))
+        if due is None or (open_only and task['completed']):
+            continue
+        if (start is None or due >= start) and (end is None or due < end):
+            found.append((due, task['id']))
+    return [task_id for _, task_id in sorted(found)]
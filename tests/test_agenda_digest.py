@@ -0,0 +1,131 @@
+"""
+Tests du résumé des tâches et de l'agenda
+"""
+
+import datetime
+
+import pytest
+
+from server.models.sql_task_repository import SqlTaskRepository
+from server.models.task_repository import JournalTaskRepository
+from server.services.agenda_digest import AgendaDigest
+from server.services.task_service import TaskService
+
+
+class RecordingRepository:
+    """Dépôt qui note les lectures faites par le résumé"""
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.reads = []
+
+    def __getattr__(self, name):
+        attribute = getattr(self.repository, name)
+        if name in ('all', 'due_between', 'overdue', 'count_due_between'):
+            def recorded(*args, **kwargs):
+                self.reads.append((name, kwargs.get('limit')))
+                return attribute(*args, **kwargs)
+            return recorded
+        return attribute
+
+
+class FakeCalendar:
+    """Calendrier en mémoire, aux signatures de CalendarService"""
+
+    def __init__(self, count):
+        self.events = [{'id': f"evt{index}", 'summary': f"Réunion {index}",
+                        'start': {'dateTime': f"2026-10-{19 + index % 5}T10:00:00"}} for index in range(count)]
+        self.requested = []
+        self.counted = 0
+
+    def get_version(self):
+        return 1
+
+    def get_events(self, start_date=None, end_date=None, max_results=10):
+        self.requested.append(max_results)
+        return self.events[:max_results]
+
+    def count_events(self, start_date=None, end_date=None):
+        self.counted += 1
+        return len(self.events)
+
+
+@pytest.fixture(params=['json', 'sql'])
+def recording(request, tmp_path, monkeypatch):
+    """Dépôt enregistreur sur chacun des deux stockages"""
+    monkeypatch.chdir(tmp_path)
+    if request.param == 'json':
+        repository = JournalTaskRepository(tmp_path, fsync='none')
+    else:
+        repository = SqlTaskRepository(f"sqlite:///{tmp_path / 'tasks.db'}")
+    yield RecordingRepository(repository)
+    if request.param == 'json':
+        repository.journal.close()
+
+
+def _due(days):
+    return (datetime.date.today() + datetime.timedelta(days=days)).isoformat() + "T09:00:00"
+
+
+def _section(text, title):
+    lines = text.split('\n')
+    start = lines.index(f"{title} :") + 1
+    end = next((index for index in range(start, len(lines)) if not lines[index].startswith('- ')), len(lines))
+    return lines[start:end]
+
+
+def test_task_sections_read_max_items_and_count_the_rest(recording):
+    """max_items tâches lues par partie ; « … et N autre(s) » donne le vrai reste"""
+    service = TaskService(recording)
+    for index in range(12):
+        service.create_task(f"en retard {index:02d}", due_date=_due(-1 - index))
+    for index in range(7):
+        service.create_task(f"bientôt {index}", due_date=_due(1 + index % 3))
+    completed = service.create_task("déjà faite", due_date=_due(-2))
+    service.update_task(completed['id'], completed=True)
+
+    recording.reads.clear()
+    text = AgendaDigest(service, max_tokens=5000, max_items=3).text()
+
+    overdue = _section(text, "Tâches en retard")
+    assert len(overdue) == 4
+    assert overdue[0].startswith("- en retard 11 ")
+    assert overdue[-1] == "- … et 9 autre(s)"
+    due_soon = _section(text, "Tâches à échéance d'ici 7 jours")
+    assert len(due_soon) == 4 and due_soon[-1] == "- … et 4 autre(s)"
+
+    # Aucune lecture sans limite : les listes complètes ne sont jamais chargées
+    assert ('all', None) not in recording.reads
+    assert all(limit == 3 for name, limit in recording.reads if name != 'count_due_between')
+
+
+def test_task_sections_without_overflow(recording):
+    service = TaskService(recording)
+    service.create_task("en retard", due_date=_due(-1))
+    service.create_task("demain", due_date=_due(1))
+
+    text = AgendaDigest(service, max_tokens=5000, max_items=3).text()
+
+    assert "autre(s)" not in text
+    assert len(_section(text, "Tâches en retard")) == 1
+
+
+def test_event_overflow_is_the_real_count(recording):
+    """Au-delà de max_items, le total vient du comptage du calendrier"""
+    calendar = FakeCalendar(25)
+    text = AgendaDigest(TaskService(recording), calendar, max_tokens=5000, max_items=4).text()
+
+    events = _section(text, "Événements des 7 prochains jours")
+    assert len(events) == 5
+    assert events[-1] == "- … et 21 autre(s)"
+    assert calendar.requested == [5]
+    assert calendar.counted == 1
+
+
+def test_events_within_max_items_are_not_counted(recording):
+    calendar = FakeCalendar(4)
+    text = AgendaDigest(TaskService(recording), calendar, max_tokens=5000, max_items=4).text()
+
+    assert len(_section(text, "Événements des 7 prochains jours")) == 4
+    assert "autre(s)" not in text
+    assert calendar.counted == 0
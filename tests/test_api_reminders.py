@@ -0,0 +1,22 @@
+"""
+Tests de /api/reminders
+"""
+
+import datetime
+
+
+def test_reminder_list_limit_has_a_default_and_a_cap(api, monkeypatch):
+    """Sans limit : 50 rappels au plus ; un limit trop grand est ramené au maximum"""
+    client, routes = api
+    now = datetime.datetime.now()
+    for day in range(1, 61):
+        routes.reminder_service.create_reminder(f"jour {day}", (now + datetime.timedelta(days=day)).isoformat())
+
+    listed = client.get('/api/reminders').get_json()['reminders']
+    assert len(listed) == routes.REMINDER_LIST_LIMIT
+    assert listed[0]['message'] == "jour 1"
+
+    monkeypatch.setattr(routes, 'MAX_REMINDER_LIST_LIMIT', 55)
+    assert len(client.get('/api/reminders?limit=1000').get_json()['reminders']) == 55
+    assert len(client.get('/api/reminders?limit=3').get_json()['reminders']) == 3
+    assert client.get('/api/reminders?limit=0').status_code == 400
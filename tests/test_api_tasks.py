@@ -0,0 +1,83 @@
+"""
+Tests de /api/tasks (curseurs, ETag, lots)
+"""
+
+import base64
+import json
+
+
+def test_cursor_pages_follow_inserts_between_requests(api):
+    """Les pages décroissantes suivent next_cursor ; une tâche ajoutée après le curseur arrive plus loin"""
+    client, routes = api
+    for index in range(6):
+        routes.task_service.create_task(f"tâche {index}")
+
+    first = client.get('/api/tasks?sort=-title&limit=4').get_json()
+    assert [task['title'] for task in first['tasks']] == ["tâche 5", "tâche 4", "tâche 3", "tâche 2"]
+
+    client.post('/api/tasks', json={'title': "tâche 0 bis"})
+    client.post('/api/tasks', json={'title': "tâche 9"})
+    second = client.get(f"/api/tasks?sort=-title&limit=4&cursor={first['next_cursor']}").get_json()
+    assert [task['title'] for task in second['tasks']] == ["tâche 1", "tâche 0 bis", "tâche 0"]
+    assert second['next_cursor'] is None
+
+
+def test_cursor_of_another_sort_is_a_bad_request(api):
+    """Curseur d'un tri par titre réutilisé pour un tri par priorité : 400, pas 500"""
+    client, routes = api
+    for index in range(3):
+        routes.task_service.create_task(f"tâche {index}")
+
+    cursor = client.get('/api/tasks?sort=title&limit=1').get_json()['next_cursor']
+    response = client.get(f'/api/tasks?sort=priority&cursor={cursor}')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+    forged = base64.urlsafe_b64encode(json.dumps([False, [1], 'x']).encode()).decode()
+    assert client.get(f'/api/tasks?sort=title&cursor={forged}').status_code == 400
+    assert client.get('/api/tasks?cursor=%%%').status_code == 400
+
+
+def test_etag_revalidation_until_tasks_change(api):
+    """If-None-Match : 304 tant que rien ne change, nouvel ETag après une écriture"""
+    client, routes = api
+    routes.task_service.create_task("tâche")
+
+    response = client.get('/api/tasks?status=pending')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+
+    not_modified = client.get('/api/tasks?status=pending', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['ETag'] == etag
+    assert not_modified.data == b''
+
+    # Autres paramètres : autre ETag
+    assert client.get('/api/tasks?status=all', headers={'If-None-Match': etag}).status_code == 200
+
+    client.post('/api/tasks', json={'title': "autre tâche"})
+    changed = client.get('/api/tasks?status=pending', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert len(changed.get_json()['tasks']) == 2
+
+
+def test_rejected_batch_reports_skipped_operations(api):
+    """Lot avec une opération invalide : 422, erreur et 'skipped' par opération, aucune écriture"""
+    client, routes = api
+    kept = routes.task_service.create_task("à garder")
+    version = routes.task_service.get_version()
+
+    response = client.post('/api/tasks/batch', json={'operations': [
+        {'op': 'create', 'title': "nouvelle tâche"},
+        {'op': 'delete', 'id': kept['id']},
+        {'op': 'update', 'id': 'tâche-inconnue', 'completed': True},
+    ]})
+
+    assert response.status_code == 422
+    body = response.get_json()
+    assert body['status'] == 'error'
+    assert [result['status'] for result in body['results']] == ['skipped', 'skipped', 'error']
+    assert body['results'][2]['message'] == "Task not found"
+    assert routes.task_service.get_version() == version
+    assert [task['id'] for task in routes.task_service.get_all_tasks()] == [kept['id']]
@@ -0,0 +1,158 @@
+"""
+Tests des routes servies nativement par le serveur ASGI
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('anthropic')
+
+from server.services.resilience import DeadlineExceeded  # noqa: E402
+from server.services.usage_tracker import TokenBudgetExceeded  # noqa: E402
+from server.utils.concurrency import LimiterRejected  # noqa: E402
+from server.utils.uploads import UploadTooLarge  # noqa: E402
+
+BOUNDARY = 'jarvis-test'
+
+
+def _multipart(fields, audio=None):
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    if audio is not None:
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="audio"; filename="audio.wav"\r\n'
+                     f'Content-Type: audio/wav\r\n\r\n'.encode() + audio + b'\r\n')
+    parts.append(f'--{BOUNDARY}--\r\n'.encode())
+    return b''.join(parts)
+
+
+def _request(asgi, method, path, body, content_type):
+    """Requête HTTP complète sur l'application ASGI ; renvoie les messages envoyés"""
+    sent = []
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(60)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+             'headers': [(b'content-type', content_type.encode())]}
+    asyncio.run(asyncio.wait_for(asgi.app(scope, receive, send), 5))
+    return sent
+
+
+def _json_response(sent):
+    starts = [message for message in sent if message['type'] == 'http.response.start']
+    assert len(starts) == 1
+    return starts[0]['status'], json.loads(b''.join(message.get('body', b'') for message in sent[1:]))
+
+
+@pytest.fixture
+def voice(asgi, monkeypatch):
+    """Reconnaissance, Claude et synthèse remplacés, chaque appel enregistré"""
+    calls = []
+
+    def speech_to_text(audio_file):
+        calls.append(('stt', audio_file.read()))
+        return "quelle heure est-il"
+
+    async def text_to_speech_async(text):
+        calls.append(('tts', text))
+        return '/static/audio/reponse.wav'
+
+    async def process_input(text, session_id):
+        calls.append(('llm', text, session_id, asgi.limiter.stats()['in_flight']))
+        return {'message': "Il est midi."}
+
+    monkeypatch.setattr(asgi.routes.voice_service, 'speech_to_text', speech_to_text, raising=False)
+    monkeypatch.setattr(asgi.routes.voice_service, 'text_to_speech_async', text_to_speech_async, raising=False)
+    monkeypatch.setattr(asgi.async_claude_service, 'process_input', process_input)
+    return calls
+
+
+def _post_voice(asgi, fields, audio=b'RIFF-audio'):
+    return _request(asgi, 'POST', '/api/process_voice', _multipart(fields, audio),
+                    f'multipart/form-data; boundary={BOUNDARY}')
+
+
+def test_process_voice_is_served_without_flask(asgi, voice, monkeypatch):
+    """STT dans un thread, Claude sous le limiteur, synthèse, réponse au format de la route Flask"""
+    def flask_app(environ, start_response):
+        raise AssertionError("route servie par Flask")
+    monkeypatch.setattr(asgi.flask_bridge, 'wsgi_app', flask_app)
+
+    status, body = _json_response(_post_voice(asgi, {'session_id': 'cuisine'}))
+
+    assert status == 200
+    assert body == {
+        "status": "success",
+        "text": "quelle heure est-il",
+        "response": {'message': "Il est midi."},
+        "audio_url": '/static/audio/reponse.wav',
+        "session_id": 'cuisine'
+    }
+    assert voice == [('stt', b'RIFF-audio'), ('llm', "quelle heure est-il", 'cuisine', 1), ('tts', "Il est midi.")]
+
+
+def test_process_voice_errors(asgi, voice, monkeypatch):
+    status, body = _json_response(_post_voice(asgi, {'session_id': 'cuisine'}, audio=None))
+    assert status == 400
+
+    async def rejected(text, session_id):
+        raise LimiterRejected("Trop de requêtes en attente")
+    monkeypatch.setattr(asgi.async_claude_service, 'process_input', rejected)
+    sent = _post_voice(asgi, {})
+    assert _json_response(sent)[0] == 503
+    assert (b'retry-after', b'1') in sent[0]['headers']
+
+    async def over_budget(text, session_id):
+        raise TokenBudgetExceeded(session_id, 120, 100)
+    monkeypatch.setattr(asgi.async_claude_service, 'process_input', over_budget)
+    assert _json_response(_post_voice(asgi, {}))[0] == 429
+
+    def too_large(audio_file):
+        raise UploadTooLarge(10)
+    monkeypatch.setattr(asgi.routes.voice_service, 'speech_to_text', too_large, raising=False)
+    assert _json_response(_post_voice(asgi, {}))[0] == 413
+
+
+def test_budget_exhausted_mid_stream_is_an_event(asgi, monkeypatch):
+    """TokenBudgetExceeded après l'en-tête 200 : événement error, pas de seconde réponse"""
+    async def stream_input(text, session_id):
+        yield 'token', "Je regarde"
+        raise TokenBudgetExceeded(session_id, 120, 100)
+
+    monkeypatch.setattr(asgi.async_claude_service, 'stream_input', stream_input)
+
+    sent = _request(asgi, 'POST', '/api/process_text/stream',
+                    json.dumps({'text': "mes tâches", 'session_id': 'salon'}).encode(), 'application/json')
+
+    assert [message['type'] for message in sent].count('http.response.start') == 1
+    assert sent[0]['status'] == 200
+    stream = b''.join(message.get('body', b'') for message in sent[1:]).decode()
+    assert stream.startswith('event: token\n')
+    assert 'event: error\ndata: {"status": "error", "message": "Budget de tokens épuisé' in stream
+    assert '"session_id": "salon"' in stream
+    assert sent[-1] == {'type': 'http.response.body', 'body': b'', 'more_body': False}
+
+
+def test_deadline_mid_stream_is_an_error_event(asgi, monkeypatch):
+    """Échéance dépassée après des fragments : événement error, pas de 'done' de repli"""
+    async def stream_input(text, session_id):
+        yield 'token', "Voici "
+        raise DeadlineExceeded("Échéance de la requête dépassée pendant la réponse")
+
+    monkeypatch.setattr(asgi.async_claude_service, 'stream_input', stream_input)
+
+    sent = _request(asgi, 'POST', '/api/process_text/stream',
+                    json.dumps({'text': "mes tâches"}).encode(), 'application/json')
+
+    stream = b''.join(message.get('body', b'') for message in sent[1:]).decode()
+    assert [block.split('\n')[0] for block in stream.strip().split('\n\n')] == ['event: token', 'event: error']
+    assert 'Échéance de la requête dépassée' in stream
@@ -0,0 +1,136 @@
+"""
+Tests du WebSocket audio /api/voice/stream (serveur ASGI)
+"""
+
+import array
+import asyncio
+import json
+import sys
+
+RATE = 16000
+SPEECH = array.array('h', [5000, -5000] * (RATE * 30 // 1000 // 2) * 4)
+if sys.byteorder == 'big':
+    SPEECH.byteswap()
+SPEECH = SPEECH.tobytes()
+
+
+class Connection:
+    """Client WebSocket piloté par le test"""
+
+    def __init__(self, headers=()):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.scope = {'type': 'websocket', 'path': '/api/voice/stream',
+                      'query_string': b'session_id=voix&rate=16000', 'headers': list(headers)}
+        self.incoming.put_nowait({'type': 'websocket.connect'})
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def utterance(self):
+        """Parole puis fin d'énoncé forcée par le client"""
+        self.incoming.put_nowait({'type': 'websocket.receive', 'bytes': SPEECH})
+        self.incoming.put_nowait({'type': 'websocket.receive', 'text': json.dumps({'type': 'end'})})
+
+    def messages(self, kind=None):
+        payloads = [json.loads(message['text']) for message in self.sent if message['type'] == 'websocket.send']
+        return [payload for payload in payloads if kind is None or payload['type'] == kind]
+
+    async def wait_for(self, predicate, timeout=5):
+        async def poll():
+            while not predicate():
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(poll(), timeout)
+
+
+def test_utterances_are_answered_in_order_with_a_capped_backlog(asgi, monkeypatch):
+    """Un énoncé à la fois, dans l'ordre ; au-delà de la file, l'énoncé est refusé"""
+    monkeypatch.setattr(asgi, 'MAX_PENDING_UTTERANCES', 2)
+    release = asyncio.Event()
+    started = []
+    running = []
+
+    async def voice_turn(send, session_id, audio, sample_rate):
+        started.append(len(started))
+        running.append(1)
+        assert sum(running) == 1
+        await release.wait()
+        running.pop()
+        await asgi._send_ws(send, {"type": "response", "turn": started[-1]})
+
+    monkeypatch.setattr(asgi, '_voice_turn', voice_turn)
+
+    async def scenario():
+        connection = Connection()
+        server = asyncio.ensure_future(asgi.app(connection.scope, connection.receive, connection.send))
+
+        connection.utterance()
+        await connection.wait_for(lambda: started)
+        # Premier énoncé en cours : deux en attente, le quatrième refusé
+        for _ in range(3):
+            connection.utterance()
+        await connection.wait_for(lambda: len(connection.messages('speech_end')) == 4)
+        assert [error['session_id'] for error in connection.messages('error')] == ['voix']
+
+        release.set()
+        await connection.wait_for(lambda: len(connection.messages('response')) == 3)
+        assert [response['turn'] for response in connection.messages('response')] == [0, 1, 2]
+
+        connection.incoming.put_nowait({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(server, 5)
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_cancels_the_pending_turn(asgi, monkeypatch):
+    cancelled = []
+
+    async def voice_turn(send, session_id, audio, sample_rate):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    monkeypatch.setattr(asgi, '_voice_turn', voice_turn)
+
+    async def scenario():
+        connection = Connection()
+        server = asyncio.ensure_future(asgi.app(connection.scope, connection.receive, connection.send))
+        connection.utterance()
+        await connection.wait_for(lambda: connection.messages('speech_end'))
+        connection.incoming.put_nowait({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(server, 5)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert cancelled == [True]
+
+
+def _handshake(asgi, headers):
+    async def scenario():
+        connection = Connection(headers)
+        connection.incoming.put_nowait({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(asgi.app(connection.scope, connection.receive, connection.send), 5)
+        return connection.sent[0]
+    return asyncio.run(scenario())
+
+
+def test_cross_origin_handshake_is_refused(asgi):
+    """Page d'une autre origine : fermeture avant acceptation (403)"""
+    first = _handshake(asgi, [(b'host', b'jarvis.local:8000'), (b'origin', b'https://evil.example')])
+    assert first == {'type': 'websocket.close', 'code': 4403}
+
+
+def test_same_origin_and_allowed_origins_are_accepted(asgi, monkeypatch):
+    assert _handshake(asgi, [(b'host', b'Jarvis.local:8000'), (b'origin', b'http://jarvis.local:8000')]) \
+        == {'type': 'websocket.accept'}
+    # Client hors navigateur : pas d'en-tête Origin
+    assert _handshake(asgi, [(b'host', b'jarvis.local:8000')]) == {'type': 'websocket.accept'}
+
+    monkeypatch.setattr(asgi, 'ALLOWED_WS_ORIGINS', {'http://localhost:3000'})
+    assert _handshake(asgi, [(b'host', b'localhost:5000'), (b'origin', b'http://localhost:3000/')]) \
+        == {'type': 'websocket.accept'}
@@ -0,0 +1,187 @@
+"""
+Tests du déroulé d'un tour de conversation (ClaudeService.turn et flux, sans réseau)
+"""
+
+import datetime
+import time
+from types import SimpleNamespace
+
+import pytest
+
+anthropic = pytest.importorskip('anthropic')
+
+from server.services import claude_service as claude_module  # noqa: E402
+from server.services.claude_service import DEGRADED_REPLY, ClaudeService  # noqa: E402
+from server.services.resilience import UpstreamUnavailable  # noqa: E402
+
+
+def _response(text=None, tool_calls=(), stop_reason='end_turn'):
+    """Réponse de l'API au format du SDK (attributs seulement)"""
+    content = [SimpleNamespace(type='text', text=text)] if text else []
+    content += [SimpleNamespace(type='tool_use', id=f'tool-{index}', name=name, input={})
+                for index, name in enumerate(tool_calls)]
+    usage = SimpleNamespace(input_tokens=10, output_tokens=5, cache_read_input_tokens=0,
+                            cache_creation_input_tokens=0)
+    return SimpleNamespace(content=content, stop_reason=stop_reason, usage=usage)
+
+
+def _run(service, user_input, responses, session_id='test', requests=None):
+    """Pilote un tour avec des réponses préparées ; renvoie le résultat final"""
+    responses = iter(responses)
+    turn = service.turn(user_input, session_id)
+    event = next(turn)
+    while True:
+        kind, value = event
+        if kind == 'done':
+            return value
+        if kind == 'cached':
+            event = next(turn)
+        elif kind == 'call':
+            if requests is not None:
+                requests.append(value)
+            event = turn.send((next(responses), None))
+        else:
+            event = turn.send(service.tool_executor.execute(value))
+
+
+class _Clock:
+    """Remplace datetime.datetime.now dans claude_service"""
+
+    def __init__(self, monkeypatch, now):
+        self.now = now
+        clock = self
+
+        class FixedDateTime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now
+
+        monkeypatch.setattr(claude_module.datetime, 'datetime', FixedDateTime)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('JARVIS_CONVERSATIONS_BACKEND', 'memory')
+    return ClaudeService()
+
+
+def _cached_prefix(request):
+    """Tout ce qui précède le dernier point de cache (préfixe relu depuis le cache de prompt)"""
+    blocks = [('system', block) for block in request['system']]
+    for message in request['messages']:
+        content = message['content']
+        blocks += [(message['role'], block) for block in
+                   ([{'type': 'text', 'text': content}] if isinstance(content, str) else content)]
+    last = max(index for index, (_, block) in enumerate(blocks) if 'cache_control' in block)
+    return blocks[:last + 1], blocks[last + 1:]
+
+
+def _without_markers(blocks):
+    return [(role, {key: value for key, value in block.items() if key != 'cache_control'}) for role, block in blocks]
+
+
+def test_clock_is_after_every_cache_breakpoint(service, monkeypatch):
+    """La date et l'heure suivent les points de cache : le préfixe de l'historique reste identique d'une minute à l'autre"""
+    clock = _Clock(monkeypatch, datetime.datetime(2026, 10, 19, 14, 5))
+    requests = []
+    _run(service, "bonjour", [_response("Bonjour !")], requests=requests)
+    _run(service, "ça va ?", [_response("Très bien.")], requests=requests)
+    clock.now = datetime.datetime(2026, 10, 19, 14, 47)
+    _run(service, "et toi ?", [_response("Aussi.")], requests=requests)
+
+    for request in requests:
+        assert all('il est' not in block['text'] for block in request['system'])
+    assert requests[1]['messages'][-1]['content'][0]['text'] == "Nous sommes le lundi 2026-10-19, il est 14:05."
+    assert requests[2]['messages'][-1]['content'][0]['text'] == "Nous sommes le lundi 2026-10-19, il est 14:47."
+
+    # Le préfixe mis en cache au 2e tour est relu tel quel au 3e tour (autre minute)
+    prefix_second, _ = _cached_prefix(requests[1])
+    prefix_third, _ = _cached_prefix(requests[2])
+    assert _without_markers(prefix_third[:len(prefix_second)]) == _without_markers(prefix_second)
+
+    # L'historique enregistre les messages sans l'heure
+    _, history = service.context.build('test')
+    assert history[0] == {'role': 'user', 'content': 'bonjour'}
+
+
+@pytest.mark.parametrize('question', ["Quelle heure est-il ?", "Qu'est-ce que j'ai dans l'heure ?",
+                                      "Rappelle-moi ça dans 2 heures", "Mon prochain rendez-vous ?"])
+def test_time_dependent_answers_are_not_replayed_after_the_minute(service, monkeypatch, question):
+    """Une question qui dépend de l'heure n'est resservie que dans la même minute"""
+    clock = _Clock(monkeypatch, datetime.datetime(2026, 10, 19, 14, 5, 10))
+    first = _run(service, question, [_response("Il est 14 h 05.")], session_id='a')
+    clock.now = datetime.datetime(2026, 10, 19, 14, 5, 50)
+    assert _run(service, question, [], session_id='b')['message'] == first['message']
+
+    clock.now = datetime.datetime(2026, 10, 19, 14, 6, 0)
+    assert _run(service, question, [_response("Il est 14 h 06.")], session_id='c')['message'] == "Il est 14 h 06."
+
+
+def test_other_answers_are_replayed_for_the_day(service, monkeypatch):
+    """Une question indépendante de l'heure reste en cache toute la journée (dans la limite du TTL)"""
+    clock = _Clock(monkeypatch, datetime.datetime(2026, 10, 19, 14, 5))
+    _run(service, "Bonjour JARVIS", [_response("Bonjour !")], session_id='a')
+    clock.now = datetime.datetime(2026, 10, 19, 14, 8)
+    assert _run(service, "bonjour, jarvis", [], session_id='b')['message'] == "Bonjour !"
+
+    clock.now = datetime.datetime(2026, 10, 20, 9, 0)
+    assert _run(service, "Bonjour JARVIS", [_response("Bonne journée !")], session_id='c')['message'] == "Bonne journée !"
+
+
+class _Stream:
+    """Flux de réponse de l'API : fragments (avec une pause avant chacun) puis message final"""
+
+    def __init__(self, texts, pause=0.0):
+        self.texts = texts
+        self.pause = pause
+
+    @property
+    def text_stream(self):
+        for text in self.texts:
+            time.sleep(self.pause)
+            yield text
+
+    def get_final_message(self):
+        return _response(''.join(self.texts))
+
+
+def _open_streams(service, monkeypatch, *outcomes):
+    """Ouvertures de flux successives : flux préparé ou erreur levée à l'ouverture"""
+    outcomes = list(outcomes)
+
+    def open_stream(request, timeout):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(__exit__=lambda *args: None), outcome
+
+    monkeypatch.setattr(service, '_open_stream', open_stream)
+
+
+def test_deadline_during_the_stream_ends_it_with_an_error(service, monkeypatch):
+    """Échéance dépassée après des fragments : erreur, pas de réponse de repli présentée comme la fin"""
+    service.resilience.deadline = 0.1
+    _open_streams(service, monkeypatch, _Stream(["Voici ", "vos ", "tâches"], pause=0.06))
+
+    events = []
+    with pytest.raises(UpstreamUnavailable):
+        for event in service.stream_input("mes tâches", 'flux'):
+            events.append(event)
+
+    assert events and all(kind == 'token' for kind, _ in events)
+    # Ni réponse tronquée ni réponse de repli dans l'historique
+    assert service.context.build('flux') == ('', [])
+
+
+def test_unreachable_api_before_any_text_gives_the_degraded_reply(service, monkeypatch):
+    httpx = pytest.importorskip('httpx')
+    service.resilience.max_retries = 0
+    error = anthropic.APIConnectionError(request=httpx.Request('POST', 'https://api.anthropic.com/v1/messages'))
+    _open_streams(service, monkeypatch, error)
+
+    events = list(service.stream_input("mes tâches", 'flux'))
+
+    assert [kind for kind, _ in events] == ['done']
+    assert events[0][1]['message'] == DEGRADED_REPLY
+    assert events[0][1]['degraded'] is True
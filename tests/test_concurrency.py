@@ -0,0 +1,111 @@
+"""
+Tests du limiteur de requêtes simultanées
+"""
+
+import asyncio
+
+import pytest
+
+from server.utils.concurrency import ConcurrencyLimiter, LimiterRejected
+
+
+async def _hold(limiter, session_id, entered, release):
+    async with limiter.slot(session_id):
+        entered.append(session_id)
+        await release.wait()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_full_queue_is_rejected_immediately():
+    """File pleine : refus sans attente, compté dans les statistiques"""
+    async def scenario():
+        limiter = ConcurrencyLimiter(global_limit=1, session_limit=1, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+        entered = []
+        running = asyncio.ensure_future(_hold(limiter, 'a', entered, release))
+        await _settle()
+        waiting = asyncio.ensure_future(_hold(limiter, 'b', entered, release))
+        await _settle()
+        assert entered == ['a']
+        assert limiter.stats()['waiting'] == 1
+
+        with pytest.raises(LimiterRejected):
+            async with limiter.slot('c'):
+                pass
+        assert limiter.stats()['rejected'] == 1
+
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert entered == ['a', 'b']
+        stats = limiter.stats()
+        assert (stats['in_flight'], stats['waiting'], stats['sessions'], stats['rejected']) == (0, 0, 0, 1)
+
+    asyncio.run(scenario())
+
+
+def test_waiting_too_long_is_rejected_and_frees_its_place():
+    """Attente au-delà de queue_timeout : LimiterRejected, la session ne garde rien"""
+    async def scenario():
+        limiter = ConcurrencyLimiter(global_limit=1, session_limit=1, max_queue=8, queue_timeout=0.05)
+        release = asyncio.Event()
+        entered = []
+        running = asyncio.ensure_future(_hold(limiter, 'a', entered, release))
+        await _settle()
+
+        with pytest.raises(LimiterRejected):
+            async with limiter.slot('b'):
+                pass
+        assert limiter.stats()['waiting'] == 0
+        assert limiter.stats()['sessions'] == 1
+
+        release.set()
+        await running
+        # Places rendues : une nouvelle requête passe aussitôt
+        async with limiter.slot('b'):
+            assert limiter.stats()['in_flight'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_requests_of_one_session_run_one_after_the_other():
+    """session_limit=1 : les tours d'une session attendent, les autres sessions passent"""
+    async def scenario():
+        limiter = ConcurrencyLimiter(global_limit=4, session_limit=1, max_queue=8, queue_timeout=5)
+        release = asyncio.Event()
+        entered = []
+        tasks = [asyncio.ensure_future(_hold(limiter, session_id, entered, release))
+                 for session_id in ('a', 'a', 'b', 'a')]
+        await _settle()
+
+        assert sorted(entered) == ['a', 'b']
+        # Une session en attente n'occupe pas de place globale
+        assert limiter.stats()['in_flight'] == 2
+        assert limiter.stats()['waiting'] == 2
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert sorted(entered) == ['a', 'a', 'a', 'b']
+        assert limiter.stats()['sessions'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_global_limit_queues_in_arrival_order():
+    async def scenario():
+        limiter = ConcurrencyLimiter(global_limit=2, session_limit=1, max_queue=8, queue_timeout=5)
+        release = asyncio.Event()
+        entered = []
+        tasks = [asyncio.ensure_future(_hold(limiter, session_id, entered, release))
+                 for session_id in ('a', 'b', 'c', 'd')]
+        await _settle()
+        assert entered == ['a', 'b']
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert entered == ['a', 'b', 'c', 'd']
+
+    asyncio.run(scenario())
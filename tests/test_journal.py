@@ -0,0 +1,118 @@
+"""
+Tests du journal partagé entre processus (rattrapage et compaction)
+"""
+
+import multiprocessing
+
+import pytest
+
+from server.utils.journal import Journal, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="verrou inter-processus indisponible (Windows)")
+
+PROCESSES = 3
+WRITES = 300
+COMPACT_EVERY = 50
+
+
+def _open(directory, compact_every=COMPACT_EVERY):
+    """Journal démarré avec son état en mémoire (dictionnaire id -> élément)"""
+    journal = Journal(directory / 'items.json', fsync='none', compact_every=compact_every)
+    state = {item['id']: item for item in journal.load()}
+
+    def reset(items):
+        state.clear()
+        state.update((item['id'], item) for item in items)
+
+    journal.start(
+        lambda: list(state.values()),
+        on_put=lambda item: state.__setitem__(item['id'], item),
+        on_delete=lambda item_id: state.pop(item_id, None),
+        on_reset=reset
+    )
+    return journal, state
+
+
+def _writer(directory, worker):
+    """Écritures d'un processus : éléments propres et compteur partagé (lecture-modification-écriture)"""
+    journal, state = _open(directory)
+    for index in range(WRITES):
+        with journal.transaction():
+            item = {'id': f'{worker}-{index}', 'worker': worker, 'index': index}
+            counter = dict(state.get('counter', {'id': 'counter', 'value': 0}))
+            counter['value'] += 1
+            state[item['id']] = item
+            state['counter'] = counter
+            journal.append([{'op': 'put', 'item': item}, {'op': 'put', 'item': counter}])
+        if index % 3 == 0:
+            # Suppression d'un élément écrit plus tôt par ce processus
+            with journal.transaction():
+                state.pop(f'{worker}-{index}', None)
+                journal.delete(f'{worker}-{index}')
+    journal.close()
+
+
+def _expected_ids():
+    return {f'{worker}-{index}' for worker in range(PROCESSES) for index in range(WRITES) if index % 3}
+
+
+def _run_writers(directory):
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_writer, args=(directory, worker)) for worker in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+    assert [process.exitcode for process in processes] == [0] * PROCESSES
+
+
+def test_concurrent_writers_lose_no_update(tmp_path):
+    """3 processus x 300 écritures, compaction tous les 50 enregistrements : rien n'est perdu"""
+    _run_writers(tmp_path)
+
+    journal = Journal(tmp_path / 'items.json', fsync='none')
+    items = {item['id']: item for item in journal.load()}
+    journal.close()
+
+    assert items.pop('counter')['value'] == PROCESSES * WRITES
+    assert set(items) == _expected_ids()
+    # Compactions effectuées : l'instantané existe et aucune rotation n'est restée en plan
+    assert journal.snapshot_path.exists()
+    assert not journal.rotated_path.exists()
+
+
+def test_reader_catches_up_across_compactions(tmp_path):
+    """Un processus lecteur ouvert avant les écritures rattrape tout via refresh()"""
+    reader, state = _open(tmp_path, compact_every=10 ** 6)
+    try:
+        assert state == {}
+        _run_writers(tmp_path)
+
+        assert reader.refresh()
+        assert state.pop('counter')['value'] == PROCESSES * WRITES
+        assert set(state) == _expected_ids()
+        # Plus rien à relire tant que personne n'écrit
+        assert not reader.refresh()
+    finally:
+        reader.close()
+
+
+def test_interrupted_compaction_is_finished_on_load(tmp_path):
+    """Un journal tourné sans instantané publié (arrêt brutal) est rejoué puis compacté au chargement"""
+    journal, state = _open(tmp_path, compact_every=10 ** 6)
+    for index in range(5):
+        with journal.transaction():
+            state[str(index)] = {'id': str(index)}
+            journal.put({'id': str(index)})
+    journal.close()
+    # Rotation faite, instantané jamais écrit
+    journal.journal_path.replace(journal.rotated_path)
+
+    reloaded = Journal(tmp_path / 'items.json', fsync='none')
+    items = reloaded.load()
+    reloaded.close()
+
+    assert [item['id'] for item in items] == ['0', '1', '2', '3', '4']
+    assert reloaded.seq == 5
+    assert not reloaded.rotated_path.exists()
+    assert reloaded.snapshot_path.exists()
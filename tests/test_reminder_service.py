@@ -0,0 +1,145 @@
+"""
+Tests du planificateur de rappels
+"""
+
+import asyncio
+import datetime
+import multiprocessing
+import queue
+import time
+
+import pytest
+
+from server.services.reminder_service import ReminderService
+from server.utils.journal import fcntl
+
+
+def _in(seconds):
+    """Date ISO dans `seconds` secondes"""
+    return (datetime.datetime.now() + datetime.timedelta(seconds=seconds)).isoformat()
+
+
+def _received(subscriber, count, timeout=5):
+    reminders = []
+    for _ in range(count):
+        reminders.append(subscriber.get(timeout=timeout))
+    return reminders
+
+
+@pytest.fixture
+def reminders(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = ReminderService()
+    yield service
+    service.close()
+    service.journal.close()
+
+
+def test_reminders_fire_in_time_order(reminders):
+    """Déclenchement dans l'ordre des échéances, pas dans l'ordre de création"""
+    subscriber = reminders.subscribe()
+    for message, delay in (("quatre", 0.8), ("un", 0.2), ("trois", 0.6), ("deux", 0.4), ("zéro", -60)):
+        reminders.create_reminder(message, _in(delay))
+
+    fired = _received(subscriber, 5)
+
+    assert [reminder['message'] for reminder in fired] == ["zéro", "un", "deux", "trois", "quatre"]
+    assert all(reminder['status'] == 'fired' for reminder in fired)
+    assert reminders.get_pending_reminders() == []
+
+
+def test_pending_reminders_are_listed_nearest_first(reminders):
+    """Liste des rappels en attente : les plus proches d'abord, bornée par limit"""
+    for day in (5, 1, 9, 3, 7):
+        reminders.create_reminder(f"jour {day}", _in(day * 86400))
+
+    assert [reminder['message'] for reminder in reminders.get_pending_reminders(3)] == ["jour 1", "jour 3", "jour 5"]
+    assert len(reminders.get_pending_reminders()) == 5
+
+
+def test_cancelled_reminder_never_fires(reminders):
+    """Un rappel annulé ne part pas ; après déclenchement, il n'est plus annulable"""
+    subscriber = reminders.subscribe()
+    cancelled = reminders.create_reminder("annulé", _in(0.2))
+    kept = reminders.create_reminder("gardé", _in(0.4))
+
+    assert reminders.cancel_reminder(cancelled['id']) is True
+    assert reminders.cancel_reminder(cancelled['id']) is False
+
+    assert subscriber.get(timeout=5)['id'] == kept['id']
+    with pytest.raises(queue.Empty):
+        subscriber.get(timeout=0.5)
+    assert reminders.cancel_reminder(kept['id']) is False
+
+
+def _wait_until_fired(reminders, timeout=5):
+    deadline = time.monotonic() + timeout
+    while reminders.get_pending_reminders() and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def test_slow_thread_subscriber_is_told_to_reconnect(reminders):
+    """File pleine : l'abonné est retiré et lit None (le flux Flask se ferme)"""
+    subscriber = reminders.subscribe(max_pending=2)
+    for index in range(3):
+        reminders.create_reminder(f"rappel {index}", _in(-60))
+    _wait_until_fired(reminders)
+
+    assert subscriber.get(timeout=5) is None
+
+    # Plus rien n'arrive à un abonné retiré
+    reminders.create_reminder("suivant", _in(-60))
+    _wait_until_fired(reminders)
+    with pytest.raises(queue.Empty):
+        subscriber.get(timeout=0.5)
+
+
+def test_slow_loop_subscriber_is_told_to_reconnect(reminders):
+    """File asyncio pleine : l'abonné lit None (le flux ASGI se ferme)"""
+    async def scenario():
+        subscriber = reminders.subscribe(max_pending=2, loop=asyncio.get_running_loop())
+        for index in range(3):
+            reminders.create_reminder(f"rappel {index}", _in(-60))
+        # La boucle reste libre : les rappels remplissent la file sans être lus
+        await asyncio.to_thread(_wait_until_fired, reminders)
+        return await asyncio.wait_for(subscriber.get(), 5)
+
+    assert asyncio.run(scenario()) is None
+
+
+def _other_worker(reminder_id, fired):
+    """Autre worker : crée un rappel, en annule un, et reçoit lui aussi le déclenchement"""
+    service = ReminderService()
+    subscriber = service.subscribe()
+    created = service.create_reminder("d'un autre worker", _in(0.6))
+    assert service.cancel_reminder(reminder_id)
+    reminder = subscriber.get(timeout=5)
+    assert reminder['id'] == created['id']
+    with pytest.raises(queue.Empty):
+        subscriber.get(timeout=1)
+    fired.put(reminder['fired_at'])
+    service.close()
+    service.journal.close()
+
+
+@pytest.mark.skipif(fcntl is None, reason="verrou inter-processus indisponible (Windows)")
+def test_other_worker_reminders_are_caught_up(reminders):
+    """Rappels créés et annulés par un autre worker : déclenchés une seule fois, annulation respectée"""
+    subscriber = reminders.subscribe()
+    cancelled = reminders.create_reminder("annulé par l'autre worker", _in(1.2))
+
+    context = multiprocessing.get_context('fork')
+    fired = context.Queue()
+    process = context.Process(target=_other_worker, args=(cancelled['id'], fired))
+    process.start()
+
+    reminder = subscriber.get(timeout=5)
+    process.join(30)
+    assert process.exitcode == 0
+
+    assert reminder['message'] == "d'un autre worker"
+    # Le même déclenchement (écrit par un seul des deux workers) des deux côtés
+    assert fired.get(timeout=1) == reminder['fired_at']
+    with pytest.raises(queue.Empty):
+        subscriber.get(timeout=1)
+    assert reminders.get_pending_reminders() == []
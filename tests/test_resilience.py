@@ -0,0 +1,211 @@
+"""
+Tests des nouvelles tentatives, de l'échéance, des appels doublés et du disjoncteur
+"""
+
+import asyncio
+import time
+
+import pytest
+
+anthropic = pytest.importorskip('anthropic')
+httpx = pytest.importorskip('httpx')
+
+from server.services import resilience as resilience_module  # noqa: E402
+from server.services.resilience import (  # noqa: E402
+    CircuitBreaker, CircuitOpen, DeadlineExceeded, ResilientCaller, UpstreamUnavailable
+)
+
+
+def _status_error(status, retry_after=None):
+    """Erreur HTTP de l'API au format du SDK"""
+    headers = {'retry-after': retry_after} if retry_after is not None else {}
+    response = httpx.Response(status, headers=headers,
+                              request=httpx.Request('POST', 'https://api.anthropic.com/v1/messages'))
+    return anthropic.APIStatusError(f"HTTP {status}", response=response, body=None)
+
+
+class Flaky:
+    """Appel qui lève les erreurs données, dans l'ordre, puis réussit"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.timeouts = []
+
+    def __call__(self, timeout):
+        self.timeouts.append(timeout)
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'réponse'
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Attentes entre tentatives enregistrées au lieu d'être faites"""
+    delays = []
+    monkeypatch.setattr(resilience_module.time, 'sleep', delays.append)
+    return delays
+
+
+@pytest.mark.parametrize('status', [429, 500, 503, 529])
+def test_transient_errors_are_retried(sleeps, status):
+    caller = ResilientCaller(deadline=30, max_retries=2, base_delay=0.01, max_delay=0.01)
+    function = Flaky(_status_error(status), _status_error(status))
+
+    assert caller.call(function, caller.new_deadline()) == 'réponse'
+
+    assert len(function.timeouts) == 3
+    assert len(sleeps) == 2 and all(delay <= 0.01 for delay in sleeps)
+    stats = caller.stats()
+    assert (stats['attempts'], stats['retries'], stats['failures'], stats['successes']) == (3, 2, 2, 1)
+    assert stats['breaker']['state'] == CircuitBreaker.CLOSED
+
+
+def test_retry_after_header_sets_the_wait(sleeps):
+    caller = ResilientCaller(deadline=30, max_retries=2, base_delay=0.01, max_delay=0.01)
+
+    caller.call(Flaky(_status_error(429, retry_after='2.5')), caller.new_deadline())
+
+    assert sleeps == [2.5]
+
+
+def test_wait_beyond_the_deadline_gives_up(sleeps):
+    caller = ResilientCaller(deadline=1, max_retries=5, base_delay=0.01, max_delay=0.01)
+
+    with pytest.raises(DeadlineExceeded):
+        caller.call(Flaky(_status_error(429, retry_after='30')), caller.new_deadline())
+    assert sleeps == []
+
+
+def test_each_attempt_gets_the_remaining_time(sleeps):
+    caller = ResilientCaller(deadline=30, max_retries=1, base_delay=0.01, max_delay=0.01)
+    function = Flaky(_status_error(500))
+
+    caller.call(function, time.monotonic() + 10)
+
+    assert 9 < function.timeouts[1] <= function.timeouts[0] <= 10
+
+
+def test_client_errors_are_not_retried(sleeps):
+    caller = ResilientCaller(deadline=30, max_retries=2)
+    error = _status_error(400)
+
+    with pytest.raises(anthropic.APIStatusError) as raised:
+        caller.call(Flaky(error), caller.new_deadline())
+
+    assert raised.value is error
+    assert sleeps == []
+    # L'API a répondu : le disjoncteur n'est pas concerné
+    assert caller.breaker.stats()['consecutive_failures'] == 0
+
+
+def test_retries_are_bounded(sleeps):
+    caller = ResilientCaller(deadline=30, max_retries=2, base_delay=0.01, max_delay=0.01)
+    function = Flaky(*[_status_error(503)] * 5)
+
+    with pytest.raises(UpstreamUnavailable):
+        caller.call(function, caller.new_deadline())
+    assert len(function.timeouts) == 3
+
+
+def test_breaker_opens_then_lets_one_trial_call_through(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience_module.time, 'monotonic', lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats()['retry_in'] == 30
+
+    # Après reset_timeout : un seul appel d'essai (demi-ouvert)
+    now[0] += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    # Essai raté : rouvert pour reset_timeout
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    now[0] += 29
+    assert not breaker.allow()
+
+    # Essai réussi : refermé, compteur remis à zéro
+    now[0] += 1
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.stats() == {'state': CircuitBreaker.CLOSED, 'consecutive_failures': 0, 'opens': 2}
+
+
+def test_open_breaker_rejects_without_calling():
+    caller = ResilientCaller(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    caller.breaker.record_failure()
+    function = Flaky()
+
+    with pytest.raises(CircuitOpen):
+        caller.call(function, caller.new_deadline())
+
+    assert function.timeouts == []
+    assert caller.stats()['circuit_rejections'] == 1
+
+
+def test_hedged_call_returns_the_first_answer():
+    """Appel sans réponse après hedge_after : doublé, le second l'emporte"""
+    caller = ResilientCaller(deadline=5, hedge_after=0.05)
+    calls = []
+
+    def function(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            time.sleep(1)
+            return 'lente'
+        return 'rapide'
+
+    assert caller.call(function, caller.new_deadline()) == 'rapide'
+    stats = caller.stats()
+    assert (stats['hedges'], stats['hedge_wins']) == (1, 1)
+
+
+def test_async_hedged_call_cancels_the_loser():
+    caller = ResilientCaller(deadline=5, hedge_after=0.05)
+    cancelled = []
+    calls = []
+
+    async def function(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        return 'rapide'
+
+    async def scenario():
+        result = await caller.call_async(function, caller.new_deadline())
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario()) == 'rapide'
+    assert cancelled == [True]
+    assert caller.stats()['hedge_wins'] == 1
+
+
+def test_fast_answer_is_not_hedged():
+    caller = ResilientCaller(deadline=5, hedge_after=0.5)
+
+    assert caller.call(Flaky(), caller.new_deadline()) == 'réponse'
+    assert caller.stats()['hedges'] == 0
+
+
+def test_async_call_times_out_at_the_deadline():
+    caller = ResilientCaller(deadline=0.05)
+
+    async def function(timeout):
+        await asyncio.sleep(5)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(caller.call_async(function, caller.new_deadline()))
+    assert caller.breaker.stats()['consecutive_failures'] == 1
@@ -0,0 +1,145 @@
+"""
+Tests des dépôts de tâches (journal JSON et SQL)
+"""
+
+import sys
+import datetime
+import threading
+import multiprocessing
+
+import pytest
+
+from server.models.sql_task_repository import SqlTaskRepository
+from server.models.task_repository import JournalTaskRepository
+from server.utils.journal import fcntl
+
+from task_samples import DUE_DATES, END, PRIORITIES, START, TODAY, apply, final_tasks, ids, mutations, reference_due
+
+
+def test_json_and_sql_repositories_agree(tmp_path):
+    """Mêmes résultats pour les filtres d'échéance, de statut et de priorité sur les deux stockages"""
+    journal_repository = JournalTaskRepository(tmp_path, fsync='none')
+    sql_repository = SqlTaskRepository(f"sqlite:///{tmp_path / 'tasks.db'}")
+    try:
+        operations = list(mutations(seed=11, count=200))
+        apply(journal_repository, operations)
+        apply(sql_repository, operations)
+
+        queries = [
+            lambda repository: repository.all(),
+            lambda repository: repository.by_completed(True),
+            lambda repository: repository.by_priority('high'),
+            lambda repository: repository.due_between(START, END),
+            lambda repository: repository.due_between(None, END, open_only=True),
+            lambda repository: repository.overdue(TODAY),
+            lambda repository: repository.overdue(TODAY, limit=3),
+            lambda repository: repository.by_due_date('2026-10'),
+            lambda repository: repository.by_due_date('2026-10-18T09'),
+            lambda repository: repository.by_due_date('dem'),
+        ]
+        for query in queries:
+            assert ids(query(journal_repository)) == ids(query(sql_repository))
+        for bounds in [(START, END, False), (None, END, True), (START, None, True), (None, None, False)]:
+            assert (journal_repository.count_due_between(*bounds) == sql_repository.count_due_between(*bounds)
+                    == len(journal_repository.due_between(*bounds)))
+        # Échéances égales départagées différemment (ID / ordre d'insertion) : on compare les échéances
+        assert ([task['due_date'] for task in journal_repository.next_due(START, 5)]
+                == [task['due_date'] for task in sql_repository.next_due(START, 5)])
+    finally:
+        journal_repository.journal.close()
+
+
+@pytest.mark.parametrize('backend', ['json', 'sql'])
+@pytest.mark.parametrize('prefix', ['2', '202', '2026', '2026-', '2026-1', '2026-10', '2026-10-1',
+                                    '2026-10-18', '2026-10-18T', '2026-10-18T09:3', 'dem', '2027-01-01T00'])
+def test_by_due_date_matches_prefix_of_any_length(tmp_path, backend, prefix):
+    """Préfixes de toute longueur : mêmes tâches qu'un startswith sur due_date"""
+    if backend == 'json':
+        repository = JournalTaskRepository(tmp_path, fsync='none')
+    else:
+        repository = SqlTaskRepository(f"sqlite:///{tmp_path / 'tasks.db'}")
+    try:
+        # Une tâche par échéance type (ISO avec et sans heure, fuseau, vide, non ISO)
+        tasks = [dict(id=f'task-{index}', title='tâche', description='', created_at='2026-01-01T00:00:00',
+                      due_date=due_date, priority='medium', completed=False)
+                 for index, due_date in enumerate(DUE_DATES)]
+        for task in tasks:
+            repository.add(task)
+        expected = ids(task for task in tasks if (task['due_date'] or '').startswith(prefix))
+        assert expected
+        assert ids(repository.by_due_date(prefix)) == expected
+    finally:
+        if backend == 'json':
+            repository.journal.close()
+
+
+def test_journal_repository_reads_are_safe_during_writes(tmp_path):
+    """Lectures de plusieurs threads pendant les écritures d'un autre (gthread, pont WSGI) : aucune erreur"""
+    repository = JournalTaskRepository(tmp_path, fsync='none', compact_every=200)
+    operations = list(mutations(seed=3, count=3000))
+    errors = []
+    done = threading.Event()
+
+    def write():
+        try:
+            apply(repository, operations)
+        finally:
+            done.set()
+
+    def read():
+        while not done.is_set():
+            try:
+                repository.by_completed(False)
+                repository.by_priority('high')
+                repository.due_between(START, END)
+                repository.next_due(START, 5)
+                repository.overdue(TODAY)
+                repository.by_due_date('2026-10')
+                repository.search('dentiste')
+                repository.all()
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    # Changements de thread fréquents pour provoquer les entrelacements
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+        assert errors == []
+        assert ids(repository.all()) == ids(final_tasks(operations))
+    finally:
+        sys.setswitchinterval(switch_interval)
+        repository.journal.close()
+
+
+def _write_in_child(data_dir):
+    repository = JournalTaskRepository(data_dir, fsync='none', compact_every=50)
+    apply(repository, mutations())
+    repository.journal.close()
+
+
+@pytest.mark.skipif(fcntl is None, reason="verrou inter-processus indisponible (Windows)")
+def test_journal_repository_indexes_catch_up_other_process(tmp_path):
+    """Écritures (et compactions) d'un autre worker reportées dans les index du lecteur"""
+    reader = JournalTaskRepository(tmp_path, fsync='none', compact_every=10 ** 6)
+    try:
+        process = multiprocessing.get_context('fork').Process(target=_write_in_child, args=(tmp_path,))
+        process.start()
+        process.join(60)
+        assert process.exitcode == 0
+
+        tasks = final_tasks(mutations())
+        assert [task['id'] for task in reader.all()] == [task['id'] for task in tasks]
+        for priority in PRIORITIES:
+            assert ids(reader.by_priority(priority)) == ids(task for task in tasks if task['priority'] == priority)
+        assert ids(reader.by_completed(True)) == ids(task for task in tasks if task['completed'])
+        assert [task['id'] for task in reader.due_between(START, END)] == reference_due(tasks, START, END)
+        assert [task['id'] for task in reader.overdue(TODAY)] == reference_due(
+            tasks, end=datetime.datetime.combine(TODAY, datetime.time.min), open_only=True
+        )
+    finally:
+        reader.journal.close()
@@ -0,0 +1,166 @@
+"""
+Tests du service de tâches (pagination par curseur, lots)
+"""
+
+import base64
+import json
+
+import pytest
+
+from server.models.sql_task_repository import SqlTaskRepository
+from server.models.task_repository import JournalTaskRepository
+from server.services.task_service import TaskService
+
+
+def _repository(backend, directory):
+    if backend == 'json':
+        return JournalTaskRepository(directory, fsync='none')
+    return SqlTaskRepository(f"sqlite:///{directory / 'tasks.db'}")
+
+
+@pytest.fixture(params=['json', 'sql'])
+def backend(request):
+    return request.param
+
+
+@pytest.fixture
+def service(backend, tmp_path, monkeypatch):
+    """Service de tâches sur chacun des deux stockages"""
+    # Le service crée data/ dans le répertoire courant
+    monkeypatch.chdir(tmp_path)
+    repository = _repository(backend, tmp_path)
+    yield TaskService(repository)
+    if backend == 'json':
+        repository.journal.close()
+
+
+def _titles(tasks):
+    return [task['title'] for task in tasks]
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_cursor_pages_are_stable_when_tasks_are_added(service, descending):
+    """Ni doublon ni oubli entre deux pages, même si des tâches arrivent entre les requêtes"""
+    originals = {service.create_task(f"tâche {index:02d}")['id'] for index in range(20)}
+
+    seen = []
+    behind, ahead = set(), set()
+    cursor = None
+    while True:
+        page, cursor = service.query_tasks(sort='title', descending=descending, limit=4, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+        # Une tâche avant le curseur (déjà dépassée) et une après (sur une page suivante)
+        last = seen[-1]['title']
+        before, after = last[:-1], last + " bis"
+        behind.add(service.create_task(after if descending else before)['id'])
+        ahead.add(service.create_task(before if descending else after)['id'])
+
+    seen_ids = [task['id'] for task in seen]
+    assert len(seen_ids) == len(set(seen_ids))
+    assert _titles(seen) == sorted(_titles(seen), reverse=descending)
+    assert originals | ahead <= set(seen_ids)
+    assert not behind & set(seen_ids)
+
+
+def test_cursor_pages_with_equal_keys_are_split_by_id(service):
+    """Clés de tri égales (même priorité) : l'ID départage, aucune tâche n'est sautée"""
+    created = {service.create_task(f"tâche {index}", priority='high')['id'] for index in range(9)}
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = service.query_tasks(sort='priority', descending=True, limit=2, cursor=cursor)
+        seen.extend(task['id'] for task in page)
+        if cursor is None:
+            break
+        service.create_task("tâche basse", priority='low')
+
+    assert seen[:9] == sorted(created, reverse=True)
+    assert len(seen) == len(set(seen))
+
+
+def _cursor(missing, value, task_id):
+    payload = json.dumps([missing, value, task_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+@pytest.mark.parametrize('sort, cursor', [
+    # Curseur d'un tri par priorité (entier) réutilisé pour un tri par titre, et inversement
+    ('title', _cursor(False, 2, 'task')),
+    ('priority', _cursor(False, 'tâche', 'task')),
+    ('created_at', _cursor(False, None, 'task')),
+    ('priority', _cursor(False, True, 'task')),
+    ('title', _cursor(0, 'tâche', 'task')),
+    ('title', _cursor(False, 'tâche', 7)),
+    ('title', 'pas du base64 !'),
+    ('title', base64.urlsafe_b64encode(b'{"a": 1}').decode('ascii')),
+])
+def test_mismatched_cursor_is_rejected(service, sort, cursor):
+    """Curseur d'un autre tri ou forgé : ValueError (400 côté API), jamais TypeError"""
+    service.create_task("tâche")
+
+    with pytest.raises(ValueError):
+        service.query_tasks(sort=sort, limit=1, cursor=cursor)
+
+
+@pytest.mark.parametrize('invalid', [
+    {'op': 'create', 'description': "sans titre"},
+    {'op': 'update', 'title': "sans ID"},
+    {'op': 'archive', 'id': 'x'},
+    'pas un objet',
+    {'op': 'delete', 'id': 'tâche-inconnue'},
+    {'op': 'update', 'id': 'tâche-inconnue', 'completed': True},
+])
+def test_batch_with_one_invalid_operation_persists_nothing(service, backend, tmp_path, invalid):
+    """Une opération invalide (ou sur une tâche introuvable) : rien n'est écrit, les autres sont 'skipped'"""
+    kept = service.create_task("à garder", priority='low')
+    removed = service.create_task("à supprimer")
+    before = sorted(_titles(service.get_all_tasks()))
+    version = service.get_version()
+
+    outcome = service.apply_batch([
+        {'op': 'create', 'title': "nouvelle tâche"},
+        {'op': 'update', 'id': kept['id'], 'priority': 'high', 'completed': True},
+        invalid,
+        {'op': 'delete', 'id': removed['id']},
+    ])
+
+    assert outcome['applied'] is False
+    assert [result['status'] for result in outcome['results']] == ['skipped', 'skipped', 'error', 'skipped']
+    assert all('task' not in result for result in outcome['results'])
+
+    assert service.get_version() == version
+    assert sorted(_titles(service.get_all_tasks())) == before
+    assert service.get_task(kept['id'])['priority'] == 'low'
+    assert not service.get_tasks_by_status(True)
+    assert not service.search("nouvelle")
+
+    # Rien n'a été persisté : un nouveau dépôt sur les mêmes fichiers voit l'état d'avant le lot
+    reopened = _repository(backend, tmp_path)
+    try:
+        assert sorted(task['title'] for task in reopened.all()) == before
+        assert reopened.get(kept['id'])['priority'] == 'low'
+    finally:
+        if backend == 'json':
+            reopened.journal.close()
+
+
+def test_valid_batch_is_applied_at_once(service):
+    """Lot valide : toutes les opérations appliquées ensemble"""
+    kept = service.create_task("à garder", priority='low')
+    removed = service.create_task("à supprimer")
+    version = service.get_version()
+
+    outcome = service.apply_batch([
+        {'op': 'create', 'title': "nouvelle tâche"},
+        {'op': 'update', 'id': kept['id'], 'priority': 'high'},
+        {'op': 'delete', 'id': removed['id']},
+    ])
+
+    assert outcome['applied'] is True
+    assert [result['status'] for result in outcome['results']] == ['success'] * 3
+    assert service.get_version() > version
+    assert sorted(_titles(service.get_all_tasks())) == ["nouvelle tâche", "à garder"]
+    assert service.get_task(kept['id'])['priority'] == 'high'
@@ -0,0 +1,73 @@
+"""
+Tests des index en mémoire de TaskStore
+"""
+
+from server.models.task_store import TaskStore
+from server.utils.dates import parse_due_date
+
+from task_samples import END, PRIORITIES, START, WORDS, ids, mutations, reference_due
+
+
+def _replay(check, every=50):
+    """Applique les mutations à un TaskStore et vérifie ses index en cours de route et à la fin"""
+    store = TaskStore()
+    reference = {}
+    for step, (kind, value) in enumerate(mutations()):
+        if kind == 'put':
+            store.put(value)
+            reference[value['id']] = value
+        else:
+            assert store.remove(value) is reference.pop(value)
+        if step % every == 0:
+            check(store, list(reference.values()))
+    check(store, list(reference.values()))
+    return store
+
+
+def _check_status_and_priority(store, tasks):
+    assert len(store) == len(tasks)
+    assert [task['id'] for task in store.values()] == [task['id'] for task in tasks]
+    for completed in (True, False):
+        assert ids(store.by_completed(completed)) == ids(task for task in tasks if task['completed'] == completed)
+    for priority in PRIORITIES:
+        assert ids(store.by_priority(priority)) == ids(task for task in tasks if task['priority'] == priority)
+
+
+def test_status_and_priority_indexes_follow_every_mutation():
+    """Index de statut et de priorité à jour après ajouts, remplacements et suppressions"""
+    store = _replay(_check_status_and_priority)
+
+    assert store.remove('absente') is None
+    store.clear()
+    _check_status_and_priority(store, [])
+
+
+def _check_due(store, tasks):
+    assert [task['id'] for task in store.due_between()] == reference_due(tasks)
+    assert [task['id'] for task in store.due_between(START, END)] == reference_due(tasks, START, END)
+    assert ([task['id'] for task in store.due_between(end=START, open_only=True)]
+            == reference_due(tasks, end=START, open_only=True))
+    assert [task['id'] for task in store.next_due(START, 3)] == reference_due(tasks, START, open_only=True)[:3]
+    assert ids(store.unparsed_due()) == ids(
+        task for task in tasks if task.get('due_date') and parse_due_date(task['due_date']) is None
+    )
+
+
+def test_due_indexes_follow_every_mutation():
+    """Intervalles, retards et prochaines échéances identiques à un parcours complet, échéances non ISO à part"""
+    store = _replay(_check_due)
+    store.clear()
+    _check_due(store, [])
+
+
+def _check_search(store, tasks):
+    for word in WORDS:
+        expected = ids(task for task in tasks if word in task['title'] or word in task['description'])
+        assert ids(store.search(word, limit=len(tasks) + 1)) == expected
+
+
+def test_search_index_follows_every_mutation():
+    """Un mot retiré d'un titre (remplacement) ou une tâche supprimée ne sont plus trouvés"""
+    store = _replay(_check_search)
+    store.clear()
+    assert store.search('dentiste') == []
@@ -0,0 +1,112 @@
+"""
+Tests de la détection d'activité vocale
+"""
+
+import array
+import sys
+
+import pytest
+
+from server.utils.vad import EnergyVad, frame_rms
+
+RATE = 16000
+FRAME_MS = 30
+FRAME_BYTES = RATE * FRAME_MS // 1000 * 2
+
+
+def _pcm(amplitude, frames, marker=0):
+    """Trames PCM 16 bits : signal carré d'amplitude donnée ; `marker` distingue les trames"""
+    samples = array.array('h', [amplitude if index % 2 else -amplitude for index in range(FRAME_BYTES // 2)] * frames)
+    if marker:
+        samples[0] = marker
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples.tobytes()
+
+
+SILENCE = _pcm(20, 1)
+SPEECH = _pcm(5000, 1)
+
+
+def _vad(**settings):
+    return EnergyVad(RATE, frame_ms=FRAME_MS, start_ms=90, end_silence_ms=300, pre_roll_ms=150, **settings)
+
+
+def test_frame_rms():
+    assert frame_rms(SPEECH) == pytest.approx(5000)
+    assert frame_rms(b'') == 0.0
+
+
+def test_utterance_start_and_end():
+    """Début après start_ms de parole, fin après end_silence_ms de silence"""
+    vad = _vad()
+    assert vad.feed(SILENCE * 20) == []
+    # Deux trames parlées ne suffisent pas (start_ms = 3 trames)
+    assert vad.feed(SPEECH * 2) == []
+    assert vad.feed(SPEECH) == [('start', None)]
+    assert vad.in_speech
+
+    assert vad.feed(SPEECH * 10 + SILENCE * 9) == []
+    events = vad.feed(SILENCE)
+    assert [kind for kind, _ in events] == ['end']
+    assert not vad.in_speech
+
+    # Pré-enregistrement (5 trames, dont les 3 qui ont ouvert l'énoncé), parole,
+    # puis silence final réduit à la marge du pré-enregistrement
+    audio = events[0][1]
+    assert len(audio) == (5 + 10 + 5) * FRAME_BYTES
+
+
+def test_pre_roll_keeps_audio_before_the_start():
+    """Les trames qui précèdent le début de la parole sont dans l'énoncé"""
+    vad = _vad()
+    before = [_pcm(20, 1, marker=index + 1) for index in range(10)]
+    vad.feed(b''.join(before))
+    assert vad.feed(SPEECH * 3) == [('start', None)]
+
+    (kind, audio), = vad.flush()
+    assert kind == 'end'
+    # pre_roll_ms = 5 trames : les 2 dernières trames de silence et les 3 trames parlées
+    assert audio == before[-2] + before[-1] + SPEECH * 3
+
+
+def test_chunk_boundaries_do_not_change_the_result():
+    """Morceaux de taille quelconque (même impaire) : mêmes énoncés qu'en un seul envoi"""
+    stream = SILENCE * 10 + SPEECH * 8 + SILENCE * 12 + SPEECH * 5 + SILENCE * 12
+    whole = _vad().feed(stream)
+
+    vad = _vad()
+    pieces = []
+    for offset in range(0, len(stream), 333):
+        pieces.extend(vad.feed(stream[offset:offset + 333]))
+
+    assert pieces == whole
+    assert [kind for kind, _ in whole] == ['start', 'end', 'start', 'end']
+
+
+def test_max_utterance_ends_continuous_speech():
+    vad = _vad(max_utterance_ms=600)
+    events = vad.feed(SPEECH * 45)
+    # 20 trames par énoncé ; le suivant s'ouvre après start_ms de parole
+    assert [kind for kind, _ in events] == ['start', 'end', 'start', 'end', 'start']
+    assert [len(audio) for kind, audio in events if kind == 'end'] == [20 * FRAME_BYTES] * 2
+
+
+@pytest.mark.parametrize('tail', [1, 3, FRAME_BYTES - 1])
+def test_flush_drops_a_trailing_half_sample(tail):
+    """flush() d'un flux coupé au milieu d'un échantillon : audio PCM de longueur paire"""
+    vad = _vad()
+    vad.feed(SPEECH * 3 + SPEECH[:tail])
+
+    (kind, audio), = vad.flush()
+
+    assert kind == 'end'
+    assert len(audio) % 2 == 0
+    assert audio == SPEECH * 3 + SPEECH[:tail - tail % 2]
+    assert vad.flush() == []
+
+
+def test_flush_without_speech_returns_nothing():
+    vad = _vad()
+    vad.feed(SILENCE * 5 + b'\x01')
+    assert vad.flush() == []